@@ -0,0 +1,93 @@
+"""Run a batch of reconciliation jobs."""
+
+import os
+import sys
+import json
+import time
+import argparse
+import textwrap
+import lib.batch as batch
+
+
+def parse_command_line(argv=None):
+    """Get user input. Use the given argument list instead of sys.argv."""
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=textwrap.dedent("""
+            Run a batch of reconcile.py jobs with a shared pool of workers.
+
+            The manifest has one job per line. A line is either the arguments
+            for reconcile.py, like:
+
+                @split_1_args.txt split_1.csv
+
+            or a workflow ID followed by any extra reconcile.py arguments:
+
+                1234 --column-types="Locality:text"
+
+            Workflow jobs read the --input-file and write their unreconciled,
+            reconciled, and summary files into the --output-dir. They are
+            named after the workflow ID. Blank lines and "#" comments are
+            skipped.
+            """))
+
+    parser.add_argument('manifest', metavar="MANIFEST",
+                        help="""The file listing the jobs.""")
+
+    parser.add_argument('-i', '--input-file',
+                        help="""The export that the workflow jobs read.""")
+
+    parser.add_argument('-o', '--output-dir', default='.',
+                        help="""Write the workflow jobs' outputs into this
+                            directory (Default=.).""")
+
+    parser.add_argument('-j', '--workers', type=int,
+                        default=os.cpu_count() or 1,
+                        help="""How many jobs to run at once. The default is
+                            the number of CPUs.""")
+
+    parser.add_argument('--report',
+                        help="""Write a JSON report of each job's status and
+                            timings to this file.""")
+
+    parser.add_argument('--profile', action='store_true',
+                        help="""Add each job's --profile report to the batch
+                            report.""")
+
+    args = parser.parse_args(argv)
+
+    if args.workers < 1:
+        print('--workers must be at least 1.')
+        sys.exit(1)
+
+    return args
+
+
+def main():
+    """Run the jobs."""
+    args = parse_command_line()
+
+    jobs = batch.read_manifest(args)
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    statuses = batch.run(args, jobs)
+    report = batch.report(args, statuses, time.perf_counter() - start)
+
+    for status in statuses:
+        print('{:>4} {:<6} {:>9.2f}s  {}'.format(
+            status['job'], status['status'], status['wall'], status['name']))
+    print('{} ok, {} failed in {:.2f}s'.format(
+        report['ok'], report['failed'], report['wall']))
+
+    if args.report:
+        with open(args.report, 'w') as out_file:
+            json.dump(report, out_file, indent=2)
+
+    if report['failed']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""Time each stage of a reconciliation run.
+
+We run on a synthetic export (see synthetic.py) or on a real one. The results
+are saved as JSON so they can be compared between commits. Run it from the
+repository's root directory:
+
+    python -m benchmarks.benchmark --subjects 5000
+    python -m benchmarks.benchmark --compare benchmarks/results/<earlier>.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import textwrap
+import subprocess
+from copy import copy
+from datetime import datetime
+from contextlib import contextmanager
+from collections import OrderedDict
+from os.path import join
+import reconcile
+import lib.util as util
+import lib.reconciler as reconciler
+import lib.summary as summary
+import lib.merged as merged
+import lib.compact as compact
+import lib.profiler as profiler
+import lib.subject_data as subject_data
+from lib.writer import Writer
+from benchmarks import synthetic
+
+RESULTS_DIR = join('benchmarks', 'results')
+
+
+def parse_command_line(argv=None):
+    """Get user input."""
+    parser = argparse.ArgumentParser(
+        description=textwrap.dedent("""
+            Time each stage of a reconciliation run on a synthetic, or real,
+            Notes from Nature export and save the results."""))
+
+    parser.add_argument('--input-file',
+                        help="""Benchmark this export instead of a synthetic
+                            one.""")
+
+    parser.add_argument('--input-workflow-id', type=int,
+                        help="""The workflow to extract from the
+                            --input-file.""")
+
+    parser.add_argument('-c', '--column-types', action='append',
+                        help="""Column types for the --input-file. See
+                            reconcile.py.""")
+
+    parser.add_argument('--compact', action='store_true',
+                        help="""Store the data in compact dtypes. See
+                            reconcile.py.""")
+
+    parser.add_argument('--results-dir', default=RESULTS_DIR,
+                        help="""Save the results in this directory
+                            (Default={}).""".format(RESULTS_DIR))
+
+    parser.add_argument('--compare',
+                        help="""Compare the results with this earlier results
+                            file.""")
+
+    synthetic.add_arguments(parser)
+
+    return parser.parse_args(argv)
+
+
+@contextmanager
+def timer(stages, name):
+    """Time a stage with the wall clock and the CPU time."""
+    wall, cpu = time.perf_counter(), time.process_time()
+    yield
+    stages[name] = {
+        'wall': round(time.perf_counter() - wall, 4),
+        'cpu': round(time.process_time() - cpu, 4)}
+
+
+def only_output(args, output):
+    """Copy the arguments but only keep one of the outputs."""
+    args = copy(args)
+    for name in ['unreconciled', 'reconciled', 'summary', 'merged']:
+        if name != output:
+            setattr(args, name, None)
+    return args
+
+
+def run(args, work_dir):
+    """Run the stages and return the results."""
+    stages = OrderedDict()
+
+    input_file = args.input_file
+    if not input_file:
+        input_file = join(work_dir, 'export.csv')
+        with timer(stages, 'generate'):
+            with open(input_file, 'w', newline='') as out_file:
+                synthetic.generate(args, out_file)
+
+    argv = [input_file,
+            '-u', join(work_dir, 'unreconciled.csv'),
+            '-r', join(work_dir, 'reconciled.csv'),
+            '-s', join(work_dir, 'summary.html'),
+            '-m', join(work_dir, 'merged.csv')]
+    if args.input_file:
+        argv += ['-c' + c for c in args.column_types or []]
+        if args.input_workflow_id:
+            argv += ['-w', str(args.input_workflow_id)]
+    elif synthetic.column_types(args):
+        argv += ['-c', synthetic.column_types(args)]
+    argv += ['--compact'] if args.compact else []
+    rargs = reconcile.parse_command_line(argv)
+
+    with timer(stages, 'nfn_read'):
+        unreconciled, column_types, subjects = util.get_plugins(
+            'formats')['nfn'].read(rargs)
+
+    memory = {'unreconciled_mb': compact.memory_mb(unreconciled),
+              'subjects_mb': compact.memory_mb(subjects)}
+    if rargs.compact:
+        with timer(stages, 'compact'):
+            unreconciled = compact.compact(rargs, unreconciled)
+        memory['compact_mb'] = compact.memory_mb(unreconciled)
+
+    plugins = util.get_plugins('column_types')
+    column_types = reconcile.get_column_types(rargs, column_types)
+
+    # Each column type on its own and then all of them together
+    reconciled_types = {k: v for k, v in column_types.items()
+                        if k in unreconciled.columns}
+    for col_type in sorted({v['type'] for v in reconciled_types.values()}):
+        some_types = {k: v for k, v in reconciled_types.items()
+                      if v['type'] == col_type}
+        with timer(stages, 'reconcile_' + col_type):
+            reconciler.build(rargs, unreconciled, some_types, plugins=plugins)
+
+    with timer(stages, 'reconcile'):
+        reconciled, explanations = reconciler.build(
+            rargs, unreconciled, column_types, plugins=plugins)
+
+    with timer(stages, 'join_subjects'):
+        unreconciled = subject_data.join(
+            rargs, unreconciled, subjects, column_types)
+        reconciled = subject_data.join(
+            rargs, reconciled, subjects, column_types)
+
+    writer = Writer()
+
+    with timer(stages, 'write_unreconciled'):
+        reconcile.write_unreconciled(rargs, unreconciled, writer)
+
+    with timer(stages, 'write_reconciled'):
+        reconcile.write_reconciled(
+            only_output(rargs, 'reconciled'), unreconciled, reconciled,
+            explanations, column_types, writer)
+
+    with timer(stages, 'summary'):
+        summary.report(rargs, unreconciled, reconciled, explanations,
+                       column_types, writer=writer)
+
+    with timer(stages, 'merge'):
+        with writer.open(rargs.merged) as out_file:
+            merged.write(rargs, unreconciled, reconciled, explanations,
+                         column_types, out_file)
+
+    return {
+        'commit': git_commit(),
+        'date': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'params': {k: v for k, v in vars(args).items()
+                   if k not in ['results_dir', 'compare']},
+        'counts': {
+            'transcripts': unreconciled.shape[0],
+            'subjects': reconciled.shape[0],
+            'columns': len(column_types)},
+        'memory': dict(memory, peak_rss_mb=profiler.peak_rss_mb()),
+        'stages': stages}
+
+
+def git_commit():
+    """Get the current commit if we can."""
+    try:
+        output = subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            stderr=subprocess.DEVNULL)
+        return output.decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def save(args, results):
+    """Save the results to a file named after the date and commit."""
+    os.makedirs(args.results_dir, exist_ok=True)
+    path = join(args.results_dir, '{}-{}.json'.format(
+        datetime.now().strftime('%Y%m%d-%H%M%S'), results['commit']))
+    with open(path, 'w') as out_file:
+        json.dump(results, out_file, indent=2)
+    return path
+
+
+def report(results, earlier=None):
+    """Print the stage timings and compare them to the earlier results."""
+    for name, size in results['memory'].items():
+        print('{:<24} {:>10.2f} MB'.format(name, size))
+    print()
+
+    print('{:<24} {:>10} {:>10} {:>10} {:>8}'.format(
+        'stage', 'wall', 'cpu', 'earlier', 'ratio'))
+    for name, stage in results['stages'].items():
+        before, ratio = '', ''
+        if earlier and name in earlier['stages']:
+            before = earlier['stages'][name]['wall']
+            ratio = '{:.2f}'.format(stage['wall'] / before) if before else ''
+            before = '{:.4f}'.format(before)
+        print('{:<24} {:>10.4f} {:>10.4f} {:>10} {:>8}'.format(
+            name, stage['wall'], stage['cpu'], before, ratio))
+
+
+def main():
+    """Main function."""
+    args = parse_command_line()
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        results = run(args, work_dir)
+    finally:
+        shutil.rmtree(work_dir)
+
+    earlier = None
+    if args.compare:
+        with open(args.compare) as in_file:
+            earlier = json.load(in_file)
+
+    path = save(args, results)
+    report(results, earlier)
+    print('\nSaved results to {}'.format(path))
+
+
+if __name__ == "__main__":
+    main()
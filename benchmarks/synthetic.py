@@ -0,0 +1,197 @@
+"""Generate a synthetic Notes from Nature (Zooniverse) classifications export.
+
+The export looks like the real thing: one row per classification with the
+annotations, subject data, and metadata as JSON blobs. Each subject has a
+"true" label and every transcript of it is a noisy copy of that label.
+"""
+
+# pylint: disable=invalid-name
+
+import csv
+import json
+import random
+import string
+import argparse
+import textwrap
+from datetime import datetime, timedelta
+
+WORDS = """
+    north south east west of near road river creek lake hill valley forest
+    field meadow swamp trail bridge station farm ranch mountain park county
+    mile km ft elev under bark on leaves in litter collected by coll leg
+    specimen label dry wet sandy rocky slope ridge edge woods pine oak maple
+    """.split()
+NAMES = """
+    Smith Jones Noyes Cameron Garcia Miller Davis Lopez Wilson Anderson
+    Thomas Taylor Moore Jackson Martin Lee Perez Thompson White Harris
+    """.split()
+COUNTRIES = """
+    Canada Mexico Peru Chile Brazil Argentina Colombia Ecuador Bolivia
+    Panama Honduras Guatemala Cuba Jamaica Venezuela Uruguay Paraguay
+    """.split()
+
+WORKFLOW_NAME = 'Synthetic_Synthetic expedition'
+EPOCH = datetime(2017, 3, 1)
+
+
+def parse_command_line(argv=None):
+    """Get user input."""
+    parser = argparse.ArgumentParser(
+        description=textwrap.dedent("""
+            Generate a synthetic Notes from Nature classifications export for
+            testing and benchmarking."""))
+
+    parser.add_argument('-o', '--output', required=True,
+                        help="""Write the export to this CSV file.""")
+
+    add_arguments(parser)
+
+    return parser.parse_args(argv)
+
+
+def add_arguments(parser):
+    """Add the options that describe the synthetic export."""
+    parser.add_argument('--subjects', default=1000, type=int,
+                        help="""How many subjects (Default=1000).""")
+
+    parser.add_argument('--transcripts', default=3, type=int,
+                        help="""Transcripts per subject (Default=3).""")
+
+    parser.add_argument('--select', default=3, type=int,
+                        help="""How many select (drop-down) tasks
+                            (Default=3).""")
+
+    parser.add_argument('--text', default=5, type=int,
+                        help="""How many free text tasks (Default=5).""")
+
+    parser.add_argument('--numeric', default=2, type=int,
+                        help="""How many numeric tasks (Default=2).""")
+
+    parser.add_argument('--noise', default=0.2, type=float,
+                        help="""The chance that a transcribed value differs
+                            from the label (0-1, Default=0.2).""")
+
+    parser.add_argument('--workflow-id', default=1001, type=int,
+                        help="""The workflow ID (Default=1001).""")
+
+    parser.add_argument('--seed', default=42, type=int,
+                        help="""Seed for the random number generator
+                            (Default=42).""")
+
+
+def column_types(args):
+    """Get the --column-types for the tasks that the nfn format can't guess."""
+    return ','.join('Number {}:mmr'.format(i)
+                    for i in range(1, args.numeric + 1))
+
+
+def generate(args, out_file):
+    """Write the synthetic export to the file."""
+    rng = random.Random(args.seed)
+    writer = csv.writer(out_file)
+    writer.writerow([
+        'classification_id', 'user_name', 'user_id', 'user_ip',
+        'workflow_id', 'workflow_name', 'workflow_version', 'created_at',
+        'metadata', 'annotations', 'subject_data', 'subject_ids'])
+
+    users = ['user {}'.format(i)
+             for i in range(max(args.transcripts, args.subjects // 10))]
+    classification_id = 10000000
+
+    for subject in range(args.subjects):
+        subject_id = 3000000 + subject
+        label = build_label(args, rng)
+        subject_data = json.dumps({str(subject_id): {
+            'retired': {'id': subject_id, 'subject_id': subject_id},
+            '#MulTitle': 'image_{}'.format(subject_id),
+            'location': 'https://example.com/images/{}.jpg'.format(
+                subject_id)}})
+
+        for user_name in rng.sample(users, args.transcripts):
+            classification_id += 1
+            started = EPOCH + timedelta(seconds=classification_id - 10000000)
+            finished = started + timedelta(seconds=rng.randint(60, 600))
+            metadata = json.dumps({
+                'started_at': started.isoformat() + 'Z',
+                'finished_at': finished.isoformat() + 'Z'})
+            writer.writerow([
+                classification_id, user_name, user_name.split()[-1],
+                'ip', args.workflow_id, WORKFLOW_NAME, '1.1',
+                finished.strftime('%Y-%m-%d %H:%M:%S UTC'),
+                metadata,
+                json.dumps(build_annotations(args, rng, label)),
+                subject_data, subject_id])
+
+
+def build_label(args, rng):
+    """Build the true values for a subject's tasks."""
+    label = {}
+    for i in range(1, args.select + 1):
+        label['Select {}'.format(i)] = rng.choice(COUNTRIES)
+    for i in range(1, args.text + 1):
+        words = rng.sample(WORDS, rng.randint(2, 8))
+        if i == 1:
+            words = [rng.choice(string.ascii_uppercase) + '.',
+                     rng.choice(NAMES)]
+        label['Text {}'.format(i)] = ' '.join(words)
+    for i in range(1, args.numeric + 1):
+        label['Number {}'.format(i)] = str(rng.randint(1, 3000))
+    return label
+
+
+def build_annotations(args, rng, label):
+    """Build one transcript of the label in the annotations format."""
+    annotations = []
+    for i in range(1, args.select + 1):
+        name = 'Select {}'.format(i)
+        value = label[name]
+        if rng.random() < args.noise:
+            value = rng.choice(COUNTRIES + [''])
+        annotations.append({'task': 'S{}'.format(i), 'value': [{
+            'select_label': name,
+            'option': bool(value),
+            'value': value and 'opt-' + value.lower(),
+            'label': value}]})
+    for i in range(1, args.text + 1):
+        name = 'Text {}'.format(i)
+        annotations.append({'task': 'T{}'.format(i), 'task_label': name,
+                            'value': add_noise(args, rng, label[name])})
+    for i in range(1, args.numeric + 1):
+        name = 'Number {}'.format(i)
+        value = label[name]
+        if rng.random() < args.noise:
+            value = rng.choice(['', str(int(value) + rng.randint(-5, 5))])
+        annotations.append({'task': 'N{}'.format(i), 'task_label': name,
+                            'value': value})
+    return annotations
+
+
+def add_noise(args, rng, value):
+    """Make the kind of mistakes & variations that volunteers make."""
+    if rng.random() >= args.noise:
+        return value
+    noise = rng.randint(0, 5)
+    words = value.split()
+    if noise == 0:
+        return ''
+    if noise == 1:
+        return value.upper()
+    if noise == 2:
+        return value + '.'
+    if noise == 3 and len(value) > 1:
+        i = rng.randint(0, len(value) - 2)
+        return value[:i] + value[i + 1] + value[i] + value[i + 2:]
+    if noise == 4 and len(words) > 1:
+        return ' '.join(words[:-1])
+    return ' '.join(words + [rng.choice(WORDS)])
+
+
+def main():
+    """Main function."""
+    args = parse_command_line()
+    with open(args.output, 'w', newline='') as out_file:
+        generate(args, out_file)
+
+
+if __name__ == "__main__":
+    main()
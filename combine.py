@@ -0,0 +1,69 @@
+"""Combine the artifacts from --shard runs into one set of outputs."""
+
+import sys
+import textwrap
+import zipfile
+import reconcile
+import lib.artifact as artifact
+import lib.profiler as profiler
+from lib.writer import Writer
+
+USAGE = textwrap.dedent("""
+    usage: combine.py ARTIFACT [ARTIFACT ...] [reconcile.py options]
+
+    Put the artifacts saved by "reconcile.py --shard I/N --save-artifact FILE"
+    runs back together. Give every shard's artifact and then the reconcile.py
+    output options, like -r, -u, -m, and -s. The outputs are the ones that a
+    run without --shard would write.
+    """)
+
+
+def split_argv(argv):
+    """Split the arguments into the artifacts and the reconcile.py options."""
+    paths = []
+    for arg in argv:
+        if arg.startswith('-'):
+            break
+        paths.append(arg)
+    return paths, argv[len(paths):]
+
+
+def parse_command_line(argv=None):
+    """Get the artifacts and the reconcile.py arguments for the outputs."""
+    argv = sys.argv[1:] if argv is None else argv
+    paths, argv = split_argv(argv)
+
+    if not paths or argv[:1] in (['-h'], ['--help']):
+        print(USAGE)
+        sys.exit(0 if paths else 1)
+
+    for path in paths:
+        if not zipfile.is_zipfile(path):
+            print('"{}" is not an artifact. Save the shards with '
+                  '--save-artifact.'.format(path))
+            sys.exit(1)
+
+    args = reconcile.parse_command_line(
+        [paths[0], '--from-artifact'] + argv)
+    return paths, args
+
+
+def combine(args, paths):
+    """Load the artifacts as one and write the outputs."""
+    with Writer(args.zip, parallel=args.zip_parallel) as writer:
+        with profiler.stage('load_artifact'):
+            unreconciled, reconciled, explanations, column_types = (
+                artifact.load(args, paths))
+        reconcile.write_unreconciled(args, unreconciled, writer)
+        reconcile.write_reconciled(args, unreconciled, reconciled,
+                                   explanations, column_types, writer)
+
+
+def main():
+    """Combine the shards."""
+    paths, args = parse_command_line()
+    combine(args, paths)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Save and load the reconciliation results as one artifact file.
+
+The artifact lets us rebuild the outputs, with a new title or page size for
+instance, without reading and reconciling the input again. It is a zip archive
+with a manifest and a Feather (columnar) file for each data frame.
+"""
+
+import io
+import json
+import zipfile
+import pandas as pd
+import pyarrow.feather as feather
+import lib.util as util
+import lib.shard as shard
+
+VERSION = 1
+MANIFEST = 'manifest.json'
+FRAMES = ['unreconciled', 'reconciled', 'explanations']
+
+# These arguments describe the data in the artifact
+DATA_ARGS = ['group_by', 'key_column', 'user_column']
+
+
+def save(args, unreconciled, reconciled, explanations, column_types):
+    """Save the data frames and column types to the artifact file."""
+    frames = {
+        'unreconciled': unreconciled.reset_index(drop=True),
+        'reconciled': reconciled.rename_axis(args.group_by).reset_index(),
+        'explanations': explanations.rename_axis(
+            args.group_by).reset_index()}
+
+    manifest = {
+        'version': VERSION,
+        'column_types': column_types,
+        'args': {
+            'group_by': args.group_by,
+            'key_column': args.key_column,
+            'user_column': args.user_column,
+            'input_file': args.input_file,
+            'title': args.title,
+            'shard': getattr(args, 'shard', None)}}
+
+    with zipfile.ZipFile(args.save_artifact, mode='w') as zippy:
+        zippy.writestr(MANIFEST, json.dumps(manifest, indent=2))
+        for name in FRAMES:
+            buffer = io.BytesIO()
+            feather.write_feather(frames[name], buffer)
+            zippy.writestr(name + '.feather', buffer.getvalue())
+
+
+def load(args, paths=None):
+    """
+    Load the data frames and column types from the artifact files.
+
+    The input file is the artifact. We also restore the arguments that were
+    used to build it. When there are several artifacts, from --shard runs, we
+    combine them into what a single run would have built.
+    """
+    paths = paths if paths else [args.input_file]
+    manifests, frames = zip(*[read(path) for path in paths])
+    check_shards(paths, manifests)
+
+    saved = manifests[0]['args']
+    for arg in DATA_ARGS:
+        setattr(args, arg, saved[arg])
+    if not args.title:
+        args.title = saved['title']
+    args.input_file = saved['input_file']
+
+    if len(frames) == 1:
+        frames = frames[0]
+        reconciled = frames['reconciled'].set_index(args.group_by)
+        explanations = frames['explanations'].set_index(args.group_by)
+        return (frames['unreconciled'], reconciled, explanations,
+                manifests[0]['column_types'])
+
+    # Shards hold whole groups so a stable sort by group restores the order
+    unreconciled = (pd.concat([f['unreconciled'] for f in frames],
+                              ignore_index=True)
+                      .sort_values(args.group_by, kind='mergesort')
+                      .reset_index(drop=True))
+    reconciled, explanations = [
+        pd.concat([f[name].set_index(args.group_by) for f in frames])
+          .sort_index()
+        for name in ['reconciled', 'explanations']]
+
+    return (unreconciled, reconciled, explanations,
+            combine_column_types(manifests))
+
+
+def read(path):
+    """Read the manifest and data frames from an artifact file."""
+    with zipfile.ZipFile(path) as zippy:
+        manifest = json.loads(zippy.read(MANIFEST).decode('utf-8'))
+
+        if manifest.get('version') != VERSION:
+            util.error_exit('The artifact is version {} but we can only read '
+                            'version {}.'.format(
+                                manifest.get('version'), VERSION))
+
+        frames = {}
+        for name in FRAMES:
+            buffer = io.BytesIO(zippy.read(name + '.feather'))
+            frames[name] = feather.read_feather(buffer)
+
+    return manifest, frames
+
+
+def check_shards(paths, manifests):
+    """Make sure that the artifacts are all of the shards of one run."""
+    if len(manifests) == 1:
+        return
+
+    for arg in DATA_ARGS:
+        if len({m['args'][arg] for m in manifests}) > 1:
+            util.error_exit('The artifacts have different --{} values.'.format(
+                arg.replace('_', '-')))
+
+    shards = [shard.split(m['args'].get('shard') or '') for m in manifests]
+    counts = {count for _, count in shards}
+    numbers = sorted(number for number, _ in shards)
+    if None in counts or len(counts) > 1 \
+            or numbers != list(range(1, len(paths) + 1)) \
+            or counts != {len(paths)}:
+        util.error_exit('The artifacts must be every shard, 1/N to N/N, '
+                        'of one run.')
+
+
+def combine_column_types(manifests):
+    """
+    Put the shards' column types together.
+
+    A shard may not have seen every column so we take the union. A column
+    keeps the earliest order that a shard gave it.
+    """
+    column_types = {}
+    for manifest in manifests:
+        for name, column_type in manifest['column_types'].items():
+            if name not in column_types:
+                column_types[name] = dict(column_type)
+            column_types[name]['order'] = min(
+                column_types[name]['order'], column_type['order'])
+    return column_types
@@ -0,0 +1,166 @@
+"""Run many reconciliation jobs in one process with a shared worker pool.
+
+A manifest lists the jobs, one per line. A line is either the arguments for
+reconcile.py, like "@split_1_args.txt split_1.csv", or a workflow ID followed
+by any extra arguments. Workflow jobs read the batch's input file and write
+their outputs into the batch's output directory. Blank lines and "#" comments
+are skipped.
+
+The workers live for the whole batch, so the interpreter and plug-in startup
+is paid once per worker and not once per job. Each worker also keeps the last
+few parsed input files. The jobs that read the same input file are split into
+at most one group per worker and a group's jobs run one after another on the
+same worker, so each worker parses a shared export once and all of the workers
+are kept busy.
+"""
+
+import io
+import os
+import math
+import time
+import shlex
+import traceback
+from contextlib import redirect_stdout, redirect_stderr
+from functools import partial
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from os.path import join, abspath
+import reconcile
+import lib.util as util
+import lib.profiler as profiler
+
+Job = namedtuple('Job', 'index name argv')
+
+WORKFLOW_OUTPUTS = [
+    ('--unreconciled', '_unreconciled.csv'),
+    ('--reconciled', '_reconciled.csv'),
+    ('--summary', '_summary.html')]
+
+
+def read_manifest(args):
+    """Get the jobs from the manifest file."""
+    jobs = []
+    with open(args.manifest) as in_file:
+        for line in in_file:
+            tokens = shlex.split(line, comments=True)
+            if not tokens:
+                continue
+            if tokens[0].isdigit():
+                argv = workflow_argv(args, tokens[0], tokens[1:])
+            else:
+                argv = tokens
+            jobs.append(Job(len(jobs) + 1, ' '.join(tokens), argv))
+    return jobs
+
+
+def workflow_argv(args, workflow_id, extra):
+    """Build the reconcile.py arguments for a workflow job."""
+    if not args.input_file:
+        util.error_exit(
+            'Workflow {} needs an --input-file.'.format(workflow_id))
+    prefix = join(args.output_dir, workflow_id)
+    argv = [args.input_file, '--workflow-id', workflow_id]
+    for option, suffix in WORKFLOW_OUTPUTS:
+        argv += [option, prefix + suffix]
+    return argv + extra
+
+
+def run(args, jobs):
+    """
+    Run the jobs and return their statuses in manifest order.
+
+    Each worker gets a group of the jobs for an input file at once.
+    """
+    job_runner = partial(run_jobs, profile=args.profile)
+
+    if args.workers == 1:
+        return job_runner(jobs)
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        statuses = [status for group in pool.map(
+            job_runner, group_by_input(jobs, args.workers))
+                    for status in group]
+    return sorted(statuses, key=lambda status: status['job'])
+
+
+def group_by_input(jobs, workers):
+    """
+    Group the jobs by their input file, keeping the manifest order.
+
+    A group gets at most its worker's share of the jobs, so the jobs for one
+    input file are still spread over all of the workers.
+    """
+    size = math.ceil(len(jobs) / workers)
+    inputs = OrderedDict()
+    for job in jobs:
+        inputs.setdefault(input_file(job), []).append(job)
+    return [group[i:i + size] for group in inputs.values()
+            for i in range(0, len(group), size)]
+
+
+def input_file(job):
+    """
+    Get the job's input file.
+
+    A job with bad arguments gets its own group and reports the error when it
+    runs.
+    """
+    try:
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+            args = reconcile.parse_command_line(job.argv)
+    except SystemExit:
+        return job.index
+    return abspath(args.input_file)
+
+
+def run_jobs(jobs, profile=False):
+    """Run the jobs one after another in a worker."""
+    return [run_job(job, profile=profile) for job in jobs]
+
+
+def run_job(job, profile=False):
+    """Run one job in a worker and report how it went."""
+    if util.CSV_CACHE is None:
+        util.CSV_CACHE = OrderedDict()
+
+    status = OrderedDict([
+        ('job', job.index), ('name', job.name), ('worker', os.getpid())])
+
+    reports = []
+    if profile:
+        profiler.add_hook(reports.append)
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        reconcile.run(reconcile.parse_command_line(job.argv))
+        status['status'] = 'ok'
+    except SystemExit as exit_:
+        status['status'] = 'failed' if exit_.code else 'ok'
+        if exit_.code:
+            status['error'] = str(exit_.code)
+    except Exception:  # pylint: disable=broad-except
+        status['status'] = 'failed'
+        status['error'] = traceback.format_exc()
+    finally:
+        if profile:
+            profiler.remove_hook(reports.append)
+
+    status['wall'] = round(time.perf_counter() - wall, 4)
+    status['cpu'] = round(time.process_time() - cpu, 4)
+    if reports:
+        status['profile'] = reports[0]
+    return status
+
+
+def report(args, statuses, wall):
+    """Build the consolidated report for the batch."""
+    failed = [s for s in statuses if s['status'] != 'ok']
+    return OrderedDict([
+        ('manifest', args.manifest),
+        ('workers', args.workers),
+        ('jobs', len(statuses)),
+        ('ok', len(statuses) - len(failed)),
+        ('failed', len(failed)),
+        ('wall', round(wall, 4)),
+        ('job_wall', round(sum(s['wall'] for s in statuses), 4)),
+        ('statuses', statuses)])
@@ -0,0 +1,271 @@
+"""Checkpoint a long run so that --resume can skip the work already done.
+
+The --work-dir holds a manifest and Feather files for the finished stages:
+
+    manifest.json         What the run was started with and the column types
+    unreconciled.feather  The input after it was read and flattened
+    subjects.feather      The subject table, for nfn formats
+    batch-00001.feather   The reconciled and explanations data for a batch
+    ...                   of subjects
+
+A checkpoint is written to a temporary file and renamed when it is complete,
+so a run that dies part way through a file leaves no half written checkpoint.
+The checkpoints are only reused when the input file and the arguments that
+change the results are the same.
+"""
+
+import os
+import sys
+import json
+import time
+from os.path import exists, getmtime, getsize, join, abspath
+import pandas as pd
+import pyarrow.feather as feather
+import lib.reconciler as reconciler
+
+VERSION = 1
+MANIFEST = 'manifest.json'
+UNRECONCILED = 'unreconciled.feather'
+SUBJECTS = 'subjects.feather'
+BATCH = 'batch-{:05d}.feather'
+BATCH_SUBJECTS = 1000  # How many subjects to reconcile between checkpoints
+
+# These arguments change the results so the checkpoints must match them
+RESULT_ARGS = ['format', 'workflow_id', 'column_types', 'user_weights',
+               'group_by', 'key_column', 'user_column', 'shard',
+               'check_subjects', 'compact', 'fuzzy_ratio_threshold',
+               'fuzzy_set_threshold', 'sample', 'sample_seed', 'subjects']
+
+# The readers fill these in so we restore them when we skip the read
+READ_ARGS = ['title', 'user_column', 'sample_total']
+
+# The explanations are stored next to the reconciled columns with this prefix
+EXPLANATION = 'explanation:'
+
+
+def start(args):
+    """
+    Get the work directory ready.
+
+    When resuming we keep the checkpoints if they were made from the same
+    input and arguments. Otherwise we start over.
+    """
+    if not args.work_dir:
+        return
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    manifest = read_manifest(args)
+
+    if args.resume and manifest.get('fingerprint') == fingerprint(args):
+        return
+
+    if args.resume:
+        print('The checkpoints in {} do not match this run. Starting over.'
+              .format(args.work_dir), file=sys.stderr)
+
+    clear(args)
+    write_manifest(args, {'version': VERSION,
+                          'fingerprint': fingerprint(args)})
+
+
+def fingerprint(args):
+    """Identify the input file and the arguments that change the results."""
+    return {
+        'input_file': abspath(args.input_file),
+        'size': getsize(args.input_file),
+        'mtime': getmtime(args.input_file),
+        'batch_subjects': BATCH_SUBJECTS,
+        'explain': reconciler.explains(args),
+        'args': {arg: getattr(args, arg, None) for arg in RESULT_ARGS}}
+
+
+def clear(args):
+    """Remove the old checkpoints. We leave any other files alone."""
+    for name in os.listdir(args.work_dir):
+        if name in (MANIFEST, UNRECONCILED, SUBJECTS) \
+                or (name.startswith('batch-') and name.endswith('.feather')):
+            os.remove(join(args.work_dir, name))
+
+
+def read_manifest(args):
+    """Get the manifest or an empty one if there is none."""
+    path = join(args.work_dir, MANIFEST)
+    if not exists(path):
+        return {}
+    with open(path) as in_file:
+        manifest = json.load(in_file)
+    return manifest if manifest.get('version') == VERSION else {}
+
+
+def write_manifest(args, manifest):
+    """Replace the manifest."""
+    path = join(args.work_dir, MANIFEST)
+    with open(path + '.tmp', 'w') as out_file:
+        json.dump(manifest, out_file, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def write_frame(args, name, df):
+    """Write a checkpoint file all at once."""
+    path = join(args.work_dir, name)
+    feather.write_feather(df, path + '.tmp')
+    os.replace(path + '.tmp', path)
+
+
+def read(args, reader):
+    """Read the input or, when there is a checkpoint for it, the checkpoint."""
+    if not args.work_dir:
+        return reader(args)
+
+    manifest = read_manifest(args)
+    if 'column_types' in manifest:
+        for arg, value in manifest['read_args'].items():
+            setattr(args, arg, value)
+        unreconciled = feather.read_feather(join(args.work_dir, UNRECONCILED))
+        subjects = None
+        if manifest['has_subjects']:
+            subjects = feather.read_feather(
+                join(args.work_dir, SUBJECTS)).set_index(args.group_by)
+        return unreconciled, manifest['column_types'], subjects
+
+    unreconciled, column_types, subjects = reader(args)
+
+    write_frame(args, UNRECONCILED, unreconciled.reset_index(drop=True))
+    if subjects is not None:
+        write_frame(args, SUBJECTS, subjects.reset_index())
+
+    manifest['column_types'] = column_types
+    manifest['has_subjects'] = subjects is not None
+    manifest['read_args'] = {
+        arg: getattr(args, arg, None) for arg in READ_ARGS}
+    write_manifest(args, manifest)
+
+    return unreconciled.reset_index(drop=True), column_types, subjects
+
+
+def reconcile(args, unreconciled, column_types, plugins=None):
+    """
+    Reconcile the subjects in batches and report the progress.
+
+    With a --work-dir each batch is saved as it finishes and the batches that
+    were saved by an earlier run are loaded instead of reconciled again. The
+    groups are independent so the batches put together are the same as
+    reconciling everything at once.
+    """
+    explain = reconciler.explains(args)
+    if not args.work_dir and not args.progress:
+        return reconciler.build(
+            args, unreconciled, column_types, plugins=plugins,
+            explain=explain)
+
+    groups = unreconciled.groupby(args.group_by, sort=True).ngroup()
+    batches = unreconciled.groupby(groups.values // BATCH_SUBJECTS)
+    progress = Progress(int(groups.max()) + 1 if len(groups) else 0)
+
+    reconciled, explanations = [], []
+    for number, batch in batches:
+        path = join(args.work_dir, BATCH.format(number + 1)) \
+            if args.work_dir else None
+
+        if path and exists(path):
+            batch_reconciled, batch_explanations = read_batch(args, path)
+            progress.skip(batch_reconciled.shape[0])
+        else:
+            batch_reconciled, batch_explanations = reconciler.build(
+                args, batch, column_types, plugins=plugins, explain=explain)
+            if path:
+                write_batch(args, number + 1, batch_reconciled,
+                            batch_explanations)
+            progress.done(batch_reconciled.shape[0])
+
+        reconciled.append(batch_reconciled)
+        explanations.append(batch_explanations)
+
+    progress.finish()
+    return pd.concat(reconciled), pd.concat(explanations)
+
+
+def write_batch(args, number, reconciled, explanations):
+    """Save a batch's reconciled and explanations data in one file."""
+    df = reconciled.join(explanations.add_prefix(EXPLANATION))
+    write_frame(args, BATCH.format(number),
+                df.rename_axis(args.group_by).reset_index())
+
+
+def read_batch(args, path):
+    """Load a batch and split it back into reconciled and explanations."""
+    df = feather.read_feather(path).set_index(args.group_by)
+    explained = [c for c in df.columns if c.startswith(EXPLANATION)]
+    explanations = df[explained].rename(
+        columns=lambda c: c[len(EXPLANATION):])
+    return df.drop(explained, axis=1), explanations
+
+
+class Progress:
+    """Report how many subjects are reconciled, the rate, and an ETA."""
+
+    def __init__(self, total, out_file=None):
+        """Start the clock. The total is None when it is not known yet."""
+        self.total = total
+        self.out_file = out_file or sys.stderr
+        self.count = 0
+        self.skipped = 0
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.resuming = 0.0  # The rate leaves out the time spent resuming
+
+    def skip(self, count):
+        """Count subjects that were loaded from a checkpoint."""
+        self.count += count
+        self.skipped += count
+        self.resuming += time.perf_counter() - self.last
+        self.report('resumed')
+
+    def done(self, count):
+        """Count subjects that were reconciled."""
+        self.count += count
+        self.report('reconciled')
+
+    def rate(self):
+        """How many subjects per second we are reconciling."""
+        elapsed = time.perf_counter() - self.start - self.resuming
+        done = self.count - self.skipped
+        return done / elapsed if elapsed and done else 0.0
+
+    def eta(self):
+        """Get the seconds left or None if we can not tell yet."""
+        rate = self.rate()
+        return (self.total - self.count) / rate \
+            if rate and self.total is not None else None
+
+    def report(self, action):
+        """Print the progress line."""
+        line = '{} {:,} subjects'.format(action.capitalize(), self.count)
+        if self.total is not None:
+            line = '{} {:,} of {:,} subjects ({:.1f}%)'.format(
+                action.capitalize(), self.count, self.total,
+                100.0 * self.count / self.total if self.total else 100.0)
+
+        # There is no rate until this run reconciles some subjects
+        if self.count > self.skipped:
+            line += ', {:,.1f} subjects/s'.format(self.rate())
+            if self.total is not None:
+                eta = self.eta()
+                line += ', ETA {}'.format(
+                    format_seconds(eta) if eta is not None else '?')
+
+        print(line, file=self.out_file)
+        self.last = time.perf_counter()
+
+    def finish(self):
+        """Print the total time."""
+        print('Reconciled {:,} subjects in {}'.format(
+            self.count, format_seconds(time.perf_counter() - self.start)),
+              file=self.out_file)
+
+
+def format_seconds(seconds):
+    """Show the seconds as H:MM:SS."""
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return '{}:{:02d}:{:02d}'.format(hours, minutes, seconds)
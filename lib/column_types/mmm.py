@@ -2,13 +2,14 @@
 
 import numpy as np
 import scipy.stats as stats
-import inflect
+import lib.plural as plural
 
-P = inflect.engine().plural
+P = plural.plural
 
 
-def reconcile(group, args=None):  # pylint: disable=unused-argument
-    """Reconcile the data."""
+def reconcile(group, args=None,  # pylint: disable=unused-argument
+              explain=True):
+    """Reconcile the data. Only explain it when asked."""
     values = [g for g in group]
 
     numbers = []
@@ -21,7 +22,7 @@ def reconcile(group, args=None):  # pylint: disable=unused-argument
     if not numbers:
         reason = 'There {} no {} in {} {}'.format(
             P('was', len(numbers)), P('number', len(numbers)),
-            len(values), P('record', len(values)))
+            len(values), P('record', len(values))) if explain else ''
         return reason, ''
 
     mean = np.mean(numbers)
@@ -34,6 +35,6 @@ def reconcile(group, args=None):  # pylint: disable=unused-argument
     reason = 'There {} {} {} in {} {}'.format(
         P('was', len(numbers)),
         len(numbers), P('number', len(numbers)),
-        len(values), P('record', len(values)))
+        len(values), P('record', len(values))) if explain else ''
 
     return reason, value
@@ -5,8 +5,9 @@ isn't then we return a blank.
 """
 
 
-def reconcile(group, args=None):  # pylint: disable=unused-argument
-    """Reconcile the data."""
+def reconcile(group, args=None,  # pylint: disable=unused-argument
+              explain=True):
+    """Reconcile the data. Only explain it when asked."""
     values = [g for g in group]
     count = len(values)
 
@@ -15,9 +16,11 @@ def reconcile(group, args=None):  # pylint: disable=unused-argument
         reason = 'There is only one record'
     elif all([v == values[0] for v in values]):
         value = values[0]
-        reason = 'All {} records are identical'.format(count)
+        reason = 'All {} records are identical'.format(count) \
+            if explain else ''
     else:
         value = ''
-        reason = 'All {} records are not identical'.format(count)
+        reason = 'All {} records are not identical'.format(count) \
+            if explain else ''
 
     return reason, value
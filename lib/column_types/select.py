@@ -4,16 +4,15 @@ Classifications are chosen from a controlled vocabulary.
 """
 
 from collections import Counter
-import inflect
+import lib.plural as plural
 
 PLACEHOLDERS = ['placeholder']
-E = inflect.engine()
-E.defnoun('The', 'All')
-P = E.plural
+P = plural.plural
 
 
-def reconcile(group, args=None):  # pylint: disable=unused-argument
-    """Reconcile the data."""
+def reconcile(group, args=None,  # pylint: disable=unused-argument
+              explain=True):
+    """Reconcile the data. Only explain it when asked."""
     values = [str(g) if str(g).lower() not in PLACEHOLDERS else ''
               for g in group]
 
@@ -24,24 +23,27 @@ def reconcile(group, args=None):  # pylint: disable=unused-argument
 
     if not filled:
         reason = '{} {} {} {} blank'.format(
-            P('The', count), count, P('record', count), P('is', count))
+            P('The', count), count, P('record', count),
+            P('is', count)) if explain else ''
         return reason, ''
 
     if filled[0][1] > 1 and filled[0][1] == count:
         reason = 'Unanimous match, {} of {} {}'.format(
-            filled[0][1], count, P('record', count))
+            filled[0][1], count, P('record', count)) if explain else ''
         return reason, filled[0][0]
 
     if filled[0][1] > 1:
         reason = 'Majority match, {} of {} {} with {} {}'.format(
             filled[0][1], count, P('record', count),
-            blanks, P('blank', blanks))
+            blanks, P('blank', blanks)) if explain else ''
         return reason, filled[0][0]
 
     if len(filled) == 1:
-        reason = 'Only 1 transcript in {} {}'.format(count, P('record', count))
+        reason = 'Only 1 transcript in {} {}'.format(
+            count, P('record', count)) if explain else ''
         return reason, filled[0][0]
 
     reason = 'No select match on {} {} with {} {}'.format(
-        count, P('record', count), blanks, P('blank', blanks))
+        count, P('record', count),
+        blanks, P('blank', blanks)) if explain else ''
     return reason, ''
@@ -4,19 +4,18 @@ import re
 from collections import namedtuple
 from itertools import combinations
 from fuzzywuzzy import fuzz
-import inflect
+import lib.plural as plural
+import lib.profiler as profiler
 
-E = inflect.engine()
-E.defnoun('The', 'All')
-P = E.plural
+P = plural.plural
 
 FuzzyRatioScore = namedtuple('FuzzyRatioScore', 'score value')
 FuzzySetScore = namedtuple('FuzzySetScore', 'score value tokens')
 ExactScore = namedtuple('ExactScore', 'value count')
 
 
-def reconcile(group, args=None):
-    """Reconcile the data."""
+def reconcile(group, args=None, explain=True):
+    """Reconcile the data. Only explain it when asked."""
     values = ['\n'.join([' '.join(ln.split()) for ln in str(g).splitlines()])
               for g in group]
     filled = only_filled_values(values)
@@ -26,40 +25,52 @@ def reconcile(group, args=None):
 
     if not filled:
         reason = '{} {} {} {} blank'.format(
-            P('The', count), count, P('record', count), P('is', count))
+            P('The', count), count, P('record', count),
+            P('is', count)) if explain else ''
+        profiler.count('text_stages:blank')
         return reason, ''
 
     if filled[0].count > 1 and filled[0].count == count:
         reason = 'Normalized unanimous match, {} of {} {}'.format(
-            filled[0].count, count, P('record', count))
+            filled[0].count, count, P('record', count)) if explain else ''
+        profiler.count('text_stages:unanimous')
         return reason, filled[0].value
 
     if filled[0].count > 1:
         reason = 'Normalized majority match, {} of {} {} with {} {}'.format(
             filled[0].count, count, P('record', count),
-            blanks, P('blank', blanks))
+            blanks, P('blank', blanks)) if explain else ''
+        profiler.count('text_stages:majority')
         return reason, filled[0].value
 
     if len(filled) == 1:
-        reason = 'Only 1 transcript in {} {}'.format(count, P('record', count))
+        reason = 'Only 1 transcript in {} {}'.format(
+            count, P('record', count)) if explain else ''
+        profiler.count('text_stages:only_one')
         return reason, filled[0].value
 
     # Check for simple in-place fuzzy matches
     top = top_partial_ratio(group, args.user_weights)
     if top.score >= args.fuzzy_ratio_threshold:
         reason = 'Partial ratio match on {} {} with {} {}, score={}'.format(
-            count, P('record', count), blanks, P('blank', blanks), top.score)
+            count, P('record', count), blanks, P('blank', blanks),
+            top.score) if explain else ''
+        profiler.count('text_stages:partial_ratio')
         return reason, top.value
 
     # Now look for the best token match
     top = top_token_set_ratio(values)
     if top.score >= args.fuzzy_set_threshold:
         reason = 'Token set ratio match on {} {} with {} {}, score={}'.format(
-            count, P('record', count), blanks, P('blank', blanks), top.score)
+            count, P('record', count), blanks, P('blank', blanks),
+            top.score) if explain else ''
+        profiler.count('text_stages:token_set_ratio')
         return reason, top.value
 
     reason = 'No text match on {} {} with {} {}'.format(
-        count, P('record', count), blanks, P('blank', blanks))
+        count, P('record', count),
+        blanks, P('blank', blanks)) if explain else ''
+    profiler.count('text_stages:no_match')
     return reason, ''
 
 
@@ -108,6 +119,7 @@ def top_partial_ratio(group, user_weights):
             score = 0  # enforce a floor
         scores.append(FuzzyRatioScore(score, value))
 
+    profiler.count('fuzzy_pairs:partial_ratio', len(scores))
     scores = sorted(scores,
                     reverse=True,
                     key=lambda s: (s.score, len(s.value)))
@@ -134,6 +146,7 @@ def top_token_set_ratio(values):
                 value = combo[0]
         scores.append(FuzzySetScore(score, value, tokens))
 
+    profiler.count('fuzzy_pairs:token_set_ratio', len(scores))
     ordered = sorted(
         scores,
         reverse=True,
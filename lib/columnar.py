@@ -0,0 +1,46 @@
+"""Read and write data frames as columnar Parquet or Feather (Arrow) files."""
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.feather as feather
+from pandas.api.types import infer_dtype
+
+FORMATS = ['parquet', 'feather']
+
+
+def write(df, out_file, file_format):
+    """
+    Write the data frame as a columnar file.
+
+    The column order and types are kept. The caller should move the index
+    into a column if it is wanted.
+    """
+    df = typed_columns(df.reset_index(drop=True))
+    if file_format == 'parquet':
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False),
+                       out_file)
+    else:
+        feather.write_feather(df, out_file)
+
+
+def read(path, file_format):
+    """Read a columnar file into a data frame."""
+    if file_format == 'parquet':
+        return pq.read_table(path).to_pandas()
+    return feather.read_feather(path)
+
+
+def typed_columns(df):
+    """
+    Make every column hold a single type.
+
+    Columns with mixed types, like numbers with blanks for the reconciled rows
+    in the merged data, are converted to strings.
+    """
+    mixed = [c for c in df.columns
+             if df[c].dtype == object and infer_dtype(df[c]).startswith('mix')]
+    if mixed:
+        df = df.copy()
+        for column in mixed:
+            df[column] = df[column].astype(str)
+    return df
@@ -0,0 +1,80 @@
+"""Store the unreconciled data in compact dtypes to save memory.
+
+The readers load every column as Python strings. Columns with few distinct
+values, like select answers, user names, and the workflow and subject columns,
+become categoricals so each value is stored once. The other text columns
+become Arrow-backed strings when pandas and pyarrow support them.
+
+The columns are converted in place, one at a time, so there is never a second
+copy of the data-frame. The csv and jsonl readers compact each chunk as it is
+read and --stream compacts each batch before it is reconciled, so the whole
+input is not held as Python strings. Chunks of the same input share the
+dtypes that were picked for the first chunk, so they can be put back together
+with util.concat_chunks().
+"""
+
+import pandas as pd
+import lib.profiler as profiler
+
+CATEGORY_RATIO = 0.5  # Categorize columns with at most this many values/row
+
+
+def compact(args, df, dtypes=None):
+    """
+    Convert the data-frame's columns to compact dtypes in place.
+
+    The dtypes dict maps the columns to the dtypes picked for them. Give the
+    same dict for every chunk of the input.
+    """
+    dtypes = {} if dtypes is None else dtypes
+    before, after = 0.0, 0.0
+
+    for column in df.columns:
+        if column not in dtypes:
+            dtypes[column] = pick_dtype(args, df[column])
+        if not dtypes[column] or df[column].dtype != object:
+            continue
+        if profiler.PROFILE:
+            before += memory_mb(df[column])
+        df[column] = df[column].fillna('').astype(dtypes[column])
+        if profiler.PROFILE:
+            after += memory_mb(df[column])
+
+    profiler.count('memory:unreconciled_before_mb', round(before, 2))
+    profiler.count('memory:unreconciled_after_mb', round(after, 2))
+
+    return df
+
+
+def chunks(args, frames):
+    """Compact the chunks of an input as they are read."""
+    dtypes = {}
+    for frame in frames:
+        yield compact(args, frame, dtypes)
+
+
+def pick_dtype(args, values):
+    """Get the compact dtype for the column or None to leave it as it is."""
+    # The grouping & sorting columns keep their dtypes
+    if values.name in [args.group_by, args.key_column]:
+        return None
+    if values.dtype != object:
+        return None
+    if values.nunique() <= CATEGORY_RATIO * values.shape[0]:
+        return 'category'
+    return string_dtype()
+
+
+def string_dtype():
+    """Get the Arrow-backed string dtype if this pandas has one."""
+    try:
+        return pd.StringDtype('pyarrow')
+    except (AttributeError, ImportError):
+        return None
+
+
+def memory_mb(df):
+    """Get the memory used by the data-frame, or series, and its values."""
+    usage = df.memory_usage(deep=True)
+    usage = usage.sum() if hasattr(usage, 'sum') else usage
+    return round(usage / (1024 * 1024), 2)
@@ -1,12 +1,24 @@
 """Import a flat CSV file as unreconciled data."""
 
-import pandas as pd
 import lib.util as util
+import lib.compact as compact
+import lib.subject_index as subject_index
 
 
 def read(args):
     """Import a CSV file into a data-frame."""
-    unreconciled = pd.read_csv(args.input_file, dtype=str)
-    unreconciled = util.unreconciled_setup(args, unreconciled)
+    if getattr(args, 'subjects', None):
+        chunks = [subject_index.read_csv(args, args.group_by)]
+    else:
+        chunks = read_chunks(args)
+    if getattr(args, 'compact', False):
+        chunks = compact.chunks(args, chunks)
+    unreconciled = util.unreconciled_chunks(args, chunks)
 
-    return unreconciled, {}
+    return unreconciled, {}, None
+
+
+def read_chunks(args):
+    """Read the CSV file a chunk of rows at a time."""
+    return util.read_csv(args.input_file, dtype=str,
+                         chunksize=util.CHUNK_ROWS)
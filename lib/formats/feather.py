@@ -0,0 +1,12 @@
+"""Import a Feather file as unreconciled data."""
+
+import lib.columnar as columnar
+import lib.util as util
+
+
+def read(args):
+    """Read a Feather file into a data-frame."""
+    unreconciled = columnar.read(args.input_file, 'feather')
+    unreconciled = util.unreconciled_setup(args, unreconciled)
+
+    return unreconciled, {}, None
@@ -9,4 +9,4 @@ def read(args):
     unreconciled = pd.read_json(args.input_file)
     unreconciled = util.unreconciled_setup(args, unreconciled)
 
-    return unreconciled, {}
+    return unreconciled, {}, None
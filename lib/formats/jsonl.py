@@ -0,0 +1,35 @@
+"""Import a JSON Lines file as unreconciled data.
+
+Each line has a JSON object with one record. We stream the records so only a
+chunk of them is in memory as JSON objects at a time.
+"""
+
+import json
+import pandas as pd
+import lib.util as util
+import lib.compact as compact
+
+
+def read(args):
+    """Read a JSON Lines file into a data-frame."""
+    chunks = read_chunks(args)
+    if getattr(args, 'compact', False):
+        chunks = compact.chunks(args, chunks)
+    unreconciled = util.unreconciled_chunks(args, chunks)
+
+    return unreconciled, {}, None
+
+
+def read_chunks(args):
+    """Read the records a chunk at a time."""
+    records = []
+    with open(args.input_file, encoding='utf-8') as in_file:
+        for line in in_file:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+            if len(records) >= util.CHUNK_ROWS:
+                yield pd.DataFrame(records)
+                records = []
+    if records:
+        yield pd.DataFrame(records)
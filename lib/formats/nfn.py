@@ -5,8 +5,12 @@ import json
 from dateutil.parser import parse
 import pandas as pd
 import lib.util as util
+import lib.profiler as profiler
+import lib.subject_data as subject_data
+import lib.shard as shard
+import lib.sample as sample
+import lib.subject_index as subject_index
 
-SUBJECT_PREFIX = 'subject_'
 STARTED_AT = 'classification_started_at'
 USER_NAME = 'user_name'
 KEEP_COUNT = 3
@@ -14,7 +18,60 @@ KEEP_COUNT = 3
 
 def read(args):
     """Read and convert the input CSV data."""
-    df = pd.read_csv(args.input_file, dtype=str)
+    df, column_types = read_annotations(args)
+    df, subjects = read_subjects(args, df, column_types)
+    return df, column_types, subjects
+
+
+def read_batches(args, size):
+    """
+    Read the input and flatten it a batch of subjects at a time.
+
+    Each batch adds the columns that it finds to the column types, so we
+    return the column types, the number of subjects, and a generator of the
+    batches in subject order. The column types are numbered in the order that
+    read() gives them. Put together, the batches are what read() returns.
+    """
+    df = read_rows(args)
+
+    codes, ids = pd.factorize(
+        df.subject_ids.map(first_subject_id), sort=True)
+
+    column_types = {}
+
+    def _batches():
+        seen = {}
+        for _, batch in df.groupby(codes // size, sort=True):
+            with profiler.stage('read.flatten'):
+                batch = extract_batch(batch, column_types, seen)
+            # The subject columns are added to the batch's column types
+            yield read_subjects(args, batch, dict(column_types))
+
+    return column_types, len(ids), _batches()
+
+
+def read_annotations(args):
+    """Read the input CSV data and flatten the annotations."""
+    df = read_rows(args)
+
+    # Extract the annotation json blobs
+    column_types = {}
+    with profiler.stage('read.flatten'):
+        df = extract_annotations(df, column_types)
+
+    column_types = {k: v for k, v in column_types.items()
+                    if k not in unwanted_columns(df)}
+
+    return df, column_types
+
+
+def read_rows(args):
+    """Read the input CSV data for the workflow and the wanted subjects."""
+    with profiler.stage('read.csv'):
+        if getattr(args, 'subjects', None):
+            df = subject_index.read_csv(args, 'subject_ids', first=True)
+        else:
+            df = util.read_csv(args.input_file, dtype=str)
 
     # Workflows must be processed individually
     workflow_id = get_workflow_id(df, args)
@@ -23,36 +80,53 @@ def read(args):
 
     get_nfn_only_defaults(df, args, workflow_id)
 
-    # Extract the various json blobs
-    column_types = {}
-    df = (extract_annotations(df, column_types)
-            .pipe(extract_subject_data, column_types)
-            .pipe(extract_metadata))
+    # Drop the other shards' and unsampled subjects before the expensive work
+    if args.shard:
+        df = df.loc[shard.keep(args, df.subject_ids.map(first_subject_id)), :]
+    if args.sample:
+        df = df.loc[sample.keep(args, df.subject_ids.map(first_subject_id)), :]
+
+    return df
+
+
+def read_subjects(args, df, column_types):
+    """Finish reading the rows with their annotations flattened."""
+    with profiler.stage('read.metadata'):
+        df = extract_metadata(df)
 
     # Get the subject_id from the subject_ids list, use the first one
-    df[args.group_by] = df.subject_ids.map(
-        lambda x: int(str(x).split(';')[0]))
+    df[args.group_by] = df.subject_ids.map(first_subject_id)
 
     # Remove unwanted columns
-    unwanted_columns = [c for c in df.columns
-                        if c.lower() in [
-                            'user_id',
-                            'user_ip',
-                            'subject_ids',
-                            'subject_data',
-                            (SUBJECT_PREFIX + 'retired').lower()]]
-    df = df.drop(unwanted_columns, axis=1)
-    column_types = {k: v for k, v in column_types.items()
-                    if k not in unwanted_columns}
+    df = df.drop(unwanted_columns(df), axis=1)
 
     columns = util.sort_columns(args, df.columns, column_types)
-    df = (df.reindex_axis(columns, axis=1)
-            .fillna('')
-            .sort_values([args.group_by, STARTED_AT])
-            .drop_duplicates([args.group_by, USER_NAME], keep='first')
-            .groupby(args.group_by).head(KEEP_COUNT))
+    with profiler.stage('read.sort'):
+        df = (df.reindex_axis(columns, axis=1)
+                .fillna('')
+                .sort_values([args.group_by, STARTED_AT])
+                .drop_duplicates([args.group_by, USER_NAME], keep='first')
+                .groupby(args.group_by).head(KEEP_COUNT))
 
-    return df, column_types
+    # Keep one copy of the subject data per subject
+    with profiler.stage('read.subjects'):
+        subjects = subject_data.extract(args, df, column_types)
+        if args.check_subjects:
+            subjects = subject_data.check(args, df, subjects)
+        df = df.drop(['subject_data'], axis=1)
+
+    return df, subjects
+
+
+def unwanted_columns(df):
+    """Get the columns we do not keep."""
+    return [c for c in df.columns
+            if c.lower() in ['user_id', 'user_ip', 'subject_ids']]
+
+
+def first_subject_id(subject_ids):
+    """Get the first subject ID from the subject_ids list."""
+    return int(str(subject_ids).split(';')[0])
 
 
 def remove_rows_not_in_workflow(df, workflow_id):
@@ -62,10 +136,10 @@ def remove_rows_not_in_workflow(df, workflow_id):
 
 def get_nfn_only_defaults(df, args, workflow_id):
     """Set nfn-only argument defaults."""
-    if args.summary:
+    if args.summary or args.save_artifact:
         workflow_name = get_workflow_name(df)
 
-    if not args.title and args.summary:
+    if not args.title and (args.summary or args.save_artifact):
         args.title = 'Summary of "{}" ({})'.format(workflow_name, workflow_id)
 
     if not args.user_column:
@@ -112,57 +186,89 @@ def extract_metadata(df):
     return df.drop(['metadata'], axis=1)
 
 
-def extract_subject_data(df, column_types):
+def extract_annotations(df, column_types):
     """
-    Extract subject data from the json object in the subject_data column.
+    Extract annotations from the json object in the annotations column.
 
-    We prefix the new column names with "subject_" to keep them separate from
-    the other df columns. The subject data json looks like:
-        {<subject_id>: {"key_1": "value_1", "key_2": "value_2", ...}}
+    Annotations are nested json blobs with a peculiar data format.
     """
-    data = (df.subject_data.map(json.loads)
-              .apply(lambda x: list(x.values())[0])
-              .tolist())
+    data = df.annotations.map(json.loads)
+    data = [flatten_annotations(a, column_types) for a in data]
     data = pd.DataFrame(data, index=df.index)
-    df = df.drop(['subject_data'], axis=1)
-
-    if 'retired' in data.columns:
-        data = data.drop(['retired'], axis=1)
-
-    if 'id' in data.columns:
-        data = data.rename(columns={'id': 'external_id'})
 
-    columns = [re.sub(r'\W+', '_', c) for c in data.columns]
-    columns = [re.sub(r'^_+|_$', '', c) for c in columns]
-    columns = [SUBJECT_PREFIX + c for c in columns]
+    df = pd.concat([df, data], axis=1)
 
-    columns = {old: new for old, new in zip(data.columns, columns)}
-    data = data.rename(columns=columns)
+    return adjust_column_names(df, column_types).drop(['annotations'], axis=1)
 
-    df = pd.concat([df, data], axis=1)
 
-    # Put the subject columns into the column_types: They're all 'same'
-    last = util.last_column_type(column_types)
-    for name in data.columns:
-        last += 1
-        column_types[name] = {'type': 'same', 'order': last, 'name': name}
+def extract_batch(df, column_types, seen):
+    """
+    Extract a batch's annotations and add its columns to the column types.
+
+    Flattening all of the input at once numbers the columns in the order that
+    they first appear in the file. The batches are not in file order, so we
+    keep where each column was first seen, its row and place in the row, and
+    number the column types by that. We raise util.ReadAgain when the columns
+    of an earlier batch can not be made to match, like when a "#1" suffix is
+    added to a column that an earlier batch already has.
+    """
+    types = {}
+    first = {}  # Where the batch first has each column
+    data = []
+    for row, annotations in zip(df.index, df.annotations.map(json.loads)):
+        count = len(types)
+        data.append(flatten_annotations(annotations, types))
+        if len(types) > count:
+            places = {key: place for place, key in enumerate(data[-1])}
+            for key in list(types)[count:]:
+                first[key] = (row, places[key])
+
+    rename = batch_renames(types, column_types)
+    for old_name, new_name in rename.items():
+        if old_name in column_types:
+            raise util.ReadAgain(
+                'The "{}" column is renamed to "{}" in a later batch'.format(
+                    old_name, new_name))
+
+    data = pd.DataFrame(data, index=df.index).rename(columns=rename)
+    df = pd.concat([df, data], axis=1).drop(['annotations'], axis=1)
+
+    unwanted = unwanted_columns(df)
+    for key, column_type in types.items():
+        name = rename.get(key, key)
+        if name in unwanted:
+            continue
+        if name not in column_types:
+            column_types[name] = dict(column_type, name=name)
+        elif first[key] < seen[name] and (
+                column_types[name]['type'] != column_type['type']):
+            raise util.ReadAgain(
+                'The "{}" column changes its type in a later batch'.format(
+                    name))
+        seen[name] = min(first[key], seen.get(name, first[key]))
+
+    ordered = [(n, column_types[n]) for n in sorted(seen, key=seen.get)]
+    column_types.clear()
+    for order, (name, column_type) in enumerate(ordered, 1):
+        column_type['order'] = order
+        column_types[name] = column_type
 
     return df
 
 
-def extract_annotations(df, column_types):
+def batch_renames(types, column_types):
     """
-    Extract annotations from the json object in the annotations column.
+    Get the batch's columns that get a "#1" suffix.
 
-    Annotations are nested json blobs with a peculiar data format.
+    This is what adjust_column_names() does, and the columns that were
+    renamed in earlier batches are renamed here too.
     """
-    data = df.annotations.map(json.loads)
-    data = [flatten_annotations(a, column_types) for a in data]
-    data = pd.DataFrame(data, index=df.index)
-
-    df = pd.concat([df, data], axis=1)
-
-    return adjust_column_names(df, column_types).drop(['annotations'], axis=1)
+    rename = {}
+    for name in types:
+        new_name = name + ' #1'
+        if name + ' #2' in types or new_name in column_types:
+            rename[name] = new_name
+    return rename
 
 
 def flatten_annotations(annotations, column_types):
@@ -0,0 +1,12 @@
+"""Import a Parquet file as unreconciled data."""
+
+import lib.columnar as columnar
+import lib.util as util
+
+
+def read(args):
+    """Read a Parquet file into a data-frame."""
+    unreconciled = columnar.read(args.input_file, 'parquet')
+    unreconciled = util.unreconciled_setup(args, unreconciled)
+
+    return unreconciled, {}, None
@@ -1,8 +1,17 @@
 """Merge reconciled, explanations, unreconciled dataframes into one."""
 
+import csv
+import heapq
+from itertools import groupby
 import pandas as pd
 import lib.util as util
 
+ROW_TYPES = {
+    'reconciled': '1-reconciled',
+    'explanations': '2-explanations',
+    'unreconciled': '3-unreconciled'}
+
+
 def merge(args, unreconciled, reconciled, explanations, column_types):
     """
     Combine dataframes.
@@ -16,9 +25,9 @@ def merge(args, unreconciled, reconciled, explanations, column_types):
     unr = unreconciled.astype(object).copy()
 
     # Sort by group-by then by row_type and then key-column
-    rec['row_type'] = '1-reconciled'
-    exp['row_type'] = '2-explanations'
-    unr['row_type'] = '3-unreconciled'
+    rec['row_type'] = ROW_TYPES['reconciled']
+    exp['row_type'] = ROW_TYPES['explanations']
+    unr['row_type'] = ROW_TYPES['unreconciled']
 
     # Merge and format the dataframes
     merged = pd.concat([rec, exp, unr])
@@ -28,3 +37,73 @@ def merge(args, unreconciled, reconciled, explanations, column_types):
                   .sort_values([args.group_by, 'row_type', args.key_column]))
 
     return merged
+
+
+def write(args, unreconciled, reconciled, explanations, column_types,
+          out_file):
+    """
+    Write the merged dataframes to a CSV file one group at a time.
+
+    This gives the same rows as merge() but it does not build the merged
+    dataframe. All three dataframes are already ordered by the group-by
+    column, so we merge the rows as they stream by. Only the rows of a single
+    group are sorted.
+    """
+    rec = reconciled.rename_axis(args.group_by).reset_index()
+    exp = explanations.rename_axis(args.group_by).reset_index()
+
+    columns = merged_columns(args, [rec, exp, unreconciled], column_types)
+
+    writer = csv.writer(out_file, lineterminator='\n')
+    writer.writerow(columns)
+
+    streams = [
+        stream_rows(args, rec, columns, 'reconciled'),
+        stream_rows(args, exp, columns, 'explanations'),
+        stream_rows(args, unreconciled, columns, 'unreconciled')]
+
+    writer.writerows(r[-1] for r in heapq.merge(*streams))
+
+
+def merged_columns(args, frames, column_types):
+    """Get the merged file's columns in display order."""
+    all_columns = []
+    for frame in frames:
+        all_columns += [c for c in list(frame.columns) + ['row_type']
+                        if c not in all_columns]
+    return util.sort_columns(args, all_columns, column_types)
+
+
+def stream_rows(args, df, columns, row_type):
+    """
+    Generate the sortable merged rows for one of the dataframes.
+
+    Each item is (group-by value, row type, key-column value, sequence, row).
+    The rows within a group are sorted by the key column and the sequence
+    breaks any ties.
+    """
+    positions = [columns.index(c) for c in df.columns]
+    group_by = list(df.columns).index(args.group_by)
+    key_column = (list(df.columns).index(args.key_column)
+                  if args.key_column in df.columns else None)
+    row_type_value = ROW_TYPES[row_type]
+    row_type_position = columns.index('row_type')
+
+    def _row(values):
+        row = [''] * len(columns)
+        for position, value in zip(positions, values):
+            if value is not None and value == value:  # Skip None & NaN
+                row[position] = value
+        row[row_type_position] = row_type_value
+        return row
+
+    seq = 0
+    rows = df.itertuples(index=False, name=None)
+    for group, values in groupby(rows, key=lambda v: v[group_by]):
+        values = list(values)
+        if key_column is not None:
+            values = sorted(values, key=lambda v: v[key_column])
+        for value in values:
+            seq += 1
+            key = value[key_column] if key_column is not None else ''
+            yield group, row_type_value, key, seq, _row(value)
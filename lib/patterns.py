@@ -0,0 +1,19 @@
+"""Patterns for how the explanations say a cell was reconciled.
+
+The summary report and the --sqlite outcomes both sort the cells with these.
+They are kept apart from the summary report so --sqlite runs do not import
+jinja2.
+"""
+
+# These depend on the patterns put into explanations
+NO_MATCH_PATTERN = r'No (?:select|text) match on'
+MAJORITY_MATCH_PATTERN = r'^(?:Majority|Normalized majority) match'
+UNANIMOUS_MATCH_PATTERN = r'^(?:Unanimous|Normalized unanimous) match'
+FUZZ_MATCH_PATTERN = r'^(?:Partial|Token set) ratio match'
+ALL_BLANK_PATTERN = (r'^(?:(?:All|The) \d+ record'
+                     r'|^There (?:was|were) no numbers? in)')
+ONESIES_PATTERN = r'Only 1 transcript in|There was 1 number in'
+MMR_PATTERN = r'^There (?:was|were) (?:\d+) numbers? in'
+
+# Combine for the problem pattern
+PROBLEM_PATTERN = '|'.join([NO_MATCH_PATTERN, ONESIES_PATTERN])
@@ -0,0 +1,120 @@
+"""Build the outputs alongside the rest of the run.
+
+With --pipeline the unreconciled file is written while the data is being
+reconciled, and the reconciled, summary, and merged outputs are built at the
+same time from the shared results. The output builders only read the data
+frames so they can share them.
+
+A zip archive can only have one member open at a time. So when zipping, each
+output is deflated as it is written into a temporary file of its own, and the
+data is copied into the archive when the run is done, in the order that the
+outputs were started. Nothing is written uncompressed. The
+archive has the same members in the same order as a run without --pipeline.
+
+Without --pipeline there are no workers and each output is built as soon as
+it is submitted.
+"""
+
+import io
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from lib.writer import DeflatedMember
+
+WORKERS = 3      # How many outputs to build at once
+MAX_PENDING = 4  # The most outputs started and not yet finished
+
+
+class Pipeline:
+    """Run the output builders in threads."""
+
+    def __init__(self, writer, workers=0, max_pending=MAX_PENDING):
+        """Start the workers, if there are any."""
+        self.writer = writer
+        self.pool = ThreadPoolExecutor(max_workers=workers) if workers else None
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.tasks = []
+
+    def __enter__(self):
+        """Use the pipeline as a context manager."""
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        """Wait for the outputs. Only finish them if the run went well."""
+        if exc_type:
+            self.close()
+        else:
+            self.finish()
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Build an output.
+
+        The function is called with the writer to use as its "writer" keyword
+        argument. We block when there are too many outputs in flight.
+        """
+        if not self.pool:
+            return func(*args, writer=self.writer, **kwargs)
+
+        writer = Spool(self.writer) if self.writer.zippy else self.writer
+        self.slots.acquire()
+        try:
+            future = self.pool.submit(func, *args, writer=writer, **kwargs)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        self.tasks.append((future, writer))
+        return future
+
+    def finish(self):
+        """Wait for the outputs in order and splice in any spooled ones."""
+        try:
+            for future, writer in self.tasks:
+                future.result()
+                if isinstance(writer, Spool):
+                    writer.copy()
+        finally:
+            self.close()
+
+    def close(self):
+        """Wait for the workers to stop."""
+        if self.pool:
+            self.pool.shutdown(wait=True)
+            self.pool = None
+        for _, writer in self.tasks:
+            if isinstance(writer, Spool):
+                writer.close()
+        self.tasks = []
+
+
+class Spool:
+    """Stand in for a zipping Writer by deflating the files until later."""
+
+    def __init__(self, writer):
+        """Remember the real writer."""
+        self.writer = writer
+        self.zippy = writer.zippy
+        self.members = []
+
+    @contextmanager
+    def open(self, path, base=None, binary=False):
+        """Open a temporary deflated file for an archive member."""
+        member = DeflatedMember()
+        self.members.append((path, base, member))
+        out_file = io.BufferedWriter(member)
+        if not binary:
+            out_file = io.TextIOWrapper(out_file, encoding='utf-8', newline='')
+        with out_file:
+            yield out_file
+
+    def copy(self):
+        """Copy the deflated files into the archive."""
+        for path, base, member in self.members:
+            self.writer.splice(path, member, base=base)
+
+    def close(self):
+        """Remove the temporary files."""
+        for _, _, member in self.members:
+            member.discard()
+        self.members = []
@@ -0,0 +1,23 @@
+"""Plural words for the explanations.
+
+The reconcilers explain every cell so asking inflect for each word, every
+time, adds up. We ask inflect once for each of the words the reconcilers use
+and look them up after that.
+"""
+
+import inflect
+
+WORDS = ['The', 'blank', 'is', 'number', 'record', 'time', 'was']
+
+ENGINE = inflect.engine()
+ENGINE.defnoun('The', 'All')
+PLURALS = {word: ENGINE.plural(word) for word in WORDS}
+
+
+def plural(word, count):
+    """Get the word for the count, like inflect's plural(word, count)."""
+    if count == 1:
+        return word
+    if word not in PLURALS:
+        PLURALS[word] = ENGINE.plural(word)
+    return PLURALS[word]
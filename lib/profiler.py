@@ -0,0 +1,202 @@
+"""Collect timings and counts for a reconciliation run.
+
+Profiling is off unless the --profile option is given or an embedding caller
+adds a hook. When it is off the stage(), count(), and timed() functions do
+nothing, so the instrumented code runs as before.
+
+    import lib.profiler as profiler
+    profiler.add_hook(lambda report: print(report['stages']))
+"""
+
+import sys
+import time
+from functools import wraps
+from contextlib import contextmanager
+from collections import OrderedDict
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE = None  # The profile for the current run
+HOOKS = []      # Called with the report at the end of every profiled run
+
+
+class Profile:
+    """Timings and counts for one run."""
+
+    def __init__(self):
+        """Start the clocks."""
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        self.stages = OrderedDict()
+        self.columns = OrderedDict()
+        self.counts = OrderedDict()
+        self.peaks = OrderedDict()
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Time a stage of the run. Repeated stages are added together.
+
+        We also keep the peak memory of the process when the stage ends, so
+        the report shows which stage raised it.
+        """
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self._add(self.stages, name, wall, cpu)
+            self.peaks[name] = peak_rss_mb()
+
+    def timed(self, name, func):
+        """Wrap the function so that the time spent in it is added up."""
+        @wraps(func)
+        def _timed(*args, **kwargs):
+            wall, cpu = time.perf_counter(), time.process_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._add(self.columns, name, wall, cpu)
+        return _timed
+
+    def count(self, name, count=1):
+        """Add to a counter. Names with a colon are grouped by the prefix."""
+        if ':' in name:
+            group, name = name.split(':', 1)
+            counts = self.counts.setdefault(group, OrderedDict())
+        else:
+            counts = self.counts
+        counts[name] = counts.get(name, 0) + count
+
+    def merge(self, other):
+        """Add the timings and counts from another profile, like a worker's."""
+        for name, timing in other.stages.items():
+            self._merge(self.stages, name, timing)
+        for name, timing in other.columns.items():
+            self._merge(self.columns, name, timing)
+        for name, count in other.counts.items():
+            if isinstance(count, dict):
+                for key, value in count.items():
+                    self.count('{}:{}'.format(name, key), value)
+            else:
+                self.count(name, count)
+
+    def report(self):
+        """Get the profile as a dictionary that can be dumped to JSON."""
+        return {
+            'wall': round(time.perf_counter() - self.wall, 4),
+            'cpu': round(time.process_time() - self.cpu, 4),
+            'peak_rss_mb': peak_rss_mb(),
+            'stage_peak_rss_mb': self.peaks,
+            'stages': rounded(self.stages),
+            'columns': rounded(self.columns),
+            'counts': self.counts}
+
+    @staticmethod
+    def _add(timings, name, wall, cpu):
+        timing = timings.setdefault(
+            name, OrderedDict([('wall', 0.0), ('cpu', 0.0), ('calls', 0)]))
+        timing['wall'] += time.perf_counter() - wall
+        timing['cpu'] += time.process_time() - cpu
+        timing['calls'] += 1
+
+    @staticmethod
+    def _merge(timings, name, other):
+        timing = timings.setdefault(
+            name, OrderedDict([('wall', 0.0), ('cpu', 0.0), ('calls', 0)]))
+        for key in ['wall', 'cpu', 'calls']:
+            timing[key] += other[key]
+
+
+def rounded(timings):
+    """Copy the timings with the seconds rounded."""
+    return OrderedDict(
+        (name, OrderedDict([
+            ('wall', round(t['wall'], 4)),
+            ('cpu', round(t['cpu'], 4)),
+            ('calls', t['calls'])]))
+        for name, t in timings.items())
+
+
+def peak_rss_mb():
+    """Get the peak resident set size of this process."""
+    if not resource:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak /= 1024 * 1024 if sys.platform == 'darwin' else 1024  # Bytes or KiB
+    return round(peak, 1)
+
+
+def add_hook(hook):
+    """Call the hook with the report at the end of each profiled run."""
+    HOOKS.append(hook)
+
+
+def remove_hook(hook):
+    """Stop calling the hook."""
+    HOOKS.remove(hook)
+
+
+def wanted(args):
+    """Does the run need to be profiled."""
+    return bool(getattr(args, 'profile', None) or getattr(args, 'sample', None)
+                or HOOKS)
+
+
+def start():
+    """Start profiling a run."""
+    global PROFILE  # pylint: disable=global-statement
+    PROFILE = Profile()
+    return PROFILE
+
+
+def stop():
+    """Stop profiling, call the hooks, and return the report."""
+    global PROFILE  # pylint: disable=global-statement
+    if not PROFILE:
+        return None
+    report = PROFILE.report()
+    PROFILE = None
+    for hook in HOOKS:
+        hook(report)
+    return report
+
+
+def detach():
+    """
+    Stop profiling and return the profile without a report.
+
+    Worker processes use this to send their timings back to the run.
+    """
+    global PROFILE  # pylint: disable=global-statement
+    profile, PROFILE = PROFILE, None
+    return profile
+
+
+def merge(profile):
+    """Add a worker's profile to the run if we are profiling."""
+    if PROFILE and profile:
+        PROFILE.merge(profile)
+
+
+@contextmanager
+def stage(name):
+    """Time a stage of the run if we are profiling."""
+    if PROFILE:
+        with PROFILE.stage(name):
+            yield
+    else:
+        yield
+
+
+def timed(name, func):
+    """Time every call to the function if we are profiling."""
+    return PROFILE.timed(name, func) if PROFILE else func
+
+
+def count(name, count=1):  # pylint: disable=redefined-outer-name
+    """Add to a counter if we are profiling."""
+    if PROFILE:
+        PROFILE.count(name, count)
@@ -3,16 +3,32 @@
 
 from functools import partial
 import pandas as pd
+import lib.profiler as profiler
 
 NO_EXPLANATIONS = ['same']  # We may want these later
 
+# The outputs that show the explanations. --sample reports on them too.
+EXPLAINED = ['summary', 'merged', 'sqlite', 'save_artifact', 'sample']
 
-def build(args, unreconciled, column_types, plugins=None):
-    """Build the reconciled and explanations data-frames."""
+
+def explains(args):
+    """Does anything use the explanations."""
+    return any(getattr(args, arg, None) for arg in EXPLAINED)
+
+
+def build(args, unreconciled, column_types, plugins=None, explain=True):
+    """
+    Build the reconciled and explanations data-frames.
+
+    Without "explain" the reconcilers skip the explanations and the
+    explanations data-frame has no columns.
+    """
     reconcilers = {k: plugins[v['type']] for k, v in column_types.items()}
 
     # Get group and then reconcile the data
-    aggregators = {r: partial(reconcilers[r].reconcile, args=args)
+    aggregators = {r: profiler.timed(
+                        r, partial(reconcilers[r].reconcile, args=args,
+                                   explain=explain))
                    for r in reconcilers
                    if r in unreconciled.columns}
 
@@ -20,11 +36,12 @@ def build(args, unreconciled, column_types, plugins=None):
     reconciled = unreconciled.set_index(
             args.user_column, append=True).groupby(
             args.group_by).agg(aggregators, args)
-    explanations = pd.DataFrame()
+    explanations = pd.DataFrame() if explain else pd.DataFrame(
+        index=reconciled.index)
     for column in reconciled.columns:
         reconciler = reconcilers.get(column)
         if reconciler:
-            if column_types[column]['type'] not in NO_EXPLANATIONS:
+            if explain and column_types[column]['type'] not in NO_EXPLANATIONS:
                 explanations[column] = reconciled[column].apply(lambda x: x[0])
             reconciled[column] = reconciled[column].apply(lambda x: x[1])
     return reconciled, explanations
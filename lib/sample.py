@@ -0,0 +1,107 @@
+"""Reconcile a random sample of the subjects to preview a full run.
+
+--sample N picks N subjects by their --group-by value. The pick only depends
+on the --sample-seed and the input, so previews with other --column-types or
+fuzzy thresholds see the same subjects. The nfn reader drops the other
+subjects before it flattens the annotations.
+
+We report how each column was reconciled and estimate how long the full run
+would take. The parts of the run that scale with the subjects are scaled up
+and the rest, like parsing the input CSV, is counted once.
+"""
+
+import sys
+import random
+import lib.util as util
+
+# The report pulls in jinja2 so it waits until the rates are reported
+summary = util.lazy_import('lib.summary')
+
+# These parts of the read only see the sampled rows
+SAMPLED_READ_STAGES = ['read.flatten', 'read.metadata', 'read.sort',
+                       'read.subjects']
+
+# The reconciled_summary() counts to report and their headings
+RATES = [('num_unanimous_match', 'Unanimous'),
+         ('num_majority_match', 'Majority'),
+         ('num_fuzzy_match', 'Fuzzy'),
+         ('num_mmr', 'Mean/mode'),
+         ('num_all_blank', 'All blank'),
+         ('num_onesies', 'Onesies'),
+         ('num_no_match', 'No match')]
+
+
+def keep(args, values):
+    """Get a mask of the group-by values that are in the sample."""
+    ids = sorted(set(values))
+    args.sample_total = len(ids)
+    chosen = random.Random(args.sample_seed).sample(
+        ids, min(args.sample, len(ids)))
+    return values.isin(chosen)
+
+
+def select(args, df, subjects=None):
+    """Keep the sampled rows, and subject table rows, if the reader did not."""
+    if getattr(args, 'sample_total', None):
+        return df, subjects
+
+    df = df.loc[keep(args, df[args.group_by]), :]
+    if subjects is not None:
+        subjects = subjects.loc[
+            subjects.index.isin(df[args.group_by].unique()), :]
+    return df, subjects
+
+
+def match_rates(explanations, column_types):
+    """Get the percent of the subjects reconciled each way for each column."""
+    total = explanations.shape[0]
+    rates = []
+    for column in summary.reconciled_summary(explanations, column_types):
+        rate = {'name': column['name'], 'col_type': column['col_type']}
+        for key, _ in RATES:
+            value = column[key]
+            if isinstance(value, str):
+                value = int(value.replace(',', '')) if value else None
+            rate[key] = 100.0 * value / total \
+                if value is not None and total else None
+        rates.append(rate)
+    return rates
+
+
+def estimate(args, report):
+    """Estimate the full run's wall time from the profile report."""
+    stages = report['stages']
+    fixed = stages.get('read', {}).get('wall', 0.0)
+    # With --stream the nfn reader flattens the batches outside of the read
+    if args.format == 'nfn' and not getattr(args, 'stream', False):
+        fixed -= sum(stages.get(s, {}).get('wall', 0.0)
+                     for s in SAMPLED_READ_STAGES)
+    scaled = report['wall'] - fixed
+    sampled = min(args.sample, args.sample_total)
+    return fixed + scaled * args.sample_total / sampled if sampled else fixed
+
+
+def report_rates(args, explanations, column_types, out_file=None):
+    """Print the match rates for the sampled subjects."""
+    out_file = out_file if out_file else sys.stdout
+    print('Sampled {:,} of {:,} subjects (--sample-seed={})'.format(
+        explanations.shape[0], args.sample_total, args.sample_seed),
+          file=out_file)
+
+    rates = match_rates(explanations, column_types)
+    width = max([len(r['name']) for r in rates] + [6])
+    print('{:<{}}  {:<8}'.format('Column', width, 'Type')
+          + ''.join('{:>10}'.format(h) for _, h in RATES), file=out_file)
+    for rate in rates:
+        print('{:<{}}  {:<8}'.format(rate['name'], width, rate['col_type'])
+              + ''.join('{:>10}'.format(
+                  '{:.1f}%'.format(rate[k]) if rate[k] is not None else '-')
+                        for k, _ in RATES),
+              file=out_file)
+
+
+def report_timing(args, report, out_file=None):
+    """Print the sample's run time and the full run's estimated time."""
+    out_file = out_file if out_file else sys.stdout
+    print('Sample run: {:.1f}s. Estimated full run: {:.1f}s'.format(
+        report['wall'], estimate(args, report)), file=out_file)
@@ -0,0 +1,258 @@
+"""Serve reconciliations over HTTP on a local port or a Unix socket.
+
+Each request runs in a pool of worker processes. The workers stay up between
+requests, so their imports, plug-ins, and the compiled summary template stay
+warm. A run only pays for reading and reconciling its export.
+
+    GET  /health     The server's status as JSON.
+    POST /reconcile  Run reconcile.py. The body is JSON:
+                     {"args": ["-r", "reconciled.csv", ...],
+                      "export": "<the CSV export's text>",
+                      "export_name": "classifications.csv"}
+
+When there is an "export" it is the input file, otherwise the input file must
+be in the "args". Relative output files are written into a scratch directory
+and returned base64 encoded in the response's "files". Absolute output files
+are written where they are asked for.
+"""
+
+import io
+import os
+import json
+import time
+import base64
+import asyncio
+import tempfile
+import traceback
+from importlib import import_module
+from contextlib import redirect_stdout, redirect_stderr
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from os.path import basename, isabs, join, relpath
+import reconcile
+import lib.util as util
+
+OUTPUT_OPTIONS = ['unreconciled', 'reconciled', 'summary', 'merged', 'sqlite',
+                  'zip', 'save_artifact', 'profile']
+
+WARM_MODULES = ['lib.reconciler', 'lib.merged', 'lib.summary',
+                'lib.formats.nfn', 'lib.formats.csv']
+
+STATUS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable'}
+
+
+class Server:
+    """Accept requests and hand them to the worker pool."""
+
+    def __init__(self, workers=1, max_waiting=16, max_body=256):
+        """Set up the limits. The pool is started by start()."""
+        self.workers = workers
+        self.max_waiting = max_waiting
+        self.max_body = max_body * 1024 * 1024
+        self.pool = None
+        self.slots = None
+        self.server = None
+        self.running = 0
+        self.waiting = 0
+        self.served = 0
+        self.failed = 0
+        self.started = None
+
+    async def start(self, host='127.0.0.1', port=8765, socket=None):
+        """Start the worker pool and listen for requests."""
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.slots = asyncio.Semaphore(self.workers)
+        self.started = time.time()
+
+        loop = asyncio.get_event_loop()
+        await asyncio.gather(*[loop.run_in_executor(self.pool, warm)
+                               for _ in range(self.workers)])
+
+        if socket:
+            self.server = await asyncio.start_unix_server(
+                self.handle, path=socket)
+        else:
+            self.server = await asyncio.start_server(
+                self.handle, host=host, port=port)
+        return self.server
+
+    async def stop(self):
+        """Stop listening and shut the workers down."""
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.pool:
+            self.pool.shutdown()
+
+    def health(self):
+        """Get the server's status."""
+        return 200, OrderedDict([
+            ('status', 'ok'),
+            ('workers', self.workers),
+            ('running', self.running),
+            ('waiting', self.waiting),
+            ('served', self.served),
+            ('failed', self.failed),
+            ('uptime', round(time.time() - self.started, 1))])
+
+    async def handle(self, reader, writer):
+        """Read one request and send its response."""
+        try:
+            try:
+                code, body = await self.route(reader)
+            except (ValueError, asyncio.IncompleteReadError) as error:
+                code, body = 400, {'status': 'failed', 'error': str(error)}
+            except Exception:  # pylint: disable=broad-except
+                code, body = 500, {
+                    'status': 'failed', 'error': traceback.format_exc()}
+
+            data = json.dumps(body).encode('utf-8')
+            writer.write(
+                'HTTP/1.1 {} {}\r\n'.format(code, STATUS[code]).encode())
+            writer.write(b'Content-Type: application/json\r\n')
+            writer.write('Content-Length: {}\r\n'.format(len(data)).encode())
+            writer.write(b'Connection: close\r\n\r\n')
+            writer.write(data)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def route(self, reader):
+        """Parse the request and call its handler."""
+        method, path, headers = await read_head(reader)
+
+        if path == '/health':
+            if method != 'GET':
+                return 405, {'status': 'failed', 'error': 'Use GET'}
+            return self.health()
+
+        if path != '/reconcile':
+            return 404, {'status': 'failed', 'error': 'Unknown path'}
+        if method != 'POST':
+            return 405, {'status': 'failed', 'error': 'Use POST'}
+
+        length = int(headers.get('content-length', 0))
+        if length > self.max_body:
+            return 413, {'status': 'failed', 'error': 'The body is too large'}
+        request = json.loads((await reader.readexactly(length)).decode())
+        if not isinstance(request, dict):
+            return 400, {'status': 'failed',
+                         'error': 'The body must be a JSON object'}
+
+        return await self.reconcile(request)
+
+    async def reconcile(self, request):
+        """Run the reconciliation when a worker is free."""
+        if self.waiting >= self.max_waiting:
+            return 503, {'status': 'failed', 'error': 'The server is busy'}
+
+        self.waiting += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.running += 1
+        code = 500
+        try:
+            loop = asyncio.get_event_loop()
+            code, body = await loop.run_in_executor(
+                self.pool, run_request,
+                request.get('args', []),
+                request.get('export'),
+                request.get('export_name', 'export.csv'))
+        finally:
+            self.running -= 1
+            if code == 200:
+                self.served += 1
+            else:
+                self.failed += 1
+            self.slots.release()
+        return code, body
+
+
+async def read_head(reader):
+    """Read the request line and the headers."""
+    line = (await reader.readline()).decode('latin-1').split()
+    if len(line) != 3:
+        raise ValueError('Bad request line')
+    method, path, _ = line
+
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode('latin-1').strip()
+        if not line:
+            break
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    return method.upper(), path.split('?')[0], headers
+
+
+def warm():
+    """Import what a run needs so that the first request is not slow."""
+    for name in WARM_MODULES:
+        import_module(name)
+    for name in util.get_plugins('column_types'):
+        import_module('lib.column_types.' + name)
+    import_module('lib.summary').get_template()
+    return os.getpid()
+
+
+def run_request(argv, export=None, export_name='export.csv'):
+    """Run a reconciliation in a worker process and gather its outputs."""
+    start = time.perf_counter()
+    log = io.StringIO()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        export_path = None
+        if export is not None:
+            export_path = join(work_dir, basename(export_name))
+            with open(export_path, 'w', encoding='utf-8') as out_file:
+                out_file.write(export)
+            argv = [export_path] + list(argv)
+
+        try:
+            with redirect_stdout(log), redirect_stderr(log):
+                args = reconcile.parse_command_line(argv)
+                for option in OUTPUT_OPTIONS:
+                    path = getattr(args, option, None)
+                    if path and not isabs(path):
+                        setattr(args, option, join(work_dir, path))
+                reconcile.run(args)
+            code, body = 200, OrderedDict([('status', 'ok')])
+        except SystemExit as exit_:
+            code = 400 if exit_.code else 200
+            body = OrderedDict([('status', 'failed' if code == 400 else 'ok')])
+            if exit_.code:
+                body['error'] = str(exit_.code)
+        except Exception:  # pylint: disable=broad-except
+            code = 500
+            body = OrderedDict([
+                ('status', 'failed'), ('error', traceback.format_exc())])
+
+        body['files'] = output_files(work_dir, export_path)
+
+    body['log'] = log.getvalue()
+    body['wall'] = round(time.perf_counter() - start, 4)
+    return code, body
+
+
+def output_files(work_dir, export_path):
+    """Get the files written into the scratch directory."""
+    files = OrderedDict()
+    for root, _, names in os.walk(work_dir):
+        for name in sorted(names):
+            path = join(root, name)
+            if path != export_path:
+                with open(path, 'rb') as in_file:
+                    files[relpath(path, work_dir)] = base64.b64encode(
+                        in_file.read()).decode('ascii')
+    return files
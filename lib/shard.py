@@ -0,0 +1,44 @@
+"""Split the subjects into shards so a big project can run on several nodes.
+
+A subject belongs to a shard by the hash of its group-by value. We use CRC32
+and not hash() so every process puts a subject into the same shard.
+"""
+
+import zlib
+import lib.profiler as profiler
+
+
+def split(shard):
+    """Get the shard's number and the shard count from the "I/N" string."""
+    try:
+        number, count = [int(s) for s in shard.split('/')]
+    except ValueError:
+        return None, None
+    return number, count
+
+
+def is_valid(shard):
+    """Check the shard's format and range."""
+    number, count = split(shard)
+    return bool(count) and 1 <= number <= count
+
+
+def keep(args, values):
+    """Get a mask of the group-by values that are in the shard."""
+    number, count = split(args.shard)
+    return values.map(
+        lambda v: zlib.crc32(str(v).encode('utf-8')) % count == number - 1)
+
+
+def select(args, df, subjects=None):
+    """Keep the rows, and subject table rows, that are in the shard."""
+    if not args.shard:
+        return df, subjects
+
+    df = df.loc[keep(args, df[args.group_by]), :]
+    if subjects is not None:
+        mask = keep(args, subjects.index.to_series())
+        subjects = subjects.loc[mask.values, :]
+
+    profiler.count('shard:rows', df.shape[0])
+    return df, subjects
@@ -0,0 +1,146 @@
+"""Write the reconciliation results into an indexed SQLite database.
+
+The database has the unreconciled, reconciled, and explanations data as
+tables with the same columns as the CSV files. The "outcomes" table has a row
+for each reconciled cell with how it was reconciled, so curators can query
+for things like every locality with no match:
+
+    SELECT subject_id, reconciled, explanation FROM outcomes
+     WHERE field = 'Locality' AND outcome = 'no_match';
+
+The "columns" table has the column types. The rows are inserted in bulk in
+one transaction and the indexes are built after the inserts.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import numpy as np
+import pandas as pd
+import lib.patterns as patterns
+
+BATCH_ROWS = 10000  # How many rows to hand to executemany() at a time
+
+# The outcome of a cell is the first of these patterns its explanation matches
+OUTCOMES = [
+    ('no_match', patterns.NO_MATCH_PATTERN),
+    ('onesie', patterns.ONESIES_PATTERN),
+    ('all_blank', patterns.ALL_BLANK_PATTERN),
+    ('unanimous', patterns.UNANIMOUS_MATCH_PATTERN),
+    ('majority', patterns.MAJORITY_MATCH_PATTERN),
+    ('fuzzy', patterns.FUZZ_MATCH_PATTERN),
+    ('mmr', patterns.MMR_PATTERN)]
+OTHER = 'other'
+
+
+def save(args, unreconciled, reconciled, explanations, column_types, writer):
+    """Write the database to the file or, when zipping, into the archive."""
+    if not writer.zippy:
+        write(args, unreconciled, reconciled, explanations, column_types,
+              args.sqlite)
+        return
+
+    # SQLite needs a real file so we build it and copy it into the archive
+    handle, path = tempfile.mkstemp(suffix='.sqlite')
+    os.close(handle)
+    try:
+        write(args, unreconciled, reconciled, explanations, column_types,
+              path)
+        with open(path, 'rb') as in_file, \
+                writer.open(args.sqlite, binary=True) as out_file:
+            shutil.copyfileobj(in_file, out_file)
+    finally:
+        os.remove(path)
+
+
+def write(args, unreconciled, reconciled, explanations, column_types, path):
+    """Build the database."""
+    if os.path.exists(path):
+        os.remove(path)
+
+    reconciled = reconciled.rename_axis(args.group_by).reset_index()
+    outcomes = get_outcomes(args, reconciled, explanations)
+    explanations = explanations.rename_axis(args.group_by).reset_index()
+    columns = pd.DataFrame(
+        [(c['name'], c['type'], c['order']) for c in column_types.values()],
+        columns=['name', 'type', 'order'])
+
+    con = sqlite3.connect(path)
+    try:
+        # The file is new so there is nothing to protect if we die
+        con.execute('PRAGMA journal_mode = OFF')
+        con.execute('PRAGMA synchronous = OFF')
+
+        with con:
+            insert(con, 'columns', columns)
+            insert(con, 'unreconciled', unreconciled)
+            insert(con, 'reconciled', reconciled)
+            insert(con, 'explanations', explanations)
+            insert(con, 'outcomes', outcomes)
+
+        with con:
+            for table, index_columns in indexes(args, unreconciled):
+                con.execute('CREATE INDEX {} ON {} ({})'.format(
+                    quote('{}_{}'.format(table, '_'.join(index_columns))),
+                    quote(table),
+                    ', '.join(quote(c) for c in index_columns)))
+            con.execute('ANALYZE')
+    finally:
+        con.close()
+
+
+def indexes(args, unreconciled):
+    """Get the tables and columns to index."""
+    found = [('unreconciled', [args.group_by]),
+             ('unreconciled', [args.key_column])]
+    if args.user_column and args.user_column in unreconciled.columns:
+        found.append(('unreconciled', [args.user_column]))
+    found += [('reconciled', [args.group_by]),
+              ('explanations', [args.group_by]),
+              ('outcomes', [args.group_by]),
+              ('outcomes', ['field', 'outcome']),
+              ('outcomes', ['outcome']),
+              ('outcomes', ['problem'])]
+    return [(t, c) for t, c in found
+            if t != 'unreconciled' or c[0] in unreconciled.columns]
+
+
+def get_outcomes(args, reconciled, explanations):
+    """Get how each reconciled cell was reconciled."""
+    cells = explanations.rename_axis(args.group_by).stack()
+    cells.index.names = [args.group_by, 'field']
+    cells = cells.rename('explanation').reset_index()
+
+    values = reconciled.set_index(args.group_by).stack()
+    values.index.names = [args.group_by, 'field']
+    cells = cells.join(values.rename('reconciled'),
+                       on=[args.group_by, 'field'])
+
+    text = cells.explanation.astype(str)
+    cells['outcome'] = np.select(
+        [text.str.contains(p) for _, p in OUTCOMES],
+        [o for o, _ in OUTCOMES],
+        default=OTHER)
+    cells['problem'] = text.str.contains(patterns.PROBLEM_PATTERN).astype(int)
+
+    return cells[[args.group_by, 'field', 'outcome', 'problem', 'reconciled',
+                  'explanation']]
+
+
+def insert(con, table, df):
+    """Create the table and insert the data frame's rows in batches."""
+    columns = ', '.join(quote(c) for c in df.columns)
+    con.execute('CREATE TABLE {} ({})'.format(quote(table), columns))
+
+    sql = 'INSERT INTO {} VALUES ({})'.format(
+        quote(table), ', '.join('?' * len(df.columns)))
+    for beg in range(0, df.shape[0], BATCH_ROWS):
+        batch = df.iloc[beg:beg + BATCH_ROWS]
+        rows = batch.astype(object).where(batch.notnull(), None)
+        con.executemany(sql, rows.values.tolist())
+
+
+def quote(name):
+    """Quote an SQL identifier."""
+    return '"{}"'.format(str(name).replace('"', '""'))
@@ -0,0 +1,222 @@
+"""Reconcile the subjects while the input is still being read.
+
+With --stream the reader hands over batches of whole subjects, already
+flattened, as it finishes them, and worker processes reconcile the batches
+while the reader works on the next ones. At most a few batches per worker are
+waiting at any time, so a fast reader does not fill up the memory. The
+results are put back together in subject order, so the outputs are the same
+as without --stream.
+
+A format may read the input a batch at a time with a read_batches() function.
+The nfn format reads the CSV file and then flattens the annotations, parses
+the dates, and so on, a batch at a time. Each batch adds the columns it finds
+to the column types. Formats with a read_chunks()
+function, like csv and jsonl, hand over their chunks of rows as they are read.
+When the rows are in subject order only a few chunks are held at a time.
+Other formats are read as usual and then split into batches.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import lib.util as util
+import lib.profiler as profiler
+import lib.shard as shard
+import lib.sample as sample
+import lib.reconciler as reconciler
+
+BATCH_SUBJECTS = 500  # How many subjects to read and reconcile at a time
+MAX_PENDING = 2       # How many batches each worker may have waiting
+WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+
+def read(args, reader, chunked=True):
+    """
+    Start reading the input.
+
+    We return the column types, the number of subjects, and a generator of
+    (unreconciled, subjects) batches in subject order. The number of subjects
+    is None when we can not know it until the whole input is read. The
+    batches raise util.ReadAgain when the input can not be split up, like
+    when a subject's rows are spread out, and then the input has to be read
+    again with chunked=False.
+    """
+    if chunked and hasattr(reader, 'read_batches'):
+        return reader.read_batches(args, BATCH_SUBJECTS)
+
+    # Sampling picks from all of the subjects so it needs the whole input
+    if (chunked and hasattr(reader, 'read_chunks') and not args.sample
+            and not getattr(args, 'subjects', None)):
+        return {}, None, read_chunks(args, reader)
+
+    unreconciled, column_types, subjects = reader.read(args)
+    unreconciled, subjects = shard.select(args, unreconciled, subjects)
+    if args.sample:
+        unreconciled, subjects = sample.select(
+            args, unreconciled, subjects)
+
+    count = unreconciled[args.group_by].nunique() \
+        if args.group_by in unreconciled.columns else 0
+    return column_types, count, split(args, unreconciled, subjects)
+
+
+def read_chunks(args, reader):
+    """Split the reader's chunks into batches as they are read."""
+    for unreconciled in util.group_chunks(args, reader.read_chunks(args)):
+        unreconciled, _ = shard.select(args, unreconciled)
+        yield from split(args, unreconciled, None)
+
+
+def split(args, unreconciled, subjects, size=BATCH_SUBJECTS):
+    """Split the data into batches of whole subjects, in subject order."""
+    if unreconciled.empty:
+        return
+
+    groups = unreconciled.groupby(args.group_by, sort=True).ngroup()
+    for _, batch in unreconciled.groupby(groups.values // size, sort=True):
+        batch_subjects = subjects
+        if subjects is not None:
+            batch_subjects = subjects.loc[
+                subjects.index.isin(batch[args.group_by].unique()), :]
+        yield batch, batch_subjects
+
+
+def reconcile(args, batches, column_types, workers=WORKERS, prepare=None,
+              progress=None):
+    """
+    Reconcile the batches as they are read.
+
+    The prepare function gets each batch before it is reconciled and returns
+    it with the column types to reconcile it with. We return the unreconciled,
+    subjects, reconciled, and explanations data for all of the batches.
+    Without workers the batches are reconciled one after another in this
+    process. The workers send their profiles back to be added to this run's.
+    """
+    parts = Parts()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers else None
+    pending = deque()
+
+    try:
+        for unreconciled, subjects in batches:
+            types = column_types
+            if prepare:
+                unreconciled, subjects, types = prepare(unreconciled, subjects)
+            parts.add_read(unreconciled, subjects, types)
+
+            if not pool:
+                parts.add_result(*reconcile_batch(args, unreconciled, types),
+                                 progress=progress)
+                continue
+
+            pending.append(pool.submit(
+                reconcile_batch, args, unreconciled, types,
+                profile=profiler.PROFILE is not None))
+
+            # Wait for the oldest batch when too many are waiting
+            while len(pending) >= workers * MAX_PENDING:
+                parts.add_result(*pending.popleft().result(),
+                                 progress=progress)
+
+        while pending:
+            parts.add_result(*pending.popleft().result(), progress=progress)
+
+        # The reader may find columns after the first batches are reconciled
+        parts.add_columns(args, column_types)
+    finally:
+        if pool:
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=True)
+
+    if progress:
+        progress.finish()
+
+    return parts.frames()
+
+
+def reconcile_batch(args, unreconciled, column_types, profile=False):
+    """
+    Reconcile one batch. This runs in the worker processes.
+
+    When profiling, a worker profiles the batch on its own and returns the
+    profile with the results.
+    """
+    if profile:
+        profiler.start()
+
+    try:
+        plugins = util.get_plugins('column_types')
+
+        # validate_columns() reports the unknown types when the batches are in
+        column_types = {k: v for k, v in column_types.items()
+                        if v['type'] in plugins}
+
+        with profiler.stage('reconcile.batch'):
+            reconciled, explanations = reconciler.build(
+                args, unreconciled, column_types, plugins=plugins,
+                explain=reconciler.explains(args))
+    finally:
+        batch_profile = profiler.detach() if profile else None
+
+    return reconciled, explanations, batch_profile
+
+
+class Parts:
+    """The batches' data frames in the order that they were read."""
+
+    def __init__(self):
+        """Start with no batches."""
+        self.unreconciled = []
+        self.subjects = []
+        self.last_types = None
+        self.reconciled = []
+        self.explanations = []
+
+    def add_read(self, unreconciled, subjects, column_types):
+        """Keep a batch as it was read and the column types it was given."""
+        self.unreconciled.append(unreconciled)
+        if subjects is not None:
+            self.subjects.append(subjects)
+        self.last_types = column_types
+
+    def add_result(self, reconciled, explanations, profile=None,
+                   progress=None):
+        """Keep a batch's results. They arrive in the order they were read."""
+        self.reconciled.append(reconciled)
+        self.explanations.append(explanations)
+        profiler.merge(profile)
+        if progress:
+            progress.done(reconciled.shape[0])
+
+    def add_columns(self, args, column_types):
+        """
+        Reconcile the columns that a batch did not have when it was read.
+
+        The batch's rows are blank for the columns, like they are when all of
+        the input is reconciled at once.
+        """
+        # The last batch's column types have the argument column types, too
+        last_types = self.last_types or {}
+        column_types = {k: last_types.get(k, v)
+                        for k, v in column_types.items()}
+        for i, unreconciled in enumerate(self.unreconciled):
+            missing = {k: v for k, v in column_types.items()
+                       if k not in unreconciled.columns}
+            if not missing:
+                continue
+            unreconciled = unreconciled.assign(**{k: '' for k in missing})
+            reconciled, explanations, _ = reconcile_batch(
+                args, unreconciled, missing)
+            self.reconciled[i] = self.reconciled[i].join(reconciled)
+            self.explanations[i] = self.explanations[i].join(explanations)
+
+    def frames(self):
+        """Put the batches together."""
+        if not self.unreconciled:
+            return pd.DataFrame(), None, pd.DataFrame(), pd.DataFrame()
+        return (util.concat_chunks(self.unreconciled),
+                pd.concat(self.subjects).fillna('') if self.subjects
+                else None,
+                pd.concat(self.reconciled),
+                pd.concat(self.explanations))
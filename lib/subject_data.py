@@ -0,0 +1,128 @@
+"""Keep the subject data in a table with one row per subject.
+
+Every classification of a subject carries a copy of the subject's data. We
+used to expand the copies into subject_* columns on every classification and
+then check that they were the same with the "same" reconciler. Now we keep one
+copy per subject and join it into the outputs when they are written.
+"""
+
+import re
+import json
+import pandas as pd
+import lib.util as util
+
+SUBJECT_PREFIX = 'subject_'
+SAME = 'same'
+
+
+def extract(args, df, column_types):
+    """
+    Build the subject table from the subject_data column.
+
+    The data-frame is sorted so we take each subject's data from its first
+    classification. The subject data json looks like:
+        {<subject_id>: {"key_1": "value_1", "key_2": "value_2", ...}}
+    """
+    first = df.drop_duplicates(args.group_by)
+    subjects = parse(first.subject_data, first[args.group_by])
+
+    add_column_types(subjects.columns, column_types)
+
+    return subjects
+
+
+def add_column_types(columns, column_types):
+    """Put the subject columns into the column_types: They're all 'same'."""
+    last = util.last_column_type(column_types)
+    for name in columns:
+        last += 1
+        column_types[name] = {'type': SAME, 'order': last, 'name': name}
+    return column_types
+
+
+def check(args, df, subjects):
+    """
+    Blank the subject values that differ between a subject's classifications.
+
+    This is what the "same" reconciler did with the copies. We only parse the
+    copies of the subjects where the subject data is not identical.
+    """
+    copies = df.groupby(args.group_by).subject_data.nunique()
+    differ = copies[copies > 1].index
+    if differ.empty:
+        return subjects
+
+    rows = df.loc[df[args.group_by].isin(differ), :]
+    data = parse(rows.subject_data, rows[args.group_by])
+
+    subjects = subjects.copy()
+    columns = [c for c in data.columns if c in subjects.columns]
+    for subject_id, group in data.groupby(level=0):
+        for column in columns:
+            if group[column].nunique() > 1:
+                subjects.at[subject_id, column] = ''
+
+    return subjects
+
+
+def parse(subject_data, subject_ids):
+    """Convert the subject data JSON into columns."""
+    data = (subject_data.map(json.loads)
+                        .apply(lambda x: list(x.values())[0])
+                        .tolist())
+    data = pd.DataFrame(data, index=subject_ids.values)
+    data.index.name = subject_ids.name
+
+    if 'retired' in data.columns:
+        data = data.drop(['retired'], axis=1)
+
+    if 'id' in data.columns:
+        data = data.rename(columns={'id': 'external_id'})
+
+    columns = [re.sub(r'\W+', '_', c) for c in data.columns]
+    columns = [re.sub(r'^_+|_$', '', c) for c in columns]
+    columns = [SUBJECT_PREFIX + c for c in columns]
+
+    columns = {old: new for old, new in zip(data.columns, columns)}
+    return data.rename(columns=columns).fillna('')
+
+
+def split(args, unreconciled, subjects, column_types):
+    """
+    Move subject columns that are not "same" columns into the unreconciled.
+
+    They were given another column type so they need to be reconciled.
+    """
+    if subjects is None:
+        return unreconciled, subjects
+
+    columns = [c for c in subjects.columns
+               if column_types.get(c, {}).get('type', SAME) != SAME]
+    if not columns:
+        return unreconciled, subjects
+
+    unreconciled = unreconciled.join(subjects[columns], on=args.group_by)
+    return unreconciled, subjects.drop(columns, axis=1)
+
+
+def join(args, df, subjects, column_types):
+    """
+    Add the subject columns to an unreconciled or reconciled data-frame.
+
+    The unreconciled data-frame has a group-by column and the reconciled one
+    is indexed by it. The columns are put back in the order they had when the
+    subject columns were part of the data-frame.
+    """
+    if subjects is None or subjects.columns.empty:
+        return df
+
+    if args.group_by in df.columns:
+        df = df.join(subjects, on=args.group_by)
+        columns = util.sort_columns(args, df.columns, column_types)
+        columns = [c for c in columns if c in df.columns]
+    else:
+        df = df.join(subjects)
+        columns = [c for c in column_types if c in df.columns]
+        columns += [c for c in df.columns if c not in columns]
+
+    return df.reindex(columns=columns)
@@ -0,0 +1,138 @@
+"""Find the rows for a few subjects without parsing the whole input file.
+
+The index maps each subject to the byte offset and length of its rows in the
+input CSV file. It is saved next to the input as "<input file>.subjects.npz"
+and it is rebuilt when the input's size or modification time changes. With
+--subjects we only read the indexed rows, from a memory map of the input when
+we can, and hand them to the reader as if they were the whole file.
+"""
+
+import io
+import csv
+import json
+import mmap
+from os.path import getmtime, getsize
+import numpy as np
+import pandas as pd
+import lib.profiler as profiler
+
+VERSION = 1
+SUFFIX = '.subjects.npz'
+
+
+def subject_list(args):
+    """Get the subject IDs from the --subjects options."""
+    return [s.strip() for arg in args.subjects for s in arg.split(',')
+            if s.strip()]
+
+
+def read_csv(args, column, first=False):
+    """
+    Read the header and the rows of the wanted subjects into a data-frame.
+
+    The subject is in the given column. With "first" the column holds a list
+    of subject IDs, like nfn's subject_ids, and we use the first one.
+    """
+    index = load(args.input_file, column, first=first)
+
+    wanted = np.isin(index['keys'], subject_list(args))
+    offsets = index['offsets'][wanted]
+    lengths = index['lengths'][wanted]
+    profiler.count('subject_index:rows', int(wanted.sum()))
+
+    with open(args.input_file, 'rb') as in_file:
+        data = read_records(
+            in_file, int(index['header']), offsets, lengths)
+
+    return pd.read_csv(io.BytesIO(data), dtype=str)
+
+
+def read_records(in_file, header, offsets, lengths):
+    """Get the header and the records, from a memory map of the file."""
+    try:
+        source = mmap.mmap(in_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, OSError):  # An empty file or no mmap support
+        source = None
+
+    parts = []
+    if source is not None:
+        with source:
+            parts.append(source[:header])
+            parts += [source[o:o + n] for o, n in zip(offsets, lengths)]
+    else:
+        parts.append(in_file.read(header))
+        for offset, length in zip(offsets, lengths):
+            in_file.seek(offset)
+            parts.append(in_file.read(length))
+
+    return b''.join(parts)
+
+
+def index_path(input_file):
+    """Get the index file for the input file."""
+    return input_file + SUFFIX
+
+
+def load(input_file, column, first=False):
+    """Load the index or build it if it is missing or out of date."""
+    stamp = {'version': VERSION, 'size': getsize(input_file),
+             'mtime': getmtime(input_file), 'column': column, 'first': first}
+    path = index_path(input_file)
+
+    try:
+        with np.load(path) as saved:
+            if json.loads(str(saved['stamp'])) == stamp:
+                return {k: saved[k] for k in saved.files}
+    except (OSError, ValueError, KeyError):
+        pass
+
+    with profiler.stage('subject_index.build'):
+        index = build(input_file, column, first=first)
+    index['stamp'] = np.array(json.dumps(stamp))
+
+    try:
+        with open(path, 'wb') as out_file:
+            np.savez(out_file, **index)
+    except OSError:  # We can still use the index without saving it
+        pass
+
+    return index
+
+
+def build(input_file, column, first=False):
+    """
+    Scan the input file for the offset and length of each record.
+
+    A record may span lines when a quoted value has a line break, so the CSV
+    reader tells us where each record ends.
+    """
+    keys, offsets, lengths = [], [], []
+
+    with open(input_file, 'rb') as in_file:
+        position = [0]  # The end of the lines the reader has consumed
+
+        def lines():
+            for line in in_file:
+                position[0] += len(line)
+                yield line.decode('utf-8-sig' if position[0] == len(line)
+                                  else 'utf-8')
+
+        reader = csv.reader(lines())
+        header = next(reader)
+        header_end = position[0]
+        where = header.index(column)
+
+        start = header_end
+        for row in reader:
+            if row:
+                key = row[where].split(';')[0] if first else row[where]
+                keys.append(key.strip())
+                offsets.append(start)
+                lengths.append(position[0] - start)
+            start = position[0]
+
+    return {
+        'header': np.array(header_end, dtype=np.int64),
+        'keys': np.array(keys, dtype=str),
+        'offsets': np.array(offsets, dtype=np.int64),
+        'lengths': np.array(lengths, dtype=np.int64)}
@@ -2,132 +2,263 @@
 
 # pylint: disable=invalid-name
 
+import io
 import re
+import os
+import json
+import gzip
+import base64
+from glob import glob
+from itertools import groupby, islice
+from os.path import basename, join, splitext
 from datetime import datetime
-from urllib.parse import urlparse
+import pandas as pd
 from jinja2 import Environment, PackageLoader
 import lib.util as util
+import lib.profiler as profiler
+from lib.writer import Writer
+from lib.patterns import (
+    NO_MATCH_PATTERN, MAJORITY_MATCH_PATTERN, UNANIMOUS_MATCH_PATTERN,
+    FUZZ_MATCH_PATTERN, ALL_BLANK_PATTERN, ONESIES_PATTERN, MMR_PATTERN,
+    PROBLEM_PATTERN)
 
-# These depend on the patterns put into explanations
-NO_MATCH_PATTERN = r'No (?:select|text) match on'
-MAJORITY_MATCH_PATTERN = r'^(?:Majority|Normalized majority) match'
-UNANIMOUS_MATCH_PATTERN = r'^(?:Unanimous|Normalized unanimous) match'
-FUZZ_MATCH_PATTERN = r'^(?:Partial|Token set) ratio match'
-ALL_BLANK_PATTERN = (r'^(?:(?:All|The) \d+ record'
-                     r'|^There (?:was|were) no numbers? in)')
-ONESIES_PATTERN = r'Only 1 transcript in|There was 1 number in'
-MMR_PATTERN = r'^There (?:was|were) (?:\d+) numbers? in'
+# A link has a scheme, a location, and a path
+LINK_PATTERN = r'^[A-Za-z][A-Za-z0-9+.-]*://[^/?#\s]+/'
+LINK_SAMPLE_SIZE = 100
 
-# Combine for the problem pattern
-PROBLEM_PATTERN = '|'.join([NO_MATCH_PATTERN, ONESIES_PATTERN])
+TEMPLATE = None      # Compiled once and reused by long running processes
+STREAM_BUFFER = 256  # How many rendered pieces to write at a time
 
 
-def report(args, unreconciled, reconciled, explanations, column_types):
-    """Generate the report."""
+def report(args, unreconciled, reconciled, explanations, column_types,
+           writer=None):
+    """
+    Generate the report.
+
+    The report is rendered a piece at a time straight into the output file.
+    The detail data for each group is built as the template gets to it, so we
+    never hold all of the groups, or the whole page, in memory.
+    """
+    writer = writer if writer else Writer()
+
+    # The groups are generated in the reconciled data's order
+    unreconciled = unreconciled.sort_values(args.group_by, kind='mergesort')
+
     # Everything as strings
-    reconciled = reconciled.applymap(str)
-    unreconciled = unreconciled.applymap(str)
+    reconciled = reconciled.astype(str)
+    unreconciled = unreconciled.astype(str)
 
     # Convert links into anchor elements
-    reconciled = reconciled.applymap(create_link)
-    unreconciled = unreconciled.applymap(create_link)
+    reconciled = create_links(reconciled)
+    unreconciled = create_links(unreconciled)
 
     # Get the report template
-    env = Environment(loader=PackageLoader('reconcile', '.'))
-    template = env.get_template('lib/summary/template.html')
+    template = get_template()
 
-    # Create the group dataset
-    groups = get_groups(args, unreconciled, reconciled, explanations)
+    # The filters and data shards refer to groups by their sorted order
+    group_ids = sorted(str(k) for k in reconciled.index)
 
     # Create filter lists
-    filters = get_filters(args, groups, column_types)
+    filters = get_filters(args, group_ids, explanations, column_types)
 
     # Get transcriber summary data
     transcribers = user_summary(args, unreconciled)
 
-    # Build the summary report
-    summary = template.render(
-        args=vars(args),
-        header=header_data(args, unreconciled, reconciled, transcribers),
-        groups=groups,
-        filters=filters,
-        columns=util.sort_columns(args, unreconciled, column_types),
-        transcribers=transcribers,
-        reconciled=reconciled_summary(explanations, column_types),
-        problem_pattern=PROBLEM_PATTERN)
-
-    # Output the report
-    with open(args.summary, 'w', encoding='utf-8') as out_file:
-        out_file.write(summary)
-
-
-def get_groups(args, unreconciled, reconciled, explanations):
-    """Convert the dataframes into dictionaries."""
-    groups = {}
-
-    # Put reconciled data into the dictionary
-    for key, row in reconciled.iterrows():
-        groups[str(key)] = {'reconciled': row.to_dict()}
-
-    # Put explanations data into the dictionary
-    for key, row in explanations.iterrows():
-        groups[str(key)]['explanations'] = row.to_dict()
-
-    # Put unreconciled data into the dictionary
-    for _, row in unreconciled.iterrows():
-        key = str(row[args.group_by])
-        array = groups[key].get('unreconciled', [])
-        array.append(row.to_dict())
-        groups[key]['unreconciled'] = array
-
-    return groups
-
+    # Move the group dataset into data shards loaded by the page on demand
+    shards = {}
+    groups = get_groups(args, unreconciled, reconciled, explanations)
+    if args.summary_shard_size:
+        with profiler.stage('summary.shards'):
+            order = sorted(range(reconciled.shape[0]),
+                           key=lambda i: str(reconciled.index[i]))
+            shards = write_shards(
+                args,
+                get_groups(args, unreconciled, reconciled.iloc[order, :],
+                           explanations, sort=True),
+                writer)
+        groups = iter([])
 
-def get_filters(args, groups, column_types):
-    """Create list of group IDs that will be used to filter group rows."""
+    # Build the summary report
+    with profiler.stage('summary.render'):
+        stream = template.stream(
+            args=vars(args),
+            header=header_data(args, unreconciled, reconciled, transcribers),
+            group_ids=group_ids,
+            groups=groups_js(groups),
+            shards=shards,
+            filters=filters,
+            columns=util.sort_columns(args, unreconciled, column_types),
+            transcribers=transcribers,
+            reconciled=reconciled_summary(explanations, column_types),
+            problem_pattern=PROBLEM_PATTERN)
+        stream.enable_buffering(STREAM_BUFFER)
+
+        # Output the report
+        with writer.open(args.summary) as out_file:
+            stream.dump(out_file)
+
+
+def get_template():
+    """Load and compile the report template the first time it is used."""
+    global TEMPLATE  # pylint: disable=global-statement
+    if not TEMPLATE:
+        env = Environment(loader=PackageLoader('reconcile', '.'))
+        TEMPLATE = env.get_template('lib/summary/template.html')
+    return TEMPLATE
+
+
+def get_groups(args, unreconciled, reconciled, explanations, sort=False):
+    """
+    Generate the group ID and the dictionary of each group's data.
+
+    The groups come in the reconciled data's order and the unreconciled rows
+    must be in the same order. When sort is set they are sorted by the group
+    ID strings instead, which is the order of the data shards.
+    """
+    if sort:
+        unreconciled = unreconciled.sort_values(
+            args.group_by, kind='mergesort')
+    explanations = explanations.reindex(reconciled.index)
+
+    rec_columns = list(reconciled.columns)
+    exp_columns = list(explanations.columns)
+    unr_columns = list(unreconciled.columns)
+    position = unr_columns.index(args.group_by)
+
+    rows = groupby(unreconciled.itertuples(index=False, name=None),
+                   key=lambda r: r[position])
+    unr_key, unr_rows = next(rows, (None, []))
+
+    for rec, exp in zip(reconciled.itertuples(name=None),
+                        explanations.itertuples(index=False, name=None)):
+        key = str(rec[0])
+        group = {
+            'reconciled': dict(zip(rec_columns, rec[1:])),
+            'explanations': dict(zip(exp_columns, exp))}
+        if unr_key == key:
+            group['unreconciled'] = [dict(zip(unr_columns, r))
+                                     for r in unr_rows]
+            unr_key, unr_rows = next(rows, (None, []))
+        yield key, group
+
+
+def groups_js(groups):
+    """
+    Generate the text of the groups dictionary a group at a time.
+
+    This is the same text that str() would give us for the whole dictionary.
+    """
+    yield '{'
+    for i, (key, group) in enumerate(groups):
+        yield '{}{!r}: {!r}'.format(', ' if i else '', key, group)
+    yield '}'
+
+
+def shard_directory(args):
+    """Get the directory that holds the summary report's data shards."""
+    return splitext(args.summary)[0] + '_shards'
+
+
+def shard_files(args):
+    """Get the data shard files written for the summary report."""
+    if not args.summary or not args.summary_shard_size:
+        return []
+    return sorted(glob(join(shard_directory(args), 'shard-*.js')))
+
+
+def write_shards(args, groups, writer):
+    """
+    Write the group dataset as compressed data shards.
+
+    Each shard holds --summary-shard-size groups in the order of the "Show
+    All" filter. The shards are gzipped JSON wrapped in a script so that the
+    report can load them from the local file system as well as from a server.
+    The groups are (group ID, group) pairs sorted by the group ID.
+    """
+    shard_dir = shard_directory(args)
+    if not writer.zippy:  # Remove shards left over from an earlier report
+        for path in shard_files(args):
+            os.remove(path)
+
+    size = args.summary_shard_size
+    groups = iter(groups)
+    chunks = iter(lambda: dict(islice(groups, size)), {})
+    for shard, data in enumerate(chunks):
+        data = gzip_bytes(json.dumps(data).encode('utf-8'))
+        data = base64.b64encode(data).decode('ascii')
+        path = join(shard_dir, 'shard-{}.js'.format(shard))
+        with writer.open(path, base=args.summary) as out_file:
+            out_file.write('addShard({}, "{}");\n'.format(shard, data))
+
+    return {'dir': basename(shard_dir), 'size': size}
+
+
+def gzip_bytes(data):
+    """Gzip the data with a fixed time stamp, so reruns give the same shards."""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', mtime=0) as out_file:
+        out_file.write(data)
+    return buffer.getvalue()
+
+
+def get_filters(args, group_ids, explanations, column_types):
+    """
+    Create lists of group indexes that will be used to filter group rows.
+
+    The indexes point into the sorted list of group IDs.
+    """
     filters = {
         '__select__': ['Show All', 'Show All Problems'],
-        'Show All': groups.keys(),
+        'Show All': list(range(len(group_ids))),
         'Show All Problems': []}
 
     # Get the remaining filters. They are the columns in the explanations row.
-    group = next(iter(groups.values()))
-    columns = util.sort_columns(
-        args, group['explanations'].keys(), column_types)
-    filters['__select__'] += ['Show problems with: ' + c
-                              for c in columns
-                              if c in group['explanations'].keys()]
-    # Initialize the filters
-    for name in filters['__select__'][2:]:
-        filters[name] = []
-
-    # Get the problems for each group
-    all_problems = {}
-    for group_by, group in groups.items():
-        for column, value in group['explanations'].items():
-            if re.search(PROBLEM_PATTERN, value):
-                key = 'Show problems with: ' + column
-                all_problems[group_by] = 1
-                filters[key].append(group_by)
-
-    # Sort by the grouping column
-    filters['Show All Problems'] = all_problems.keys()
-    for name in filters['__select__']:
-        filters[name] = sorted(filters[name])
+    columns = util.sort_columns(args, explanations.columns, column_types)
+    columns = [c for c in columns if c in explanations.columns]
+    filters['__select__'] += ['Show problems with: ' + c for c in columns]
+
+    # Get the problems for each group. The indexes are in order
+    explanations = explanations.copy()
+    explanations.index = explanations.index.astype(str)
+    explanations = explanations.reindex(group_ids)
+    has_problem = pd.Series(False, index=explanations.index)
+    for column in columns:
+        is_problem = explanations[column].str.contains(PROBLEM_PATTERN)
+        filters['Show problems with: ' + column] = [
+            i for i, problem in enumerate(is_problem) if problem]
+        has_problem |= is_problem
+    filters['Show All Problems'] = [
+        i for i, problem in enumerate(has_problem) if problem]
 
     return filters
 
 
-def create_link(value):
-    """Convert a link into an anchor element."""
-    try:
-        url = urlparse(value)
-        if url.scheme and url.netloc and url.path:
-            return '<a href="{}" target="_blank">{}</a>'.format(
-                value, value)
-    except (ValueError, AttributeError):
-        pass
-    return value
+def create_links(df):
+    """Convert links into anchor elements in the columns that have them."""
+    for column in link_columns(df):
+        values = df[column]
+        is_link = values.str.contains(LINK_PATTERN)
+        df.loc[is_link, column] = (
+            '<a href="' + values[is_link] + '" target="_blank">'
+            + values[is_link] + '</a>')
+    return df
+
+
+def link_columns(df):
+    """
+    Find the columns with links.
+
+    We only look at a sample of each column's filled values. Links are found
+    in a few columns, like the subject image locations, and not scattered
+    across the free text.
+    """
+    columns = []
+    for column in df.columns:
+        values = df[column]
+        sample = values[values != ''].head(LINK_SAMPLE_SIZE)
+        if sample.str.contains(LINK_PATTERN).any():
+            columns.append(column)
+    return columns
 
 
 def user_summary(args, unreconciled):
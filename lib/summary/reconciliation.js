@@ -2,155 +2,278 @@ const None = null;  // Python vs Javascript. Only needed by the args variable so
 const args = {{args | safe}};
 const columns = {{columns | safe}};
 const filters = {{filters | safe}};
-const groups = {{groups | safe}};
+const groupIds = {{group_ids | safe}};
+const groups = {% for part in groups %}{{part | safe}}{% endfor %};
+const shards = {{shards | safe}};
 const is_problem = RegExp("{{problem_pattern}}", 'i');
 const tbody = document.querySelector('#groups tbody');
+const viewport = document.querySelector('#groups .viewport');
 
-// Save the group's open/close state so it will remain consistent between
-// Page and filter changes.
-const groupState = {};
-filters['Show All'].forEach(function(id) {
-  groupState[id] = 'closed';
-});
+// The filters hold indexes into the groupIds array and not the IDs themselves.
+// A group's open/close state is also kept by its index so it will remain
+// consistent between page and filter changes.
+const groupClosed = new Uint8Array(groupIds.length).fill(1);
 
-// Move the detail data into a form that we can use for displaying on the page.
-// We will feed it an array of objects, one for each table row. Within each row
-// we will have have an array of cells (td) and an object of row metadata. Each
-// cell (td) is an object with the content, class, title, etc.
-const rowData = function(page, filter) {
-  const rows = [];
-  const beg = (page - 1) * args.page_size;
-  const end = beg + args.page_size;
+// Only the rows in view are drawn. We keep a pool of table rows and reuse them
+// as the view scrolls or when the page and filter change. Spacer rows above and
+// below the drawn rows stand in for the rows that are not drawn. Long values
+// wrap, so each row's height is measured when it is drawn.
+const ROW_BUFFER = 10;    // Draw this many extra rows above & below the view
+const DEFAULT_ROWS = 50;  // Draw this many rows when the view has no height
+const rowPool = [];
+var pageRows = [];
+var measuredHeight = 0;   // The total height of the rows we have measured
+var measuredRows = 0;     // And how many rows that is
 
-  filters[filter].slice(beg, end).forEach(function(id, i) {
-    const subject = groups[id];
+const buildSpacer = function() {
+  const tr = document.createElement('tr');
+  tr.classList.add('spacer');
+  const td = document.createElement('td');
+  td.setAttribute('colspan', columns.length + 1);
+  tr.appendChild(td);
+  tbody.appendChild(tr);
+  return td;
+};
 
-    rows.push(buildReconciledRowData(subject['reconciled'], subject['explanations'], id));
+const topSpacer = buildSpacer();
+const bottomSpacer = buildSpacer();
 
-    rows.push(buildExplanationRowData(subject['explanations'], id));
+// When the detail data is in shards, we load them as they are needed. A group's
+// shard is found from its index.
+const shardState = {};
+var shardWaiting = [];
 
-    subject['unreconciled'].forEach(function(unreconciled) {
-      rows.push(buildUnreconciledRowData(unreconciled, id));
-    });
+// Each shard script calls this with its gzipped JSON data.
+const addShard = function(shard, payload) {
+  const bytes = Uint8Array.from(atob(payload), function(c) { return c.charCodeAt(0); });
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+  new Response(stream).json().then(function(data) {
+    Object.assign(groups, data);
+    shardState[shard] = 'loaded';
+    document.querySelector('#groups .shard-error').hidden = true;
+    const waiting = shardWaiting;
+    shardWaiting = [];
+    waiting.forEach(function(callback) { callback(); });
   });
-
-  return rows;
 };
 
-// Build the reconciled row. This is the first row in the group.
-const buildReconciledRowData = function(reconciled, explanations, groupBy) {
-  const tr = {
-    rowMetadata: { groupBy: groupBy, cls: 'reconciled' },
-    td: [  // Setup always filled row cells
-      { content: '<button data-group-by="' + groupBy + '" title="Open or close this subject"></button>' },
-      { content: groupBy }
-    ]
-  };
-  columns.forEach(function(col, i) {
-    if (col != args.group_by) {
-      tr.td.push({
-        content: reconciled[col] || '',
-        title: explanations[col],
-        cls: is_problem.test(explanations[col]) ? 'problem' : null
-      });
-    }
+// Make sure the groups are loaded and then call the callback.
+const loadGroups = function(indexes, callback) {
+  if (!shards.size) { callback(); return; }
+
+  const needed = {};
+  indexes.forEach(function(index) {
+    const shard = Math.floor(index / shards.size);
+    if (shardState[shard] !== 'loaded') { needed[shard] = 1; }
+  });
+
+  const missing = Object.keys(needed);
+  if (!missing.length) { callback(); return; }
+
+  shardWaiting.push(function() { loadGroups(indexes, callback); });
+
+  missing.forEach(function(shard) {
+    if (shardState[shard]) { return; }
+    shardState[shard] = 'loading';
+    const script = document.createElement('script');
+    script.src = shards.dir + '/shard-' + shard + '.js';
+    script.onerror = function() { shardFailed(shard, script); };
+    document.body.appendChild(script);
   });
-  return tr;
 };
 
-// Build the explanations row. This is the second row in the group.
-const buildExplanationRowData = function(explanations, groupBy) {
-  const tr = {
-    rowMetadata: { groupBy: groupBy, cls: 'explanations' },
-    td: [  // Setup always empty row cells
-      { content: '' },  // open/close row group button
-      { content: '' }   // group by cell (typically: subject_id)
-    ]
-  };
-  columns.forEach(function(col, i) {
-    if (col != args.group_by) {
-      tr.td.push({
-        content: explanations[col] || '',
-        cls: explanations[col] ? 'filled' : null
-      });
-    }
+// A shard did not load, maybe the shard directory is not next to the report.
+// Forget the shard so that it is tried again on the next page change, drop
+// the pages waiting on it, and tell the reader.
+const shardFailed = function(shard, script) {
+  delete shardState[shard];
+  shardWaiting = [];
+  const message = document.querySelector('#groups .shard-error');
+  message.textContent = 'Could not load the detail data from "' + script.src
+    + '". The "' + shards.dir + '" directory must be next to this report.';
+  message.hidden = false;
+};
+
+// Get the group indexes on a page of a filter.
+const pageIndexes = function(page, filter) {
+  const beg = (page - 1) * args.page_size;
+  const end = beg + args.page_size;
+  return filters[filter].slice(beg, end);
+};
+
+// List the rows on the page. Each group has a reconciled row and, when the
+// group is open, an explanations row and the unreconciled rows. We only keep
+// a reference to the data here, the cells are built when the row is drawn.
+const buildPageRows = function(indexes) {
+  const rows = [];
+  indexes.forEach(function(index) {
+    rows.push({ index: index, cls: 'reconciled' });
+    if (groupClosed[index]) { return; }
+    rows.push({ index: index, cls: 'explanations' });
+    groups[groupIds[index]]['unreconciled'].forEach(function(unreconciled) {
+      rows.push({ index: index, cls: 'unreconciled', data: unreconciled });
+    });
   });
-  return tr;
+  return rows;
+};
+
+const plainText = function(content) {
+  return content.replace(/<[^>]*>/g, '');
 };
 
-// Build the unreconciled rows. These are the third thru n rows in the group.
-const buildUnreconciledRowData = function(unreconciled, groupBy) {
-  tr = {
-    rowMetadata: { groupBy: groupBy, cls: 'unreconciled' },
-    td: [  // Setup always empty row cells
-      { content: '' },  // open/close row group button
-      { content: '' }   // group by cell (typically: subject_id)
-    ]
-  };
-  columns.forEach(function(col, i) {
-    if (col != args.group_by) {
-      tr.td.push({ content: unreconciled[col] || '' });
+// Fill in a cell. Only touch the DOM when something changed.
+const drawCell = function(td, content, cls, title) {
+  if (td.content !== content) {
+    td.innerHTML = content;
+    td.content = content;
+  }
+  cls = cls || '';
+  if (td.className !== cls) { td.className = cls; }
+  title = title || plainText(content);
+  if (title) {
+    td.setAttribute('title', title);
+  } else {
+    td.removeAttribute('title');
+  }
+};
+
+// The reconciled row is the first row in the group. The explanations row is
+// the second row, and the unreconciled rows are the third thru n rows.
+const drawRow = function(tr, row) {
+  const groupBy = groupIds[row.index];
+  const subject = groups[groupBy];
+  const reconciled = subject['reconciled'];
+  const explanations = subject['explanations'];
+  const cls = row.cls + (groupClosed[row.index] ? ' closed' : '');
+  const tds = tr.children;
+
+  if (tr.className !== cls) { tr.className = cls; }
+  tr.setAttribute('data-group-by', groupBy);
+
+  if (row.cls === 'reconciled') {
+    drawCell(tds[0], '<button data-index="' + row.index + '" title="Open or close this subject"></button>');
+    drawCell(tds[1], groupBy);
+  } else {
+    drawCell(tds[0], '');
+    drawCell(tds[1], '');
+  }
+
+  var i = 2;
+  columns.forEach(function(col) {
+    if (col == args.group_by) { return; }
+    const td = tds[i++];
+    if (row.cls === 'reconciled') {
+      drawCell(td, reconciled[col] || '', is_problem.test(explanations[col]) ? 'problem' : null, explanations[col]);
+    } else if (row.cls === 'explanations') {
+      drawCell(td, explanations[col] || '', explanations[col] ? 'filled' : null);
+    } else {
+      drawCell(td, row.data[col] || '');
     }
   });
+};
+
+// Get a row from the pool, growing it as needed. The pooled rows sit between
+// the spacers.
+const pooledRow = function(i) {
+  if (i < rowPool.length) { return rowPool[i]; }
+  const tr = document.createElement('tr');
+  for (var j = 0; j <= columns.length; j++) {
+    tr.appendChild(document.createElement('td'));
+  }
+  tbody.insertBefore(tr, bottomSpacer.parentElement);
+  rowPool.push(tr);
   return tr;
 };
 
-// Given a list of rows (formatted by rowData) build a page of transcriptions reconciliation
-const buildPage = function(rows) {
+// The height of the rows from beg up to end. Rows that have not been drawn
+// get the average height.
+const heightOfRows = function(beg, end, average) {
+  var height = 0;
+  for (var i = beg; i < end; i++) { height += pageRows[i].height || average; }
+  return height;
+};
+
+// Draw the rows that are in view.
+const drawWindow = function() {
+  const height = viewport.clientHeight;
+  const average = measuredRows ? measuredHeight / measuredRows : 0;
+  const inView = height && average ? Math.ceil(height / average) : DEFAULT_ROWS;
 
-  // Remove old rows
-  while (tbody.firstChild) {
-    tbody.removeChild(tbody.firstChild);
+  // Find the first row in view
+  var first = 0;
+  var top = 0;
+  while (average && first < pageRows.length
+         && top + (pageRows[first].height || average) <= viewport.scrollTop) {
+    top += pageRows[first].height || average;
+    first++;
   }
+  first = Math.max(0, Math.min(first - ROW_BUFFER, pageRows.length - inView - ROW_BUFFER));
+  const last = Math.min(pageRows.length, first + inView + 2 * ROW_BUFFER);
 
-  // Add new rows
-  rows.forEach(function(row, i) {
-
-    // Build the table's rows
-    const tr = document.createElement('tr');
-    const id = row.rowMetadata.groupBy;
-    tr.classList.add(row.rowMetadata.cls);
-    if (groupState[id]) { tr.classList.add(groupState[id]); }
-    tr.setAttribute('data-group-by', id);
-
-    // Build the row's cells
-    row.td.forEach(function(cell) {
-      const td = document.createElement('td');
-      if (cell.cls) { td.classList.add(cell.cls); }
-      if (cell.title) { td.setAttribute('title', cell.title); }
-      td.innerHTML = cell.content;
-      tr.appendChild(td);
-    });
+  for (var i = first; i < last; i++) {
+    const tr = pooledRow(i - first);
+    tr.classList.remove('hide');
+    drawRow(tr, pageRows[i]);
+  }
+  for (var j = last - first; j < rowPool.length; j++) {
+    rowPool[j].classList.add('hide');
+  }
 
-    tbody.appendChild(tr);
+  // Measure the rows that were drawn
+  for (var k = first; k < last; k++) {
+    const row = pageRows[k];
+    const rowHeight = rowPool[k - first].offsetHeight || 0;
+    if (row.height) {
+      measuredHeight -= row.height;
+      measuredRows--;
+    }
+    if (rowHeight) {
+      row.height = rowHeight;
+      measuredHeight += rowHeight;
+      measuredRows++;
+    }
+  }
+
+  const measured = measuredRows ? measuredHeight / measuredRows : 0;
+  topSpacer.style.height = heightOfRows(0, first, measured) + 'px';
+  bottomSpacer.style.height = heightOfRows(last, pageRows.length, measured) + 'px';
+};
+
+var drawPending = false;
+
+const scrollWindow = function() {
+  if (drawPending) { return; }
+  drawPending = true;
+  requestAnimationFrame(function() {
+    drawPending = false;
+    drawWindow();
   });
-}
+};
+
+var pageIndexesShown = [];
+
+const showPage = function(indexes) {
+  pageIndexesShown = indexes;
+  pageRows = buildPageRows(indexes);
+  drawWindow();
+};
 
 // Toggle a group of rows open/closed. That is we will show/hide all records
 // for a group. Closing them leaves only the first record (the reconciled one)
 // visible.
 const toggleClosed = function(event) {
   if (! event.target.matches('button')) { return; }
-  const groupBy = event.target.dataset.groupBy;
-  const selector = '#groups tbody tr[data-group-by="' + groupBy + '"]';
-  const trs = document.querySelectorAll(selector);
-  trs.forEach(function(r) { r.classList.toggle('closed'); });
-  const isClosed = event.target.parentElement.parentElement.classList.contains('closed');
-  groupState[groupBy] = isClosed ? 'closed' : '';
+  const index = +event.target.dataset.index;
+  groupClosed[index] = groupClosed[index] ? 0 : 1;
+  showPage(pageIndexesShown);
 }
 
 // Like the toggleClosed function (above) but it's for all groups of records.
 const toggleAllClosed = function(event) {
   const header = document.querySelector('#groups thead tr');
-  const cls = header.classList.contains('closed') ? '' : 'closed';
-  const trs = document.querySelectorAll('#groups tbody tr');
   header.classList.toggle('closed');
-  if (cls) {
-    trs.forEach(function(r) { r.classList.add('closed'); });
-  } else {
-    trs.forEach(function(r) { r.classList.remove('closed'); });
-  }
-  filters['Show All'].forEach(function(id) { groupState[id] = cls; });
+  groupClosed.fill(header.classList.contains('closed') ? 1 : 0);
+  showPage(pageIndexesShown);
 }
 
 var maxPage = 0;
@@ -162,8 +285,14 @@ const changePage = function() {
   page = page < 1 ? 1 : page;
   page = page > maxPage ? maxPage : page;
   pager.value = page;
-  const data = rowData(page, filter);
-  buildPage(data);
+  const indexes = pageIndexes(page, filter);
+  loadGroups(indexes, function() {
+    // Skip stale pages when the page or filter changed while loading
+    if (+pager.value !== page) { return; }
+    if (document.querySelector('#groups .filter').value !== filter) { return; }
+    viewport.scrollTop = 0;
+    showPage(indexes);
+  });
 }
 
 const filterChange = function() {
@@ -175,6 +304,7 @@ const filterChange = function() {
 }
 
 tbody.addEventListener('click', toggleClosed);
+viewport.addEventListener('scroll', scrollWindow);
 document.querySelector('#groups .pager').addEventListener('change', changePage);
 document.querySelector('#groups .filter').addEventListener('change', filterChange);
 document.querySelector('#groups thead button').addEventListener('click', toggleAllClosed);
@@ -1,26 +1,94 @@
 """Common utilities."""
 
 import sys
-from importlib.machinery import SourceFileLoader
+from collections import OrderedDict
+from collections.abc import Mapping
+from importlib import import_module
 from glob import glob
-from os.path import join, dirname, splitext, basename
+from os.path import join, dirname, splitext, basename, abspath, getmtime
+
+CSV_CACHE_SIZE = 2  # How many parsed input files to keep when caching
+CHUNK_ROWS = 50000  # How many rows the chunked readers read at a time
+
+
+class Plugins(Mapping):
+    """
+    The plug-ins in a directory.
+
+    We find the plug-ins by their file names but only import one when it is
+    first used. So a run only pays for the plug-ins, and their dependencies,
+    that it needs.
+    """
+
+    def __init__(self, subdir):
+        """Find the plug-ins."""
+        pattern = join(dirname(__file__), subdir, '*.py')
+        self.subdir = subdir
+        self.names = sorted(splitext(basename(p))[0] for p in glob(pattern)
+                            if p.find('__init__') < 0)
+
+    def __getitem__(self, name):
+        """Import the plug-in."""
+        if name not in self.names:
+            raise KeyError(name)
+        return import_module('lib.{}.{}'.format(self.subdir, name))
+
+    def __iter__(self):
+        """Iterate thru the plug-in names."""
+        return iter(self.names)
+
+    def __len__(self):
+        """Get the plug-in count."""
+        return len(self.names)
+
+
+class LazyModule:
+    """Import a module when one of its attributes is first used."""
+
+    def __init__(self, name):
+        """Remember the module name."""
+        self.name = name
+
+    def __getattr__(self, attr):
+        """Import the module and get the attribute."""
+        return getattr(import_module(self.name), attr)
 
 
 def get_plugins(subdir):
     """Get the plug-ins from the reconcilers directory."""
-    pattern = join(dirname(__file__), subdir, '*.py')
+    return Plugins(subdir)
 
-    plugins = {}
 
-    for path in glob(pattern):
-        if path.find('__init__') > -1:
-            continue
-        name = splitext(basename(path))[0]
-        module_name = 'lib.{}.{}'.format(subdir, name)
-        module = SourceFileLoader(module_name, path).load_module()
-        plugins[name] = module
+def lazy_import(name):
+    """Defer importing a module until it is used."""
+    return LazyModule(name)
+
 
-    return plugins
+pd = lazy_import('pandas')  # pylint: disable=invalid-name
+CSV_CACHE = None  # Batch runs set this to an OrderedDict to reuse inputs
+
+
+def read_csv(path, **kwargs):
+    """
+    Read a CSV file into a data-frame.
+
+    When caching is on we keep the last few parsed files, so jobs that read
+    the same export do not parse it again. Callers must not change the
+    returned data-frame in place. Chunked reads are never cached.
+    """
+    if CSV_CACHE is None or kwargs.get('chunksize'):
+        return pd.read_csv(path, **kwargs)
+
+    key = (abspath(path), getmtime(path), repr(sorted(kwargs.items())))
+    if key in CSV_CACHE:
+        CSV_CACHE.move_to_end(key)
+        return CSV_CACHE[key]
+
+    df = pd.read_csv(path, **kwargs)
+    CSV_CACHE[key] = df
+    while len(CSV_CACHE) > CSV_CACHE_SIZE:
+        CSV_CACHE.popitem(last=False)
+    return df
 
 
 def unreconciled_setup(args, unreconciled):
@@ -34,6 +102,154 @@ def unreconciled_setup(args, unreconciled):
     return unreconciled
 
 
+def unreconciled_chunks(args, chunks):
+    """
+    Put the chunks of unreconciled data together as they are read.
+
+    This does what unreconciled_setup() does but when the chunks arrive in
+    group-by and key column order we skip the sort of the whole data-frame.
+    All of the chunks are held until the end, so this does not save memory.
+    Use group_chunks() to handle the rows a few subjects at a time.
+    """
+    frames = []
+    ordered = True
+    last = None
+    for chunk in numbered(chunks):
+        if ordered:
+            ordered, last = chunk_is_ordered(args, chunk, last)
+        frames.append(chunk)
+
+    if not frames:
+        return pd.DataFrame()
+
+    unreconciled = concat_chunks(frames)
+
+    if not ordered:
+        return unreconciled_setup(args, unreconciled)
+    return unreconciled
+
+
+def concat_chunks(frames, columns=None):
+    """
+    Put chunks together, keeping the columns in the order first seen.
+
+    Categorical columns, from --compact, stay categorical. We give them the
+    categories of all of the chunks first, changing the chunks in place.
+    """
+    columns = list(columns) if columns else []
+    for frame in frames:
+        columns += [c for c in frame.columns if c not in columns]
+
+    for column in columns:
+        categories = OrderedDict([('', None)])
+        for frame in frames:
+            if (column in frame.columns and
+                    pd.api.types.is_categorical_dtype(frame[column])):
+                categories.update(
+                    (c, None) for c in frame[column].cat.categories)
+        if len(categories) == 1:
+            continue
+        for frame in frames:
+            if column not in frame.columns:
+                frame[column] = ''
+            frame[column] = pd.Categorical(
+                frame[column], categories=list(categories))
+
+    return pd.concat(frames).reindex(columns=columns).fillna('')
+
+
+def group_chunks(args, chunks):
+    """
+    Turn the chunks of unreconciled data into data-frames of whole groups.
+
+    A group's rows may go on into the next chunk, so the last group of each
+    chunk is held back until the next chunk is read. This only works when
+    the rows are in group-by and key column order. When they are not we put
+    the rest of the chunks together and sort them like unreconciled_setup()
+    does. We raise ReadAgain if that would split up a group that we
+    already gave out. The rows keep their positions in the file as the index.
+    """
+    chunks = numbered(chunks)
+    columns = []
+    held = None
+    given = None  # The last group that we gave out
+    last = None
+    for chunk in chunks:
+        columns += [c for c in chunk.columns if c not in columns]
+
+        ordered, last = chunk_is_ordered(args, chunk, last)
+        if not ordered:
+            rest = [held, chunk] if held is not None else [chunk]
+            rest = unreconciled_setup(
+                args, concat_chunks(rest + list(chunks), columns=columns))
+            if given is not None and not rest.empty:
+                check_after(args, rest, given)
+            yield rest
+            return
+
+        if chunk.empty:
+            continue
+        if held is not None:
+            chunk = concat_chunks([held, chunk], columns=columns)
+
+        in_last = chunk[args.group_by] == chunk[args.group_by].iat[-1]
+        held = chunk.loc[in_last, :]
+        if not in_last.all():
+            given = chunk.loc[~in_last, args.group_by].iat[-1]
+            yield chunk.loc[~in_last, :].reindex(columns=columns).fillna('')
+
+    if held is not None:
+        yield held.reindex(columns=columns).fillna('')
+
+
+def numbered(chunks):
+    """Blank fill the chunks and number their rows from the start of file."""
+    start = 0
+    for chunk in chunks:
+        chunk = chunk.fillna('')
+        chunk.index = pd.RangeIndex(start, start + chunk.shape[0])
+        start += chunk.shape[0]
+        yield chunk
+
+
+def check_after(args, rest, given):
+    """Make sure that the rest of the groups come after the given ones."""
+    first = rest[args.group_by].iat[0]
+    try:
+        after = first > given
+    except TypeError:  # Mixed types
+        after = False
+    if not after:
+        raise ReadAgain(
+            'The rows for {} {} are not together'.format(
+                args.group_by, first))
+
+
+class ReadAgain(Exception):
+    """The input can not be handled in batches and must be read whole."""
+
+
+def chunk_is_ordered(args, chunk, last):
+    """
+    Is the chunk sorted by the group-by and key columns.
+
+    The chunk must also follow the last row of the previous chunk. We return
+    the result and the last row's sort key.
+    """
+    if chunk.empty:
+        return True, last
+    sort_by = [args.group_by, args.key_column]
+    if any(c not in chunk.columns for c in sort_by):
+        return False, last
+    keys = pd.MultiIndex.from_arrays([chunk[c] for c in sort_by])
+    try:
+        ordered = keys.is_monotonic_increasing and (
+            last is None or last <= keys[0])
+    except TypeError:  # Mixed types
+        return False, last
+    return ordered, keys[-1]
+
+
 def sort_columns(args, all_columns, column_types):
     """Put columns into an order useful for displaying."""
     columns = [args.group_by, args.key_column]
@@ -0,0 +1,200 @@
+"""Open output files on disk or as members of the zip archive.
+
+When we are zipping the output we stream it straight into the archive, so
+nothing is written uncompressed. With the parallel option the compression and
+archive writes happen in a separate thread while we keep formatting the output.
+"""
+
+import io
+import os
+import time
+import zlib
+import queue
+import zipfile
+import tempfile
+import threading
+from functools import partial
+from contextlib import contextmanager
+from os.path import basename, dirname, relpath
+
+CHUNK_SIZE = 1024 * 1024       # Hand this many bytes to the compression thread
+QUEUE_SIZE = 8                 # The most chunks waiting to be compressed
+SPOOL_SIZE = 64 * 1024 * 1024  # Keep deflated members in memory up to this
+SPOOL_LEVEL = 1                # The spool is inflated again so deflate fast
+
+
+class Writer:
+    """Open output files on disk or in the zip archive."""
+
+    def __init__(self, zip_file=None, parallel=False):
+        """Open the zip archive if there is one."""
+        self.parallel = parallel
+        self.zippy = None
+        if zip_file:
+            self.zippy = zipfile.ZipFile(
+                zip_file, mode='w', compression=zipfile.ZIP_DEFLATED,
+                allowZip64=True)
+
+    def __enter__(self):
+        """Use the writer as a context manager."""
+        return self
+
+    def __exit__(self, *exc):
+        """Close the zip archive."""
+        self.close()
+
+    def close(self):
+        """Close the zip archive."""
+        if self.zippy:
+            self.zippy.close()
+            self.zippy = None
+
+    @contextmanager
+    def open(self, path, base=None, binary=False):
+        """
+        Open a text, or binary, output file.
+
+        In the zip archive the member is named after the file. It is relative
+        to the directory of the base file when the output is part of a set of
+        files, like the summary report's data shards.
+        """
+        if not self.zippy:
+            if dirname(path):
+                os.makedirs(dirname(path), exist_ok=True)
+            if binary:
+                with open(path, 'wb') as out_file:
+                    yield out_file
+            else:
+                with open(path, 'w', encoding='utf-8', newline='') as out_file:
+                    yield out_file
+            return
+
+        member = self.zippy.open(
+            member_info(path, base), mode='w', force_zip64=True)
+        if self.parallel:
+            member = io.BufferedWriter(
+                ThreadedMember(member), buffer_size=CHUNK_SIZE)
+        if binary:
+            with member as out_file:
+                yield out_file
+        else:
+            with io.TextIOWrapper(
+                    member, encoding='utf-8', newline='') as out_file:
+                yield out_file
+
+    def splice(self, path, member, base=None):
+        """
+        Add a member that was deflated ahead of time to the zip archive.
+
+        The spooled data is inflated as it is written into the archive
+        member, which deflates it again.
+        """
+        with self.open(path, base=base, binary=True) as out_file:
+            member.copy(out_file)
+
+
+def member_info(path, base=None):
+    """Describe a deflated member of the zip archive."""
+    info = zipfile.ZipInfo(
+        relpath(path, dirname(base)) if base else basename(path),
+        date_time=time.localtime()[:6])
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.external_attr = 0o644 << 16
+    return info
+
+
+class DeflatedMember(io.RawIOBase):
+    """
+    Deflate a member's bytes into a temporary file.
+
+    This lets several members be written at the same time, outside of the
+    archive, without holding them uncompressed. They are copied into it one
+    after another.
+    """
+
+    def __init__(self, max_size=SPOOL_SIZE):
+        """Start with nothing written."""
+        super().__init__()
+        self.compressed = tempfile.SpooledTemporaryFile(max_size=max_size)
+        self.compressor = zlib.compressobj(SPOOL_LEVEL)
+        self.size = 0
+        self.compress_size = 0
+
+    def writable(self):
+        """We only write."""
+        return True
+
+    def write(self, data):
+        """Compress the bytes."""
+        self.size += len(data)
+        self._store(self.compressor.compress(data))
+        return len(data)
+
+    def close(self):
+        """Finish the compressed data. The temporary file stays open."""
+        if not self.closed:
+            self._store(self.compressor.flush())
+        super().close()
+
+    def copy(self, out_file):
+        """Copy the inflated data."""
+        self.compressed.seek(0)
+        decompressor = zlib.decompressobj()
+        for chunk in iter(partial(self.compressed.read, CHUNK_SIZE), b''):
+            out_file.write(decompressor.decompress(chunk))
+        out_file.write(decompressor.flush())
+
+    def discard(self):
+        """Remove the temporary file."""
+        self.close()
+        self.compressed.close()
+
+    def _store(self, data):
+        self.compress_size += len(data)
+        self.compressed.write(data)
+
+
+class ThreadedMember(io.RawIOBase):
+    """Hand bytes off to a thread that writes them to the archive member."""
+
+    def __init__(self, member):
+        """Start the thread."""
+        super().__init__()
+        self.member = member
+        self.error = None
+        self.chunks = queue.Queue(maxsize=QUEUE_SIZE)
+        self.thread = threading.Thread(target=self._drain)
+        self.thread.start()
+
+    def writable(self):
+        """We only write."""
+        return True
+
+    def write(self, data):
+        """Queue a chunk for the thread."""
+        if self.error:
+            raise self.error
+        self.chunks.put(bytes(data))
+        return len(data)
+
+    def close(self):
+        """Wait for the thread to finish the member."""
+        if not self.closed:
+            self.chunks.put(None)
+            self.thread.join()
+        super().close()
+        if self.error:
+            raise self.error
+
+    def _drain(self):
+        try:
+            while True:
+                chunk = self.chunks.get()
+                if chunk is None:
+                    break
+                self.member.write(chunk)
+            self.member.close()
+        except Exception as error:  # pylint: disable=broad-except
+            self.error = error
+            while self.chunks.get() is not None:  # Unblock the writer
+                pass
@@ -1,13 +1,67 @@
-"""Split the CSV file based upon the given column and regular expression."""
+"""Split the CSV file based upon the given column and regular expressions.
+
+Every split is written in one pass over the input. The input is read in
+chunks and each chunk's matching rows are appended to a temporary file for
+each split. We note which columns have values as we go. Then each split, which
+is much smaller than the input, is sorted and written without its empty
+columns.
+"""
 
 # pylint: disable=invalid-name
 
 
 import os
 import argparse
+import tempfile
 import textwrap
+from os.path import abspath, dirname
 import pandas as pd
 
+CHUNK_ROWS = 100000  # How many input rows to read at a time
+
+
+class Split:
+    """The rows of the input that match a pattern."""
+
+    def __init__(self, output_prefix, pattern=None):
+        """Start the split's temporary file."""
+        self.output_prefix = output_prefix
+        self.pattern = pattern
+        self.rows = 0
+        self.filled = set()  # Columns with at least one value
+        handle, self.temp_name = tempfile.mkstemp(
+            suffix='.csv', dir=dirname(abspath(output_prefix)))
+        os.close(handle)
+
+    def add(self, chunk, column):
+        """Append the chunk's matching rows to the temporary file."""
+        if self.pattern:
+            chunk = chunk.loc[
+                chunk[column].str.contains(self.pattern, regex=True), :]
+        if chunk.empty:
+            return
+
+        chunk.to_csv(self.temp_name, mode='a', index=False,
+                     header=not self.rows)
+        self.rows += chunk.shape[0]
+        self.filled.update(chunk.columns[(chunk != '').any()])
+
+    def write(self, args, columns):
+        """Sort the split and write it without its empty columns."""
+        if self.rows:
+            df = pd.read_csv(
+                self.temp_name, low_memory=False, dtype=str).fillna('')
+            df = (df.loc[:, [c for c in columns if c in self.filled]]
+                    .sort_values([args.group_by, args.key_column]))
+        else:
+            df = pd.DataFrame(columns=columns)
+        os.remove(self.temp_name)
+
+        csv_name = self.output_prefix + '.csv'
+        df.to_csv(csv_name, index=False)
+
+        return df
+
 
 def parse_command_line():
     """Get user input."""
@@ -16,17 +70,22 @@ def parse_command_line():
         fromfile_prefix_chars='@',
         description=textwrap.dedent("""
             Split the CSV file based upon the given column and regular
-            expression."""))
+            expressions. Give an --output-prefix for each --pattern and all
+            of the splits are written in one pass over the input."""))
 
     parser.add_argument('-i', '--input-file', required=True,
                         help="""The input file.""")
 
     parser.add_argument('-o', '--output-prefix', required=True,
-                        help="""The output files' prefix.""")
+                        action='append',
+                        help="""The output files' prefix. Give one for each
+                            --pattern in the same order. You may use this
+                            multiple times.""")
 
-    parser.add_argument('-p', '--pattern',
+    parser.add_argument('-p', '--pattern', action='append',
                         help="""What are we looking for inclusion in the column
-                            to include in the new CSV file.""")
+                            to include in the new CSV file. You may use this
+                            multiple times.""")
 
     parser.add_argument('-c', '--column', default='dynamicProperties',
                         help="""Which column has the key value to split
@@ -41,48 +100,55 @@ def parse_command_line():
                             (Default=classificationID).""")
 
     args = parser.parse_args()
-    return args
-
-
-def process_csv(args):
-    """Get the data from the input CSV."""
-    df = pd.read_csv(args.input_file, low_memory=False, dtype=str).fillna('')
-
-    if args.pattern:
-        df = df.loc[df[args.column].str.contains(args.pattern, regex=True), :]
 
-    empty_columns = []
-    for column in df.columns:
-        values = df[column].unique()
-        if len(values) == 1 and not values[0]:
-            empty_columns.append(column)
+    patterns = args.pattern if args.pattern else [None]
+    if len(patterns) != len(args.output_prefix):
+        parser.error('Give one --output-prefix for each --pattern.')
 
-    df = (df.drop(empty_columns, axis=1)
-            .sort_values([args.group_by, args.key_column])
-
-    csv_name = args.output_prefix + '.csv'
-    df.to_csv(csv_name, index=False)
-
-    return df
+    return args
 
 
-def write_args(args, df):
+def process_csv(args):
+    """Split the data from the input CSV in one pass."""
+    patterns = args.pattern if args.pattern else [None]
+    splits = [Split(prefix, pattern)
+              for prefix, pattern in zip(args.output_prefix, patterns)]
+
+    columns = []
+    try:
+        chunks = pd.read_csv(args.input_file, low_memory=False, dtype=str,
+                             chunksize=CHUNK_ROWS)
+        for chunk in chunks:
+            chunk = chunk.fillna('')
+            columns = list(chunk.columns)
+            for split in splits:
+                split.add(chunk, args.column)
+
+        for split in splits:
+            df = split.write(args, columns)
+            write_args(args, split.output_prefix, df)
+    finally:
+        for split in splits:
+            if os.path.exists(split.temp_name):
+                os.remove(split.temp_name)
+
+
+def write_args(args, output_prefix, df):
     """Output an arguments file for reconcile.py."""
-    args_name = args.output_prefix + '_args.txt'
+    args_name = output_prefix + '_args.txt'
 
     with open(args_name, 'w') as args_file:
-        args_file.write('--title={}\n'.format(
-            args.output_prefix.split(os.sep)[-1]))
+        args_file.write('--title={}\n'.format(output_prefix.split(os.sep)[-1]))
         args_file.write('--format=csv\n')
         args_file.write('--group-by={}\n'.format(args.group_by))
         args_file.write('--key-column={}\n'.format(args.key_column))
         args_file.write('--unreconciled={}\n'.format(
-            args.output_prefix + '_unreconciled.csv'))
+            output_prefix + '_unreconciled.csv'))
         args_file.write('--reconciled={}\n'.format(
-            args.output_prefix + '_reconciled.csv'))
+            output_prefix + '_reconciled.csv'))
         args_file.write('--summary={}\n'.format(
-            args.output_prefix + '_summary.html'))
-        args_file.write('--zip={}\n'.format(args.output_prefix + '.zip'))
+            output_prefix + '_summary.html'))
+        args_file.write('--zip={}\n'.format(output_prefix + '.zip'))
         skip_columns = [args.group_by, args.key_column]
         for column in [c for c in df.columns if c not in skip_columns]:
             args_file.write('--column-types={}:text\n'.format(column))
@@ -91,8 +157,7 @@ def write_args(args, df):
 def main():
     """Main function."""
     args = parse_command_line()
-    df = process_csv(args)
-    write_args(args, df)
+    process_csv(args)
 
 
 if __name__ == "__main__":
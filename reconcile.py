@@ -1,21 +1,33 @@
 """The main program."""
 
-import os
-from os.path import basename
 import sys
-import zipfile
+import json
 import argparse
 import textwrap
 import lib.util as util
-import lib.reconciler as reconciler
-import lib.summary as summary
-import lib.merged as merged
+import lib.profiler as profiler
+from lib.writer import Writer
+from lib.pipeline import Pipeline, WORKERS
+
+# These pull in pandas, jinja2, pyarrow, etc. so we import them when they are
+# first used. Then --help or a simple export starts quickly.
+summary = util.lazy_import('lib.summary')
+merged = util.lazy_import('lib.merged')
+artifact = util.lazy_import('lib.artifact')
+columnar = util.lazy_import('lib.columnar')
+compact = util.lazy_import('lib.compact')
+subject_data = util.lazy_import('lib.subject_data')
+shard = util.lazy_import('lib.shard')
+checkpoint = util.lazy_import('lib.checkpoint')
+sample = util.lazy_import('lib.sample')
+sqlite = util.lazy_import('lib.sqlite')
+stream = util.lazy_import('lib.stream')
 
 VERSION = '0.4.4'
 
 
-def parse_command_line():
-    """Get user input."""
+def parse_command_line(argv=None):
+    """Get user input. Use the given argument list instead of sys.argv."""
     parser = argparse.ArgumentParser(
         formatter_class=argparse.RawDescriptionHelpFormatter,
         fromfile_prefix_chars='@',
@@ -39,12 +51,16 @@ def parse_command_line():
                         help="""The input file.""")
 
     parser.add_argument('-f', '--format',
-                        choices=['nfn', 'csv', 'json'], default='nfn',
+                        choices=['nfn', 'csv', 'json', 'jsonl', 'parquet',
+                                 'feather'],
+                        default='nfn',
                         help="""The unreconciled data is in what type of file?
                              nfn=A Zooniverse classification data dump.
-                             csv=A flat CSV file. json=A JSON file. The
-                             default is "nfn". When the format is "csv" or
-                             "json" we require the --column-types. If the
+                             csv=A flat CSV file. json=A JSON file.
+                             jsonl=A JSON Lines file, one record per line.
+                             parquet=A Parquet file. feather=A Feather (Arrow)
+                             file. The default is "nfn". When the format is
+                             not "nfn" we require the --column-types. If the
                              type is "nfn" we can guess the --column-types
                              but the --column-types option will still override
                              our guesses.""")
@@ -91,9 +107,40 @@ def parse_command_line():
                         help="""Write the merged reconciled data, explanations,
                             and unreconciled data to this CSV file.""")
 
+    parser.add_argument('--sqlite', metavar='FILE',
+                        help="""Write the unreconciled, reconciled, and
+                            explanations data to this SQLite database. It also
+                            has how each cell was reconciled in the "outcomes"
+                            table. The tables are indexed for queries by
+                            subject, field, user, and outcome.""")
+
+    parser.add_argument('--save-artifact',
+                        help="""Save the unreconciled, reconciled, and
+                            explanations data with the column types to this
+                            file. Use it with --from-artifact to rebuild the
+                            outputs later without reconciling again.""")
+
+    parser.add_argument('--from-artifact', action='store_true',
+                        help="""The INPUT-FILE is an artifact saved with
+                            --save-artifact. Build the outputs from it without
+                            reading or reconciling the original input.""")
+
+    parser.add_argument('--output-format', default='csv',
+                        choices=['csv', 'parquet', 'feather'],
+                        help="""Write the unreconciled, reconciled, and merged
+                            files in this format. csv=A flat CSV file.
+                            parquet=A Parquet file. feather=A Feather (Arrow)
+                            file. The columnar formats keep the column types.
+                            The default is "csv".""")
+
     parser.add_argument('-z', '--zip',
                         help="""Zip files and put them into this archive.
-                            Remove the uncompressed files afterwards.""")
+                            The files are written straight into the archive
+                            and not to disk.""")
+
+    parser.add_argument('--zip-parallel', action='store_true',
+                        help="""Compress the zipped files in a separate thread
+                            while the next part of the file is being built.""")
 
     parser.add_argument('-w', '--workflow-id', type=int,
                         help="""The workflow to extract. Required if there is
@@ -124,6 +171,14 @@ def parse_command_line():
                         help="""Page size for the summary report's detail
                             section (Default=20).""")
 
+    parser.add_argument('--summary-shard-size', default=0, type=int,
+                        help="""Write the summary report's detail data as
+                            compressed data shards of this many subjects
+                            each. The shards are put into a directory next to
+                            the summary file and loaded by the report page on
+                            demand. Use this for large workflows. The default
+                            (0) writes everything into the summary file.""")
+
     parser.add_argument('--fuzzy-ratio-threshold', default=90, type=int,
                         help="""Sets the cutoff for fuzzy ratio matching
                             (0-100, default=90).
@@ -134,10 +189,91 @@ def parse_command_line():
                             default=50).
                             See https://github.com/seatgeek/fuzzywuzzy.""")
 
+    parser.add_argument('--shard', metavar='I/N',
+                        help="""Only reconcile the subjects in shard I of N
+                            (1 <= I <= N). A subject's shard is given by the
+                            hash of its --group-by value. Save each shard with
+                            --save-artifact and put them back together with
+                            combine.py.""")
+
+    parser.add_argument('--subjects', action='append', metavar='IDS',
+                        help="""Only read and reconcile these subjects. This
+                            is a comma separated list of --group-by values.
+                            The rows are found with an index of the input
+                            file that is saved next to it, as
+                            <INPUT-FILE>.subjects.npz, and rebuilt when the
+                            input changes. You may use this multiple times.
+                            This is only used for the nfn and csv
+                            formats.""")
+
+    parser.add_argument('--sample', type=int, metavar='N',
+                        help="""Preview the run with N randomly picked
+                            subjects. All of the outputs are written for just
+                            those subjects and we print how each column was
+                            reconciled and an estimate of the full run's
+                            time.""")
+
+    parser.add_argument('--sample-seed', type=int, default=0,
+                        help="""The random seed for --sample. The same seed
+                            picks the same subjects (Default=0).""")
+
+    parser.add_argument('--check-subjects', action='store_true',
+                        help="""Check that every classification of a subject
+                            has the same subject data. Values that differ are
+                            left blank in the outputs. Without this we use the
+                            subject data from each subject's first
+                            classification. This is only used for nfn
+                            formats.""")
+
+    parser.add_argument('--compact', action='store_true',
+                        help="""Save memory by storing columns with few
+                            distinct values as categories and the other text
+                            columns as Arrow strings, when they are
+                            available. CSV and JSON Lines chunks, and --stream
+                            batches, are stored this way as they are read.
+                            The --profile report has the memory used before
+                            and after and the peak memory after each
+                            stage.""")
+
+    parser.add_argument('--pipeline', action='store_true',
+                        help="""Write the unreconciled file while the data is
+                            reconciled and build the reconciled, summary, and
+                            merged outputs at the same time. The outputs are
+                            the same as without it.""")
+
+    parser.add_argument('--stream', action='store_true',
+                        help="""Reconcile batches of subjects in worker
+                            processes while the rest of the input is still
+                            being read. The outputs are the same as without
+                            it.""")
+
+    parser.add_argument('--work-dir',
+                        help="""Save checkpoints into this directory as the
+                            run goes: the input after it is read and the
+                            reconciled data for each batch of subjects. It
+                            also turns on --progress.""")
+
+    parser.add_argument('--resume', action='store_true',
+                        help="""Skip the work that an earlier run saved in the
+                            --work-dir. The checkpoints are only used if the
+                            input file and the arguments that change the
+                            results are the same.""")
+
+    parser.add_argument('--progress', action='store_true',
+                        help="""Report how many subjects have been reconciled,
+                            the subjects per second, and an ETA.""")
+
+    parser.add_argument('--profile', metavar='FILE',
+                        help="""Write a JSON report of where the run spent its
+                            time to this file. It has the wall and CPU time
+                            for each stage and column, row and group counts,
+                            how the text columns were reconciled, and the
+                            peak memory use.""")
+
     parser.add_argument('-V', '--version', action='version',
                         version='%(prog)s {}'.format(VERSION))
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     if args.user_weights:
         args.user_weights = {key.lower(): int(value) for key, value in
@@ -155,39 +291,31 @@ def parse_command_line():
         print('--fuzzy-set-threshold must be between 0 and 100.')
         sys.exit(1)
 
-    return args
+    if args.shard and not shard.is_valid(args.shard):
+        print('--shard must look like I/N where 1 <= I <= N.')
+        sys.exit(1)
 
+    if args.subjects and args.format not in ('nfn', 'csv'):
+        print('--subjects only works with the nfn and csv formats.')
+        sys.exit(1)
 
-def zip_files(args):
-    """Put results into a zip file."""
-    zip_file = args.zip if args.zip else args.zip_keep
+    if args.sample is not None and args.sample < 1:
+        print('--sample must be at least 1.')
+        sys.exit(1)
 
-    with zipfile.ZipFile(zip_file, mode='w') as zippy:
-        if args.unreconciled:
-            zippy.write(args.unreconciled,
-                        arcname=basename(args.unreconciled),
-                        compress_type=zipfile.ZIP_DEFLATED)
-        if args.reconciled:
-            zippy.write(args.reconciled,
-                        arcname=basename(args.reconciled),
-                        compress_type=zipfile.ZIP_DEFLATED)
-        if args.summary:
-            zippy.write(args.summary,
-                        arcname=basename(args.summary),
-                        compress_type=zipfile.ZIP_DEFLATED)
-        if args.merged:
-            zippy.write(args.merged,
-                        arcname=basename(args.merged),
-                        compress_type=zipfile.ZIP_DEFLATED)
+    if args.stream and args.work_dir:
+        print('--stream does not save checkpoints. Remove the --work-dir.')
+        sys.exit(1)
 
-    if args.unreconciled:
-        os.remove(args.unreconciled)
-    if args.reconciled:
-        os.remove(args.reconciled)
-    if args.summary:
-        os.remove(args.summary)
-    if args.merged:
-        os.remove(args.merged)
+    if args.resume and not args.work_dir:
+        print('--resume needs a --work-dir.')
+        sys.exit(1)
+
+    if args.summary_shard_size < 0:
+        print('--summary-shard-size must not be negative.')
+        sys.exit(1)
+
+    return args
 
 
 def get_column_types(args, column_types):
@@ -210,15 +338,20 @@ def get_column_types(args, column_types):
     return column_types
 
 
-def validate_columns(args, column_types, unreconciled, plugins=None):
+def validate_columns(args, column_types, unreconciled, plugins=None,
+                     subjects=None):
     """Validate that the columns are in the unreconciled data frame.
 
-    Also verify that the column types are an existing plug-in.
+    Subject columns may be in the subject table instead. Also verify that the
+    column types are an existing plug-in.
     """
     has_errors = False
     types = list(plugins.keys())
+    columns = list(unreconciled.columns)
+    if subjects is not None:
+        columns += list(subjects.columns)
     for column, column_type in column_types.items():
-        if column not in unreconciled.columns:
+        if column not in columns:
             has_errors = True
             print('ERROR: "{}" is not a column header'.format(column))
         if column_type['type'] not in types:
@@ -241,46 +374,269 @@ def validate_columns(args, column_types, unreconciled, plugins=None):
             sys.exit(1)
 
 
+def write_frame(args, df, path, writer):
+    """Write a data frame in the output format. Ignore the index."""
+    if args.output_format == 'csv':
+        with writer.open(path) as out_file:
+            df.to_csv(out_file, index=False)
+    else:
+        with writer.open(path, binary=True) as out_file:
+            columnar.write(df, out_file, args.output_format)
+
+
+def write_unreconciled(args, unreconciled, writer):
+    """Write the unreconciled data."""
+    if args.unreconciled:
+        with profiler.stage('write_unreconciled'):
+            write_frame(args, unreconciled, args.unreconciled, writer)
+
+
+def write_reconciled(args, unreconciled, reconciled, explanations,
+                     column_types, writer, pipeline=None):
+    """
+    Write the outputs built from the reconciled data.
+
+    With a pipeline the outputs may be built at the same time.
+    """
+    pipeline = pipeline if pipeline else Pipeline(writer)
+
+    if args.reconciled:
+        pipeline.submit(write_reconciled_file, args, reconciled, column_types)
+
+    if args.summary:
+        pipeline.submit(write_summary, args, unreconciled, reconciled,
+                        explanations, column_types)
+
+    if args.merged:
+        pipeline.submit(write_merged, args, unreconciled, reconciled,
+                        explanations, column_types)
+
+    if args.sqlite:
+        pipeline.submit(write_sqlite, args, unreconciled, reconciled,
+                        explanations, column_types)
+
+
+def write_reconciled_file(args, reconciled, column_types, writer):
+    """Write the reconciled data."""
+    with profiler.stage('write_reconciled'):
+        columns = util.sort_columns(args, reconciled.columns, column_types)
+        del columns[0]
+        del columns[0]
+        del columns[0]
+        reconciled = reconciled.reindex(columns, axis=1).fillna('')
+        write_frame(args, reconciled.reset_index(), args.reconciled, writer)
+
+
+def write_summary(args, unreconciled, reconciled, explanations, column_types,
+                  writer):
+    """Write the summary report."""
+    with profiler.stage('summary'):
+        summary.report(args, unreconciled, reconciled, explanations,
+                       column_types, writer=writer)
+
+
+def write_sqlite(args, unreconciled, reconciled, explanations, column_types,
+                 writer):
+    """Write the SQLite database."""
+    with profiler.stage('sqlite'):
+        sqlite.save(args, unreconciled, reconciled, explanations,
+                    column_types, writer)
+
+
+def write_merged(args, unreconciled, reconciled, explanations, column_types,
+                 writer):
+    """Write the merged data. We stream CSV files group by group."""
+    with profiler.stage('merged'):
+        if args.output_format == 'csv':
+            with writer.open(args.merged) as out_file:
+                merged.write(args, unreconciled, reconciled, explanations,
+                             column_types, out_file)
+        else:
+            smerged = merged.merge(
+                args, unreconciled, reconciled, explanations, column_types)
+            write_frame(args, smerged, args.merged, writer)
+
+
 def main():
     """Reconcile the data."""
     args = parse_command_line()
+    run(args)
+
+
+def run(args):
+    """Run the reconciliation and profile it if wanted."""
+    if not profiler.wanted(args):
+        process(args)
+        return
+
+    profiler.start()
+    try:
+        process(args)
+    finally:
+        report = profiler.stop()
+
+    if args.profile:
+        with open(args.profile, 'w') as out_file:
+            json.dump(report, out_file, indent=2)
+
+    if args.sample and report:
+        sample.report_timing(args, report)
+
+
+def process(args):
+    """Read the input, reconcile it, and write the outputs."""
+    workers = WORKERS if args.pipeline else 0
+    with Writer(args.zip, parallel=args.zip_parallel) as writer, \
+            Pipeline(writer, workers=workers) as pipeline:
+        if args.from_artifact:
+            with profiler.stage('load_artifact'):
+                unreconciled, reconciled, explanations, column_types = (
+                    artifact.load(args))
+            pipeline.submit(write_unreconciled, args, unreconciled)
+            write_reconciled(args, unreconciled, reconciled, explanations,
+                             column_types, writer, pipeline=pipeline)
+            return
+
+        formats = util.get_plugins('formats')
+        plugins = util.get_plugins('column_types')
+
+        if args.stream:
+            unreconciled, subjects, column_types, reconciled, explanations = (
+                read_and_reconcile(args, formats[args.format], plugins))
+        else:
+            unreconciled, subjects, column_types = read(
+                args, formats[args.format], plugins)
+            reconciled = explanations = None
+
+        # The chunked readers and --stream compact the data as it is read
+        if (args.compact and not args.stream
+                and not hasattr(formats[args.format], 'read_chunks')):
+            with profiler.stage('compact'):
+                unreconciled = compact.compact(args, unreconciled)
+
+        profiler.count('rows', unreconciled.shape[0])
+        profiler.count('columns', len(column_types))
+
+        # With --pipeline this is written while we reconcile
+        if args.unreconciled:
+            pipeline.submit(
+                write_unreconciled, args,
+                subject_data.join(args, unreconciled, subjects, column_types))
+
+        if (args.reconciled or args.summary or args.merged or args.sqlite
+                or args.save_artifact):
+            if reconciled is None:
+                with profiler.stage('reconcile'):
+                    reconciled, explanations = checkpoint.reconcile(
+                        args, unreconciled, column_types, plugins=plugins)
+
+            profiler.count('groups', reconciled.shape[0])
+
+            if args.sample:
+                sample.report_rates(args, explanations, column_types)
+
+            # The outputs get the subject data
+            with profiler.stage('join_subjects'):
+                unreconciled = subject_data.join(
+                    args, unreconciled, subjects, column_types)
+                reconciled = subject_data.join(
+                    args, reconciled, subjects, column_types)
+
+            if args.save_artifact:
+                with profiler.stage('save_artifact'):
+                    artifact.save(args, unreconciled, reconciled,
+                                  explanations, column_types)
 
-    formats = util.get_plugins('formats')
-    unreconciled, column_types = formats[args.format].read(args)
+            write_reconciled(args, unreconciled, reconciled, explanations,
+                             column_types, writer, pipeline=pipeline)
+
+
+def read(args, reader, plugins):
+    """Read the input and get it ready to reconcile."""
+    checkpoint.start(args)
+
+    with profiler.stage('read'):
+        unreconciled, column_types, subjects = checkpoint.read(
+            args, reader.read)
+
+    unreconciled, subjects = shard.select(args, unreconciled, subjects)
+    if args.sample:
+        unreconciled, subjects = sample.select(
+            args, unreconciled, subjects)
 
     if unreconciled.shape[0] == 0:
         sys.exit('Workflow {} has no data.'.format(args.workflow_id))
 
-    plugins = util.get_plugins('column_types')
     column_types = get_column_types(args, column_types)
-    validate_columns(args, column_types, unreconciled, plugins=plugins)
+    unreconciled, subjects = subject_data.split(
+        args, unreconciled, subjects, column_types)
+    validate_columns(args, column_types, unreconciled, plugins=plugins,
+                     subjects=subjects)
 
-    if args.unreconciled:
-        unreconciled.to_csv(args.unreconciled, index=False)
-
-    if args.reconciled or args.summary or args.merged:
-        reconciled, explanations = reconciler.build(
-            args, unreconciled, column_types, plugins=plugins)
-
-        if args.reconciled:
-            columns = util.sort_columns(args, reconciled.columns, column_types)
-            del columns[0]
-            del columns[0]
-            del columns[0]
-            reconciled = reconciled.reindex(columns, axis=1).fillna('')
-            reconciled.to_csv(args.reconciled)
-
-        if args.summary:
-            summary.report(
-                args, unreconciled, reconciled, explanations, column_types)
+    return unreconciled, subjects, column_types
 
-        if args.merged:
-            smerged = merged.merge(
-                args, unreconciled, reconciled, explanations, column_types)
-            smerged.to_csv(args.merged, index=False)
 
-    if args.zip:
-        zip_files(args)
+def read_and_reconcile(args, reader, plugins):
+    """
+    Reconcile batches of subjects while the input is being read.
+
+    Each batch has its own subject columns so the column types are put
+    together, like read() does, when all of the batches are in.
+    """
+    try:
+        return stream_batches(args, reader, plugins)
+    except util.ReadAgain as error:
+        print('{}. Reading the whole input.'.format(error), file=sys.stderr)
+        return stream_batches(args, reader, plugins, chunked=False)
+
+
+def stream_batches(args, reader, plugins, chunked=True):
+    """Reconcile the batches from the stream and put them together."""
+    with profiler.stage('read'):
+        column_types, count, batches = stream.read(
+            args, reader, chunked=chunked)
+
+    subject_columns = []
+    dtypes = {}
+
+    def _prepare(unreconciled, subjects):
+        columns = subjects.columns if subjects is not None else []
+        subject_columns.extend(c for c in columns if c not in subject_columns)
+        # The reader may still renumber its column types
+        types = {k: dict(v) for k, v in column_types.items()}
+        types = get_column_types(args, subject_data.add_column_types(
+            columns, types))
+        unreconciled, subjects = subject_data.split(
+            args, unreconciled, subjects, types)
+        if args.compact:
+            with profiler.stage('compact'):
+                compact.compact(args, unreconciled, dtypes)
+        return unreconciled, subjects, types
+
+    progress = checkpoint.Progress(count) if args.progress else None
+    with profiler.stage('reconcile'):
+        unreconciled, subjects, reconciled, explanations = stream.reconcile(
+            args, batches, column_types, prepare=_prepare, progress=progress)
+
+    if unreconciled.shape[0] == 0:
+        sys.exit('Workflow {} has no data.'.format(args.workflow_id))
+
+    column_types = get_column_types(args, subject_data.add_column_types(
+        subject_columns, column_types))
+    validate_columns(args, column_types, unreconciled, plugins=plugins,
+                     subjects=subjects)
+
+    # Put the columns in the order that reconciling all at once gives
+    if hasattr(reader, 'read_batches') and chunked:
+        columns = util.sort_columns(args, unreconciled.columns, column_types)
+        unreconciled = unreconciled.reindex(
+            columns=[c for c in columns if c in unreconciled.columns])
+    columns = [c for c in column_types if c in reconciled.columns]
+    reconciled = reconciled.reindex(columns=columns)
+    explanations = explanations.reindex(
+        columns=[c for c in columns if c in explanations.columns])
+
+    return unreconciled, subjects, column_types, reconciled, explanations
 
 
 if __name__ == "__main__":
@@ -0,0 +1,80 @@
+"""Run reconcile.py as a local service."""
+
+import sys
+import asyncio
+import argparse
+import textwrap
+from lib.server import Server
+
+
+def parse_command_line(argv=None):
+    """Get user input. Use the given argument list instead of sys.argv."""
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=textwrap.dedent("""
+            Serve reconciliations over HTTP on a local port or a Unix socket.
+            The workers stay up between requests so each run skips the
+            start up costs.
+
+                GET  /health     The server's status.
+                POST /reconcile  A JSON body with the reconcile.py "args" and
+                                 optionally the "export" text. Relative
+                                 output files are returned in the response.
+            """))
+
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="""Listen on this address (Default=127.0.0.1).""")
+
+    parser.add_argument('--port', default=8765, type=int,
+                        help="""Listen on this port (Default=8765).""")
+
+    parser.add_argument('--socket',
+                        help="""Listen on this Unix socket instead of a
+                            port.""")
+
+    parser.add_argument('-j', '--workers', default=2, type=int,
+                        help="""How many reconciliations to run at once
+                            (Default=2).""")
+
+    parser.add_argument('--max-waiting', default=16, type=int,
+                        help="""How many requests may wait for a worker before
+                            we turn new ones away (Default=16).""")
+
+    parser.add_argument('--max-body', default=256, type=int,
+                        help="""The largest request body in MB
+                            (Default=256).""")
+
+    args = parser.parse_args(argv)
+
+    if args.workers < 1:
+        print('--workers must be at least 1.')
+        sys.exit(1)
+
+    return args
+
+
+def main():
+    """Serve until interrupted."""
+    args = parse_command_line()
+
+    server = Server(workers=args.workers, max_waiting=args.max_waiting,
+                    max_body=args.max_body)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(
+        server.start(host=args.host, port=args.port, socket=args.socket))
+    print('Listening on {}'.format(
+        args.socket or '{}:{}'.format(args.host, args.port)))
+
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(server.stop())
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
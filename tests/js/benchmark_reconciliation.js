@@ -0,0 +1,164 @@
+// Benchmark the summary report's detail section (lib/summary/reconciliation.js)
+// in a headless DOM. We fill in the template variables with a synthetic group
+// dataset and then time loading the page, changing filters & pages, opening
+// all of the groups, and scrolling. We also count the DOM work done.
+//
+// Usage: node tests/js/benchmark_reconciliation.js [subjects] [page-size]
+// The results are written to stdout as JSON.
+
+const fs = require('fs');
+const path = require('path');
+const vm = require('vm');
+const fakeDom = require('./fake_dom');
+
+const SCRIPT = path.join(__dirname, '..', '..', 'lib', 'summary', 'reconciliation.js');
+const PROBLEM_PATTERN = 'No (?:select|text) match on|Only 1 transcript in|There was 1 number in';
+const COLUMNS = 20;
+const TRANSCRIPTS = 3;
+
+// Build the template variables for a synthetic dataset.
+const buildFixture = function(subjects, pageSize) {
+  const columns = ['subject_id', 'classification_id', 'user_name'];
+  for (var c = 0; c < COLUMNS; c++) { columns.push('Column ' + c); }
+
+  const groupIds = [];
+  const groups = {};
+  const filters = { '__select__': ['Show All', 'Show All Problems'], 'Show All': [], 'Show All Problems': [] };
+  columns.slice(3).forEach(function(col) {
+    filters['__select__'].push('Show problems with: ' + col);
+    filters['Show problems with: ' + col] = [];
+  });
+
+  for (var s = 0; s < subjects; s++) {
+    const id = String(1000000 + s);
+    const group = { reconciled: {}, explanations: {}, unreconciled: [] };
+    for (var t = 0; t < TRANSCRIPTS; t++) {
+      group.unreconciled.push({ subject_id: id, classification_id: id + '-' + t, user_name: 'user ' + t });
+    }
+    columns.slice(3).forEach(function(col, c) {
+      const problem = (s + c) % 7 === 0;
+      group.reconciled[col] = problem ? '' : 'value ' + s;
+      group.explanations[col] = problem ? 'No text match on 3 records with 0 blanks' : 'Normalized unanimous match, 3 of 3 records';
+      group.unreconciled.forEach(function(row, t) { row[col] = 'value ' + s + (problem ? ' ' + t : ''); });
+      if (problem) { filters['Show problems with: ' + col].push(s); }
+    });
+    groupIds.push(id);
+    groups[id] = group;
+    filters['Show All'].push(s);
+    if (columns.slice(3).some(function(col, c) { return (s + c) % 7 === 0; })) {
+      filters['Show All Problems'].push(s);
+    }
+  }
+
+  return {
+    args: { group_by: 'subject_id', page_size: pageSize },
+    columns: columns,
+    filters: filters,
+    group_ids: groupIds,
+    groups: groups,
+    shards: {},
+    problem_pattern: PROBLEM_PATTERN
+  };
+};
+
+// Fill in the jinja template variables.
+const render = function(source, fixture) {
+  return source
+    .replace(/\{%\s*for (\w+) in (\w+)\s*%\}\{\{\s*\1\s*\|\s*safe\s*\}\}\{%\s*endfor\s*%\}/g, function(m, part, name) { return JSON.stringify(fixture[name]); })
+    .replace(/\{\{\s*(\w+)\s*\|\s*safe\s*\}\}/g, function(m, name) { return JSON.stringify(fixture[name]); })
+    .replace(/\{\{\s*(\w+)\s*\}\}/g, function(m, name) { return fixture[name]; });
+};
+
+const time = function(results, name, fn) {
+  const counts = Object.assign({}, fakeDom.counts);
+  const start = process.hrtime.bigint();
+  fn();
+  const ms = Number(process.hrtime.bigint() - start) / 1e6;
+  const after = fakeDom.counts;
+  results[name] = {
+    ms: Math.round(ms * 1000) / 1000,
+    created: after.created - counts.created,
+    inserted: after.inserted - counts.inserted,
+    removed: after.removed - counts.removed,
+    innerHTML: after.innerHTML - counts.innerHTML
+  };
+};
+
+const benchmark = function(subjects, pageSize) {
+  const fixture = buildFixture(subjects, pageSize);
+  const source = render(fs.readFileSync(SCRIPT, 'utf8'), fixture);
+
+  const document = fakeDom.buildDocument({
+    '#groups tbody': 'tbody',
+    '#groups .viewport': 'div',
+    '#groups .pager': 'input',
+    '#groups .filter': 'select',
+    '#groups .max-page': 'label',
+    '#groups thead tr': 'tr',
+    '#groups thead button': 'button',
+    '#groups .first-page': 'button',
+    '#groups .previous-page': 'button',
+    '#groups .next-page': 'button',
+    '#groups .last-page': 'button'
+  });
+  document.querySelector('#groups .viewport').clientHeight = 600;
+  document.querySelector('#groups .filter').value = 'Show All';
+  document.querySelector('#groups .pager').value = '1';
+  document.querySelector('#groups thead tr').className = 'closed';
+
+  const context = vm.createContext({
+    document: document,
+    requestAnimationFrame: function(callback) { callback(); },
+    Uint8Array: Uint8Array
+  });
+
+  const results = { subjects: subjects, page_size: pageSize };
+  const tbody = document.querySelector('#groups tbody');
+  const filter = document.querySelector('#groups .filter');
+  const viewport = document.querySelector('#groups .viewport');
+
+  time(results, 'load', function() { vm.runInContext(source, context); });
+
+  time(results, 'filters', function() {
+    fixture.filters['__select__'].forEach(function(name) {
+      filter.value = name;
+      filter.dispatch('change');
+    });
+    filter.value = 'Show All';
+    filter.dispatch('change');
+  });
+
+  time(results, 'pages', function() {
+    for (var i = 0; i < 20; i++) { document.querySelector('#groups .next-page').dispatch('click'); }
+    document.querySelector('#groups .last-page').dispatch('click');
+    document.querySelector('#groups .first-page').dispatch('click');
+  });
+
+  time(results, 'open_all', function() {
+    document.querySelector('#groups thead button').dispatch('click');
+  });
+
+  time(results, 'scroll', function() {
+    for (var top = 0; top < pageSize * 20 * (TRANSCRIPTS + 2); top += 200) {
+      viewport.scrollTop = top;
+      viewport.dispatch('scroll');
+    }
+  });
+
+  time(results, 'toggle_one', function() {
+    const target = { matches: function() { return true; }, dataset: { index: '0' } };
+    tbody.dispatch('click', target);
+  });
+
+  results.table_rows = tbody.children.length;
+  results.dom_nodes = tbody.descendants().length;
+  return results;
+};
+
+if (require.main === module) {
+  const subjects = +(process.argv[2] || 10000);
+  const pageSize = +(process.argv[3] || 1000);
+  console.log(JSON.stringify(benchmark(subjects, pageSize), null, 2));
+}
+
+module.exports = { benchmark: benchmark, buildFixture: buildFixture };
@@ -0,0 +1,117 @@
+// A tiny headless DOM. It only has what the summary report scripts use, and it
+// counts the DOM work they do so that we can benchmark them without a browser.
+
+const ROW_HEIGHT = 20;  // Every table row is this tall
+const counts = { created: 0, inserted: 0, removed: 0, innerHTML: 0 };
+
+class ClassList {
+  constructor(element) { this.element = element; }
+  get list() { return this.element.className.split(' ').filter(Boolean); }
+  contains(cls) { return this.list.indexOf(cls) > -1; }
+  add(cls) {
+    if (!this.contains(cls)) { this.element.className = this.list.concat([cls]).join(' '); }
+  }
+  remove(cls) {
+    this.element.className = this.list.filter(function(c) { return c !== cls; }).join(' ');
+  }
+  toggle(cls) {
+    if (this.contains(cls)) { this.remove(cls); } else { this.add(cls); }
+  }
+}
+
+class Element {
+  constructor(tagName) {
+    counts.created += 1;
+    this.tagName = tagName.toUpperCase();
+    this.children = [];
+    this.parentElement = null;
+    this.className = '';
+    this.classList = new ClassList(this);
+    this.attributes = {};
+    this.dataset = {};
+    this.style = {};
+    this.listeners = {};
+    this.value = '';
+    this.scrollTop = 0;
+    this.clientHeight = 0;
+    this.offsetHeight = this.tagName === 'TR' ? ROW_HEIGHT : 0;
+    this._innerHTML = '';
+  }
+
+  get firstChild() { return this.children[0] || null; }
+
+  get innerHTML() { return this._innerHTML; }
+  set innerHTML(html) {
+    counts.innerHTML += 1;
+    this._innerHTML = html;
+  }
+
+  appendChild(child) { return this.insertBefore(child, null); }
+
+  insertBefore(child, before) {
+    counts.inserted += 1;
+    const i = before ? this.children.indexOf(before) : -1;
+    if (i > -1) { this.children.splice(i, 0, child); } else { this.children.push(child); }
+    child.parentElement = this;
+    if (child.tagName === 'SCRIPT' && this.ownerDocument) { this.ownerDocument.onScript(child); }
+    return child;
+  }
+
+  removeChild(child) {
+    counts.removed += 1;
+    this.children.splice(this.children.indexOf(child), 1);
+    child.parentElement = null;
+    return child;
+  }
+
+  setAttribute(name, value) {
+    this.attributes[name] = String(value);
+    if (name.indexOf('data-') === 0) {
+      const key = name.slice(5).replace(/-(\w)/g, function(m, c) { return c.toUpperCase(); });
+      this.dataset[key] = String(value);
+    }
+  }
+
+  getAttribute(name) { return name in this.attributes ? this.attributes[name] : null; }
+  removeAttribute(name) { delete this.attributes[name]; }
+
+  matches(selector) { return this.tagName === selector.toUpperCase(); }
+
+  addEventListener(type, listener) {
+    (this.listeners[type] = this.listeners[type] || []).push(listener);
+  }
+
+  dispatch(type, target) {
+    const event = { type: type, target: target || this };
+    (this.listeners[type] || []).forEach(function(listener) { listener(event); });
+  }
+
+  // Every element within this one
+  descendants() {
+    return this.children.reduce(function(all, child) {
+      return all.concat([child], child.descendants());
+    }, []);
+  }
+}
+
+// Build a document with the elements that the report's template provides.
+// The selectors map to the elements that querySelector will return.
+const buildDocument = function(selectors, onScript) {
+  const elements = {};
+  const document = {
+    body: new Element('body'),
+    createElement: function(tagName) { return new Element(tagName); },
+    querySelector: function(selector) { return elements[selector] || null; },
+    querySelectorAll: function(selector) {
+      return elements[selector] ? [elements[selector]] : [];
+    },
+    onScript: onScript || function() {}
+  };
+  document.body.ownerDocument = document;
+  Object.keys(selectors).forEach(function(selector) {
+    elements[selector] = new Element(selectors[selector]);
+  });
+  return document;
+};
+
+module.exports = { Element: Element, buildDocument: buildDocument, counts: counts };
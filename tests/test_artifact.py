@@ -0,0 +1,110 @@
+"""Test functions in lib/artifact.py."""
+
+# pylint: disable=missing-docstring,too-many-arguments,no-self-use
+
+from argparse import Namespace
+import shutil
+import tempfile
+import unittest
+from os.path import join
+import pandas as pd
+import lib.artifact as artifact
+
+
+class TestArtifact(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_save_and_load(self):
+        path = join(self.temp_dir, 'artifact.zip')
+        args = Namespace(group_by='subject_id', key_column='classification_id',
+                         user_column='user_name', input_file='input.csv',
+                         title='A title', save_artifact=path)
+        unreconciled = pd.DataFrame({
+            'subject_id': [1, 1, 2],
+            'classification_id': ['10', '11', '12'],
+            'user_name': ['a', 'b', 'a'],
+            'Country': ['Peru', 'Peru', 'Chile']}, index=[5, 3, 9])
+        reconciled = pd.DataFrame(
+            {'Country': ['Peru', 'Chile']},
+            index=pd.Index([1, 2], name='subject_id'))
+        explanations = pd.DataFrame(
+            {'Country': ['Unanimous match, 2 of 2 records',
+                         'Only 1 transcript in 1 record']},
+            index=pd.Index([1, 2], name='subject_id'))
+        column_types = {
+            'Country': {'type': 'select', 'order': 1, 'name': 'Country'}}
+
+        artifact.save(
+            args, unreconciled, reconciled, explanations, column_types)
+
+        new_args = Namespace(input_file=path, title='', group_by='x',
+                             key_column='y', user_column=None)
+        loaded = artifact.load(new_args)
+
+        pd.testing.assert_frame_equal(
+            loaded[0], unreconciled.reset_index(drop=True))
+        pd.testing.assert_frame_equal(loaded[1], reconciled)
+        pd.testing.assert_frame_equal(loaded[2], explanations)
+        assert loaded[3] == column_types
+        assert new_args.input_file == 'input.csv'
+        assert new_args.title == 'A title'
+        assert new_args.group_by == 'subject_id'
+        assert new_args.user_column == 'user_name'
+
+    def save_shard(self, shard, rows, column_types):
+        path = join(self.temp_dir, 'part-{}.zip'.format(shard[0]))
+        args = Namespace(group_by='subject_id', key_column='classification_id',
+                         user_column='user_name', input_file='input.csv',
+                         title='A title', save_artifact=path, shard=shard)
+        unreconciled = pd.DataFrame({
+            'subject_id': [r[0] for r in rows],
+            'classification_id': [r[1] for r in rows],
+            'Country': [r[2] for r in rows]})
+        reconciled = unreconciled.drop_duplicates('subject_id').set_index(
+            'subject_id')[['Country']]
+        artifact.save(args, unreconciled, reconciled, reconciled.copy(),
+                      column_types)
+        return path
+
+    def test_load_shards(self):
+        paths = [
+            self.save_shard(
+                '1/2', [(2, '12', 'Chile'), (4, '14', 'Peru')],
+                {'Country': {'type': 'select', 'order': 1,
+                             'name': 'Country'}}),
+            self.save_shard(
+                '2/2', [(1, '10', 'Peru'), (1, '11', 'Peru'),
+                        (3, '13', 'Chile')],
+                {'Country': {'type': 'select', 'order': 2,
+                             'name': 'Country'},
+                 'Notes': {'type': 'text', 'order': 3, 'name': 'Notes'}})]
+
+        new_args = Namespace(input_file=paths[0], title='', group_by='x',
+                             key_column='y', user_column=None)
+        unreconciled, reconciled, _, column_types = artifact.load(
+            new_args, paths)
+
+        assert unreconciled.subject_id.tolist() == [1, 1, 2, 3, 4]
+        assert unreconciled.classification_id.tolist() == [
+            '10', '11', '12', '13', '14']
+        assert reconciled.index.tolist() == [1, 2, 3, 4]
+        assert column_types['Country']['order'] == 1
+        assert column_types['Notes']['order'] == 3
+        assert new_args.input_file == 'input.csv'
+
+    def test_load_missing_shard(self):
+        column_types = {
+            'Country': {'type': 'select', 'order': 1, 'name': 'Country'}}
+        paths = [
+            self.save_shard('1/3', [(2, '12', 'Chile')], column_types),
+            self.save_shard('2/3', [(1, '10', 'Peru')], column_types)]
+
+        new_args = Namespace(input_file=paths[0], title='', group_by='x',
+                             key_column='y', user_column=None)
+        with self.assertRaises(SystemExit):
+            artifact.load(new_args, paths)
@@ -0,0 +1,108 @@
+"""Test functions in lib/batch.py."""
+
+# pylint: disable=missing-docstring,too-many-arguments,no-self-use
+
+from argparse import Namespace
+from collections import OrderedDict
+import os
+import tempfile
+import unittest
+import lib.batch as batch
+import lib.util as util
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.manifest = os.path.join(self.temp_dir.name, 'manifest.txt')
+        self.args = Namespace(manifest=self.manifest, input_file='export.csv',
+                              output_dir='out', workers=1, profile=False)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+        util.CSV_CACHE = None
+
+    def write_manifest(self, text):
+        with open(self.manifest, 'w') as out_file:
+            out_file.write(text)
+
+    def test_read_manifest(self):
+        self.write_manifest(
+            '# Comment\n'
+            '\n'
+            '@split_args.txt "split 1.csv"\n'
+            '1234 --title Beetles  # Trailing comment\n')
+
+        jobs = batch.read_manifest(self.args)
+
+        assert jobs[0] == batch.Job(1, '@split_args.txt split 1.csv',
+                                    ['@split_args.txt', 'split 1.csv'])
+        assert jobs[1].index == 2
+        assert jobs[1].argv == [
+            'export.csv', '--workflow-id', '1234',
+            '--unreconciled', os.path.join('out', '1234_unreconciled.csv'),
+            '--reconciled', os.path.join('out', '1234_reconciled.csv'),
+            '--summary', os.path.join('out', '1234_summary.html'),
+            '--title', 'Beetles']
+
+    def test_run_job_failed(self):
+        missing = os.path.join(self.temp_dir.name, 'missing.csv')
+        job = batch.Job(1, missing, [missing, '--format', 'csv'])
+
+        status = batch.run_job(job)
+
+        assert status['status'] == 'failed'
+        assert 'FileNotFoundError' in status['error']
+        assert isinstance(util.CSV_CACHE, OrderedDict)
+
+    def test_run_job_bad_arguments(self):
+        job = batch.Job(1, '--no-such-option', ['--no-such-option'])
+
+        status = batch.run_job(job)
+
+        assert status['status'] == 'failed'
+        assert status['error'] == '2'
+
+    def test_read_csv_cache(self):
+        path = os.path.join(self.temp_dir.name, 'data.csv')
+        with open(path, 'w') as out_file:
+            out_file.write('a,b\n1,2\n')
+
+        assert util.read_csv(path) is not util.read_csv(path)
+
+        util.CSV_CACHE = OrderedDict()
+        assert util.read_csv(path, dtype=str) is util.read_csv(path, dtype=str)
+        assert util.read_csv(path) is not util.read_csv(path, dtype=str)
+
+    def test_group_by_input(self):
+        self.write_manifest(
+            '1234\n'
+            'other.csv --format csv\n'
+            '5678\n'
+            '--no-such-option\n')
+
+        groups = batch.group_by_input(batch.read_manifest(self.args), 1)
+
+        assert [[job.index for job in group] for group in groups] == [
+            [1, 3], [2], [4]]
+
+    def test_group_by_input_uses_every_worker(self):
+        self.write_manifest(''.join('{}\n'.format(i) for i in range(1, 8)))
+
+        groups = batch.group_by_input(batch.read_manifest(self.args), 3)
+
+        assert [[job.index for job in group] for group in groups] == [
+            [1, 2, 3], [4, 5, 6], [7]]
+
+    def test_run_in_manifest_order(self):
+        missing = os.path.join(self.temp_dir.name, 'missing.csv')
+        jobs = [batch.Job(1, missing, [missing, '--format', 'csv']),
+                batch.Job(2, '--no-such-option', ['--no-such-option']),
+                batch.Job(3, missing, [missing, '--format', 'csv'])]
+        self.args.workers = 2
+
+        statuses = batch.run(self.args, jobs)
+
+        assert [s['job'] for s in statuses] == [1, 2, 3]
+        assert statuses[0]['worker'] == statuses[2]['worker']
@@ -0,0 +1,121 @@
+"""Test functions in lib/checkpoint.py."""
+
+# pylint: disable=missing-docstring
+
+from argparse import Namespace
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from os.path import join
+from unittest.mock import patch
+import pandas as pd
+import lib.util as util
+import lib.reconciler as reconciler
+import lib.checkpoint as checkpoint
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.input_file = join(self.temp_dir, 'input.csv')
+        with open(self.input_file, 'w') as out_file:
+            out_file.write('input')
+        self.args = Namespace(
+            input_file=self.input_file, work_dir=join(self.temp_dir, 'work'),
+            resume=False, progress=False, format='csv', group_by='subject_id',
+            key_column='classification_id', user_column='user_name',
+            title='', column_types=None, summary='summary.html')
+        self.df = pd.DataFrame({
+            'subject_id': [i // 2 for i in range(10)],
+            'classification_id': [str(i) for i in range(10)],
+            'user_name': ['a', 'b'] * 5,
+            'Country': ['Peru', 'Peru', 'Chile', 'Peru'] * 2 + ['Peru'] * 2})
+        self.column_types = {
+            'Country': {'type': 'select', 'order': 1, 'name': 'Country'}}
+        self.plugins = util.get_plugins('column_types')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def reader(self, args):
+        args.title = 'Read'
+        return self.df.copy(), dict(self.column_types), None
+
+    @patch('lib.checkpoint.BATCH_SUBJECTS', 2)
+    @patch('sys.stderr', new_callable=io.StringIO)
+    def test_batches_match_one_build(self, stderr):
+        checkpoint.start(self.args)
+        reconciled, explanations = checkpoint.reconcile(
+            self.args, self.df, self.column_types, plugins=self.plugins)
+
+        expect = reconciler.build(
+            self.args, self.df, self.column_types, plugins=self.plugins)
+        pd.testing.assert_frame_equal(reconciled, expect[0])
+        pd.testing.assert_frame_equal(explanations, expect[1])
+        assert sorted(n for n in os.listdir(self.args.work_dir)
+                      if n.startswith('batch-')) == [
+                          'batch-00001.feather', 'batch-00002.feather',
+                          'batch-00003.feather']
+        assert 'Reconciled 5 of 5 subjects' in stderr.getvalue()
+
+    @patch('lib.checkpoint.BATCH_SUBJECTS', 2)
+    @patch('sys.stderr', new_callable=io.StringIO)
+    def test_resume(self, stderr):
+        checkpoint.start(self.args)
+        checkpoint.read(self.args, self.reader)
+        first = checkpoint.reconcile(
+            self.args, self.df, self.column_types, plugins=self.plugins)
+        os.remove(join(self.args.work_dir, 'batch-00002.feather'))
+
+        args = Namespace(**vars(self.args))
+        args.resume = True
+        args.title = ''
+        checkpoint.start(args)
+        unreconciled, column_types, _ = checkpoint.read(
+            args, lambda _: self.fail('The input was read again'))
+        assert args.title == 'Read'
+        assert column_types == self.column_types
+        pd.testing.assert_frame_equal(unreconciled, self.df)
+
+        with patch('lib.reconciler.build', wraps=reconciler.build) as build:
+            second = checkpoint.reconcile(
+                args, unreconciled, column_types, plugins=self.plugins)
+        assert build.call_count == 1
+        pd.testing.assert_frame_equal(first[0], second[0])
+        pd.testing.assert_frame_equal(first[1], second[1])
+        assert 'Resumed 2 of 5 subjects' in stderr.getvalue()
+
+    @patch('sys.stderr', new_callable=io.StringIO)
+    def test_resume_other_arguments(self, stderr):
+        checkpoint.start(self.args)
+        checkpoint.read(self.args, self.reader)
+
+        args = Namespace(**vars(self.args))
+        args.resume = True
+        args.group_by = 'user_name'
+        checkpoint.start(args)
+        assert 'do not match' in stderr.getvalue()
+        assert os.listdir(args.work_dir) == ['manifest.json']
+
+    def test_progress(self):
+        out_file = io.StringIO()
+        progress = checkpoint.Progress(10, out_file=out_file)
+        progress.skip(4)
+        assert progress.eta() is None
+        progress.done(2)
+        assert progress.rate() > 0
+        assert progress.eta() > 0
+        assert 'Reconciled 6 of 10 subjects (60.0%)' in out_file.getvalue()
+
+    def test_progress_all_resumed(self):
+        out_file = io.StringIO()
+        progress = checkpoint.Progress(4, out_file=out_file)
+        progress.skip(4)
+        assert out_file.getvalue() == 'Resumed 4 of 4 subjects (100.0%)\n'
+
+    def test_format_seconds(self):
+        assert checkpoint.format_seconds(0) == '0:00:00'
+        assert checkpoint.format_seconds(3725.4) == '1:02:05'
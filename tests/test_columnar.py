@@ -0,0 +1,42 @@
+"""Test functions in lib/columnar.py."""
+
+# pylint: disable=missing-docstring,too-many-arguments,no-self-use
+
+import shutil
+import tempfile
+import unittest
+from os.path import join
+import pandas as pd
+import lib.columnar as columnar
+
+
+class TestColumnar(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.df = pd.DataFrame(
+            [[2, '', 'Peru'], [1, '10', 'Chile']],
+            columns=['subject_id', 'classification_id', 'Country'])
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def round_trip(self, file_format):
+        path = join(self.temp_dir, 'data.' + file_format)
+        with open(path, 'wb') as out_file:
+            columnar.write(self.df, out_file, file_format)
+        return columnar.read(path, file_format)
+
+    def test_parquet(self):
+        pd.testing.assert_frame_equal(self.round_trip('parquet'), self.df)
+
+    def test_feather(self):
+        pd.testing.assert_frame_equal(self.round_trip('feather'), self.df)
+
+    def test_typed_columns(self):
+        df = pd.DataFrame({'mixed': [1, ''], 'ints': [1, 2]}, dtype=object)
+
+        df = columnar.typed_columns(df)
+
+        assert df.mixed.tolist() == ['1', '']
+        assert df.ints.tolist() == [1, 2]
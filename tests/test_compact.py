@@ -0,0 +1,64 @@
+"""Test functions in lib/compact.py."""
+
+# pylint: disable=missing-docstring,too-many-arguments,no-self-use
+
+from argparse import Namespace
+import unittest
+import pandas as pd
+import lib.util as util
+import lib.profiler as profiler
+import lib.compact as compact
+
+
+class TestCompact(unittest.TestCase):
+
+    def setUp(self):
+        self.args = Namespace(group_by='subject_id',
+                              key_column='classification_id')
+        self.df = pd.DataFrame({
+            'subject_id': ['1', '1', '2', '2'],
+            'classification_id': ['10', '11', '12', '13'],
+            'Country': ['Peru', 'Peru', 'Chile', 'Peru'],
+            'Notes': ['a', 'a', 'c', 'd']})
+
+    def test_compact_dtypes(self):
+        df = compact.compact(self.args, self.df)
+
+        assert df.subject_id.dtype == object
+        assert df.classification_id.dtype == object
+        assert df.Country.dtype.name == 'category'
+        string = compact.string_dtype()
+        assert df.Notes.dtype == (string if string else object)
+
+    def test_compact_keeps_values(self):
+        expect = self.df.copy()
+
+        df = compact.compact(self.args, self.df)
+
+        assert df is self.df  # In place
+        assert df.astype(object).equals(expect)
+
+    def test_chunks_share_dtypes(self):
+        frames = list(compact.chunks(
+            self.args, [self.df.iloc[:2].copy(), self.df.iloc[2:].copy()]))
+
+        # Notes has one value per row in the second chunk
+        assert [f.Notes.dtype.name for f in frames] == ['category'] * 2
+
+        df = util.concat_chunks(frames)
+        assert df.Country.dtype.name == 'category'
+        assert df.Notes.dtype.name == 'category'
+        assert df.astype(object).equals(self.df)
+
+    def test_profile_has_the_memory(self):
+        profiler.start()
+        compact.compact(self.args, self.df)
+        report = profiler.stop()
+
+        memory = report['counts']['memory']
+        assert memory['unreconciled_after_mb'] <= (
+            memory['unreconciled_before_mb'])
+
+    def test_memory_mb(self):
+        df = pd.DataFrame({'text': ['x' * 1024] * 1024})
+        assert compact.memory_mb(df) > 1
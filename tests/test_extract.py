@@ -0,0 +1,77 @@
+"""Test functions in misc/extract_from_nfn_v1.py."""
+
+# pylint: disable=missing-docstring
+
+from argparse import Namespace
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import pandas as pd
+from misc import extract_from_nfn_v1 as extract
+
+
+class TestExtract(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_file = os.path.join(self.temp_dir.name, 'input.csv')
+        pd.DataFrame({
+            'occurrenceID': ['o3', 'o1', 'o2', 'o1', 'o3', 'o2', 'o1'],
+            'classificationID': ['c7', 'c2', 'c4', 'c1', 'c6', 'c3', 'c5'],
+            'dynamicProperties': [
+                'bee', 'ant', 'bee', 'ant', 'bee', 'wasp', 'ant'],
+            'Locality': ['x', 'y', 'z', '', 'x', 'y', 'z'],
+            'Notes': ['', '', 'n', '', '', 'n', '']}).to_csv(
+                self.input_file, index=False)
+        self.prefixes = [os.path.join(self.temp_dir.name, p)
+                         for p in ('ants', 'bees')]
+        self.args = Namespace(
+            input_file=self.input_file, output_prefix=self.prefixes,
+            pattern=['ant', 'bee'], column='dynamicProperties',
+            group_by='occurrenceID', key_column='classificationID')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def read_split(self, prefix):
+        return pd.read_csv(prefix + '.csv', dtype=str).fillna('')
+
+    @patch('misc.extract_from_nfn_v1.CHUNK_ROWS', 2)
+    def test_process_csv(self):
+        extract.process_csv(self.args)
+
+        ants = self.read_split(self.prefixes[0])
+        assert ants.classificationID.tolist() == ['c1', 'c2', 'c5']
+        assert ants.columns.tolist() == [
+            'occurrenceID', 'classificationID', 'dynamicProperties',
+            'Locality']
+
+        bees = self.read_split(self.prefixes[1])
+        assert bees.occurrenceID.tolist() == ['o2', 'o3', 'o3']
+        assert bees.classificationID.tolist() == ['c4', 'c6', 'c7']
+        assert 'Notes' in bees.columns
+
+        assert sorted(os.listdir(self.temp_dir.name)) == [
+            'ants.csv', 'ants_args.txt', 'bees.csv', 'bees_args.txt',
+            'input.csv']
+
+    @patch('misc.extract_from_nfn_v1.CHUNK_ROWS', 2)
+    def test_args_file(self):
+        extract.process_csv(self.args)
+
+        with open(self.prefixes[0] + '_args.txt') as in_file:
+            lines = in_file.read().splitlines()
+
+        prefix = self.prefixes[0]
+        assert lines == [
+            '--title=ants',
+            '--format=csv',
+            '--group-by=occurrenceID',
+            '--key-column=classificationID',
+            '--unreconciled={}_unreconciled.csv'.format(prefix),
+            '--reconciled={}_reconciled.csv'.format(prefix),
+            '--summary={}_summary.html'.format(prefix),
+            '--zip={}.zip'.format(prefix),
+            '--column-types=dynamicProperties:text',
+            '--column-types=Locality:text']
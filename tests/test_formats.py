@@ -0,0 +1,121 @@
+"""Test the chunked readers in lib/formats/csv.py and lib/formats/jsonl.py."""
+
+# pylint: disable=missing-docstring,too-many-arguments,no-self-use
+
+from argparse import Namespace
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+import pandas as pd
+import lib.util as util
+import lib.formats.csv as csv_format
+import lib.formats.jsonl as jsonl
+
+
+class TestChunkedReaders(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.args = Namespace(group_by='subject_id',
+                              key_column='classification_id')
+        self.records = [
+            {'subject_id': '1', 'classification_id': '10', 'Notes': 'a'},
+            {'subject_id': '1', 'classification_id': '11', 'Notes': 'b'},
+            {'subject_id': '2', 'classification_id': '12'},
+            {'subject_id': '3', 'classification_id': '13', 'Notes': 'd'},
+            {'subject_id': '3', 'classification_id': '14', 'Notes': 'e'}]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_jsonl(self, records):
+        self.args.input_file = os.path.join(self.temp_dir.name, 'in.jsonl')
+        with open(self.args.input_file, 'w') as out_file:
+            for record in records:
+                out_file.write(json.dumps(record) + '\n')
+
+    def write_csv(self, records):
+        self.args.input_file = os.path.join(self.temp_dir.name, 'in.csv')
+        pd.DataFrame(records).to_csv(self.args.input_file, index=False)
+
+    def expected(self):
+        return (pd.DataFrame(self.records).fillna('')
+                  .sort_values(['subject_id', 'classification_id'])
+                  .reset_index(drop=True))
+
+    @patch('lib.util.CHUNK_ROWS', 2)
+    def test_jsonl_ordered(self):
+        self.write_jsonl(self.records)
+
+        with patch('lib.util.unreconciled_setup') as setup:
+            df, column_types, subjects = jsonl.read(self.args)
+            setup.assert_not_called()
+
+        assert df.equals(self.expected())
+        assert column_types == {}
+        assert subjects is None
+
+    @patch('lib.util.CHUNK_ROWS', 2)
+    def test_jsonl_unordered(self):
+        self.write_jsonl(list(reversed(self.records)))
+
+        df, _, _ = jsonl.read(self.args)
+
+        assert df.reset_index(drop=True).equals(self.expected())
+
+    @patch('lib.util.CHUNK_ROWS', 2)
+    def test_csv_ordered(self):
+        self.write_csv(self.records)
+
+        with patch('lib.util.unreconciled_setup') as setup:
+            df, _, _ = csv_format.read(self.args)
+            setup.assert_not_called()
+
+        assert df.equals(self.expected())
+
+    @patch('lib.util.CHUNK_ROWS', 2)
+    def test_csv_unordered_across_chunks(self):
+        self.write_csv(self.records[2:] + self.records[:2])
+
+        df, _, _ = csv_format.read(self.args)
+
+        assert df.reset_index(drop=True).equals(self.expected())
+
+    def test_chunk_is_ordered(self):
+        chunk = pd.DataFrame(self.records[:2])
+
+        assert util.chunk_is_ordered(self.args, chunk, None) == (
+            True, ('1', '11'))
+        assert util.chunk_is_ordered(self.args, chunk, ('2', '1')) == (
+            False, ('1', '11'))
+
+    def chunks(self, records, size=2):
+        return [pd.DataFrame(records[i:i + size])
+                for i in range(0, len(records), size)]
+
+    def test_group_chunks(self):
+        frames = list(util.group_chunks(self.args, self.chunks(self.records)))
+
+        # The last subject of a chunk waits for the next chunk
+        assert [f.subject_id.unique().tolist() for f in frames] == [
+            ['1', '2'], ['3']]
+        assert pd.concat(frames).equals(self.expected())
+
+    def test_group_chunks_unordered(self):
+        records = list(reversed(self.records))
+
+        frames = list(util.group_chunks(self.args, self.chunks(records)))
+
+        assert len(frames) == 1
+        assert frames[0].reset_index(drop=True).equals(self.expected())
+
+    def test_group_chunks_after_giving_out_groups(self):
+        records = self.records + [
+            {'subject_id': '2', 'classification_id': '15'}]
+        frames = util.group_chunks(self.args, self.chunks(records))
+
+        assert next(frames).subject_id.tolist() == ['1', '1', '2']
+        with self.assertRaises(util.ReadAgain):
+            next(frames)
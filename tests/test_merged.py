@@ -0,0 +1,44 @@
+"""Test functions in lib/merged.py."""
+
+# pylint: disable=missing-docstring,too-many-arguments,no-self-use
+
+from argparse import Namespace
+import io
+import unittest
+import pandas as pd
+import lib.merged as merged
+
+
+class TestMerged(unittest.TestCase):
+
+    def setUp(self):
+        self.args = Namespace(group_by='subject_id',
+                              key_column='classification_id',
+                              user_column='user_name')
+        self.unreconciled = pd.DataFrame({
+            'subject_id': [1, 1, 1, 2, 3, 3],
+            'classification_id': ['12', '10', '11', '13', '15', '14'],
+            'user_name': ['a', 'b', 'c', 'a', 'b', 'c'],
+            'Country': ['Peru', 'Peru', 'Chile', 'Chile', '', 'Cuba'],
+            'Notes': ['x', 'y, z', 'a "b"', '', 'q', 'r']})
+        index = pd.Index([1, 2, 3], name='subject_id')
+        self.reconciled = pd.DataFrame(
+            {'Country': ['Peru', 'Chile', 'Cuba'],
+             'Notes': ['', 'q', 'r']}, index=index)
+        self.explanations = pd.DataFrame(
+            {'Country': ['Majority match', 'Only 1', 'Only 1'],
+             'Notes': ['No text match', 'Only 1', 'Majority match']},
+            index=index)
+        self.column_types = {
+            'Country': {'type': 'select', 'order': 1, 'name': 'Country'},
+            'Notes': {'type': 'text', 'order': 2, 'name': 'Notes'}}
+
+    def test_write_matches_merge(self):
+        expect = merged.merge(self.args, self.unreconciled, self.reconciled,
+                              self.explanations, self.column_types)
+
+        out_file = io.StringIO()
+        merged.write(self.args, self.unreconciled, self.reconciled,
+                     self.explanations, self.column_types, out_file)
+
+        assert out_file.getvalue() == expect.to_csv(index=False)
@@ -3,9 +3,11 @@
 # pylint: disable=missing-docstring,too-many-arguments,no-self-use
 
 from argparse import Namespace
+import json
 import unittest
 from unittest.mock import patch  # , call
 import pandas as pd
+import lib.util as util
 import lib.formats.nfn as nfn
 
 
@@ -38,3 +40,46 @@ class TestAtramPreprocessor(unittest.TestCase):
         error_exit.assert_called_once_with(
             ('There are multiple workflows in this file. '
              'You must provide a workflow ID as an argument.'))
+
+
+def annotations(*labels):
+    return json.dumps([{'task_label': l, 'value': 'x'} for l in labels])
+
+
+class TestExtractBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({'annotations': [
+            annotations('A', 'B'), annotations('A'),
+            annotations('A', 'C'), annotations('C', 'D')]})
+
+    def test_column_types_are_in_file_order(self):
+        column_types, seen = {}, {}
+
+        # The later rows are in the first batch
+        nfn.extract_batch(self.df.iloc[2:], column_types, seen)
+        batch = nfn.extract_batch(self.df.iloc[:2], column_types, seen)
+
+        expect = {}
+        nfn.extract_annotations(self.df.copy(), expect)
+        assert column_types == expect
+        assert list(column_types) == ['A', 'B', 'C', 'D']
+        assert batch.columns.tolist() == ['A', 'B']
+
+    def test_renamed_later(self):
+        column_types, seen = {}, {}
+        self.df.loc[3, 'annotations'] = annotations('A', 'A')
+
+        nfn.extract_batch(self.df.iloc[:2], column_types, seen)
+        with self.assertRaises(util.ReadAgain):
+            nfn.extract_batch(self.df.iloc[2:], column_types, seen)
+
+    def test_renamed_earlier(self):
+        column_types, seen = {}, {}
+        self.df.loc[0, 'annotations'] = annotations('A', 'A')
+
+        nfn.extract_batch(self.df.iloc[:2], column_types, seen)
+        batch = nfn.extract_batch(self.df.iloc[2:], column_types, seen)
+
+        assert list(column_types) == ['A #1', 'A #2', 'C', 'D']
+        assert batch.columns.tolist() == ['A #1', 'C', 'D']
@@ -0,0 +1,87 @@
+"""Test functions in lib/pipeline.py."""
+
+# pylint: disable=missing-docstring
+
+import time
+import shutil
+import zipfile
+import tempfile
+import threading
+import unittest
+from os.path import join
+from lib.writer import Writer
+from lib.pipeline import Pipeline
+
+
+def write_text(path, text, delay=0.0, writer=None):
+    time.sleep(delay)
+    with writer.open(path) as out_file:
+        out_file.write(text)
+    return threading.current_thread().name
+
+
+def write_binary(path, data, writer=None):
+    with writer.open(path, binary=True) as out_file:
+        out_file.write(data)
+
+
+def fail(writer=None):
+    raise ValueError('Failed')
+
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_sequential(self):
+        path = join(self.temp_dir, 'a.csv')
+        with Writer() as writer, Pipeline(writer) as pipeline:
+            name = pipeline.submit(write_text, path, 'a\n')
+        assert name == threading.current_thread().name
+        with open(path) as in_file:
+            assert in_file.read() == 'a\n'
+
+    def test_zip_keeps_the_submit_order(self):
+        zip_file = join(self.temp_dir, 'out.zip')
+        with Writer(zip_file) as writer, \
+                Pipeline(writer, workers=3) as pipeline:
+            # The first output finishes last
+            pipeline.submit(write_text, join(self.temp_dir, 'a.csv'),
+                            'a\n', delay=0.2)
+            pipeline.submit(write_binary, join(self.temp_dir, 'b.bin'),
+                            b'\x00\x01')
+            pipeline.submit(write_text, join(self.temp_dir, 'c.csv'), 'c\n')
+
+        with zipfile.ZipFile(zip_file) as zippy:
+            assert zippy.namelist() == ['a.csv', 'b.bin', 'c.csv']
+            assert zippy.read('a.csv') == b'a\n'
+            assert zippy.read('b.bin') == b'\x00\x01'
+
+    def test_files_are_written_in_threads(self):
+        path = join(self.temp_dir, 'a.csv')
+        with Writer() as writer, \
+                Pipeline(writer, workers=2) as pipeline:
+            future = pipeline.submit(write_text, path, 'a\n')
+        assert future.result() != threading.current_thread().name
+        with open(path) as in_file:
+            assert in_file.read() == 'a\n'
+
+    def test_errors_are_raised(self):
+        zip_file = join(self.temp_dir, 'out.zip')
+        with self.assertRaises(ValueError):
+            with Writer(zip_file) as writer, \
+                    Pipeline(writer, workers=2) as pipeline:
+                pipeline.submit(fail)
+
+    def test_pending_is_bounded(self):
+        with Writer() as writer, \
+                Pipeline(writer, workers=1, max_pending=1) as pipeline:
+            start = time.perf_counter()
+            pipeline.submit(write_text, join(self.temp_dir, 'a.csv'), 'a',
+                            delay=0.2)
+            pipeline.submit(write_text, join(self.temp_dir, 'b.csv'), 'b')
+            assert time.perf_counter() - start >= 0.2
@@ -0,0 +1,29 @@
+"""Test functions in lib/plural.py."""
+
+# pylint: disable=missing-docstring
+
+import unittest
+import numpy as np
+import inflect
+import lib.plural as plural
+
+
+class TestPlural(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = inflect.engine()
+        self.engine.defnoun('The', 'All')
+
+    def test_same_as_inflect(self):
+        for word in plural.WORDS:
+            for count in [0, 1, 2, 3, np.int64(1), np.int64(2)]:
+                assert plural.plural(word, count) == self.engine.plural(
+                    word, count), (word, count)
+
+    def test_the(self):
+        assert plural.plural('The', 1) == 'The'
+        assert plural.plural('The', 3) == 'All'
+
+    def test_other_words(self):
+        assert plural.plural('match', 2) == 'matches'
+        assert plural.PLURALS['match'] == 'matches'
@@ -0,0 +1,89 @@
+"""Test functions in lib/profiler.py."""
+
+# pylint: disable=missing-docstring,too-many-arguments,no-self-use
+
+from argparse import Namespace
+import unittest
+import lib.profiler as profiler
+
+
+class TestProfiler(unittest.TestCase):
+
+    def tearDown(self):
+        profiler.stop()
+        del profiler.HOOKS[:]
+
+    def test_off_by_default(self):
+        def func(value):
+            return value * 2
+
+        with profiler.stage('nothing'):
+            profiler.count('rows', 10)
+
+        assert profiler.timed('column', func) is func
+        assert profiler.stop() is None
+
+    def test_wanted(self):
+        assert not profiler.wanted(Namespace(profile=None))
+        assert profiler.wanted(Namespace(profile='profile.json'))
+
+        profiler.add_hook(print)
+        assert profiler.wanted(Namespace(profile=None))
+
+    def test_report(self):
+        profiler.start()
+
+        with profiler.stage('read'):
+            pass
+        with profiler.stage('read'):
+            pass
+        timed = profiler.timed('Country', lambda v: v + 1)
+        assert [timed(1), timed(2)] == [2, 3]
+        profiler.count('rows', 5)
+        profiler.count('text_stages:blank')
+        profiler.count('text_stages:blank', 2)
+
+        report = profiler.stop()
+
+        assert report['stages']['read']['calls'] == 2
+        assert report['columns']['Country']['calls'] == 2
+        assert report['counts'] == {'rows': 5, 'text_stages': {'blank': 3}}
+        assert report['wall'] >= 0
+        assert set(report['stages']['read']) == {'wall', 'cpu', 'calls'}
+        assert list(report['stage_peak_rss_mb']) == ['read']
+
+    def test_merge(self):
+        profiler.start()
+        profiler.count('text_stages:blank')
+        worker = profiler.Profile()
+        with worker.stage('reconcile.batch'):
+            pass
+        worker.count('rows', 2)
+        worker.count('text_stages:blank', 2)
+
+        profiler.merge(worker)
+        profiler.merge(None)
+        report = profiler.stop()
+
+        assert report['stages']['reconcile.batch']['calls'] == 1
+        assert report['counts'] == {'text_stages': {'blank': 3}, 'rows': 2}
+
+    def test_detach(self):
+        profile = profiler.start()
+        profiler.count('rows')
+
+        assert profiler.detach() is profile
+        assert profiler.PROFILE is None
+        assert profile.counts == {'rows': 1}
+
+    def test_hooks(self):
+        reports = []
+        profiler.add_hook(reports.append)
+
+        profiler.start()
+        profiler.count('groups', 3)
+        report = profiler.stop()
+
+        assert reports == [report]
+        profiler.remove_hook(reports.append)
+        assert profiler.HOOKS == []
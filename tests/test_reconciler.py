@@ -0,0 +1,49 @@
+"""Test functions in lib/reconciler.py."""
+
+# pylint: disable=missing-docstring
+
+from argparse import Namespace
+import unittest
+import pandas as pd
+import lib.util as util
+import lib.reconciler as reconciler
+
+
+class TestReconciler(unittest.TestCase):
+
+    def setUp(self):
+        self.args = Namespace(
+            group_by='subject_id', key_column='classification_id',
+            user_column='user_name')
+        self.df = pd.DataFrame({
+            'subject_id': [1, 1, 2, 2],
+            'classification_id': ['1', '2', '3', '4'],
+            'user_name': ['a', 'b', 'a', 'b'],
+            'Country': ['Peru', 'Peru', 'Chile', '']})
+        self.column_types = {
+            'Country': {'type': 'select', 'order': 1, 'name': 'Country'}}
+        self.plugins = util.get_plugins('column_types')
+
+    def test_build(self):
+        reconciled, explanations = reconciler.build(
+            self.args, self.df, self.column_types, plugins=self.plugins)
+        assert reconciled.Country.tolist() == ['Peru', 'Chile']
+        assert explanations.Country.tolist() == [
+            'Unanimous match, 2 of 2 records',
+            'Only 1 transcript in 2 records']
+
+    def test_build_without_explanations(self):
+        reconciled, explanations = reconciler.build(
+            self.args, self.df, self.column_types, plugins=self.plugins,
+            explain=False)
+        assert reconciled.Country.tolist() == ['Peru', 'Chile']
+        assert explanations.columns.tolist() == []
+        assert explanations.index.tolist() == [1, 2]
+
+    def test_explains(self):
+        assert not reconciler.explains(Namespace(reconciled='r.csv'))
+        assert not reconciler.explains(
+            Namespace(reconciled='r.csv', summary=None, sample=None))
+        assert reconciler.explains(Namespace(summary='s.html'))
+        assert reconciler.explains(Namespace(merged='m.csv'))
+        assert reconciler.explains(Namespace(sample=10))
@@ -0,0 +1,77 @@
+"""Test functions in lib/sample.py."""
+
+# pylint: disable=missing-docstring
+
+from argparse import Namespace
+import io
+import unittest
+import pandas as pd
+import lib.sample as sample
+
+
+class TestSample(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'subject_id': [i // 3 for i in range(60)],
+            'value': [str(i) for i in range(60)]})
+
+    def test_select_is_repeatable(self):
+        picks = []
+        for _ in range(2):
+            args = Namespace(sample=5, sample_seed=7, group_by='subject_id')
+            df, _ = sample.select(args, self.df)
+            picks.append(sorted(df.subject_id.unique()))
+            assert args.sample_total == 20
+            assert df.shape[0] == 15
+        assert picks[0] == picks[1]
+
+        args = Namespace(sample=5, sample_seed=8, group_by='subject_id')
+        df, _ = sample.select(args, self.df)
+        assert sorted(df.subject_id.unique()) != picks[0]
+
+    def test_select_subjects(self):
+        args = Namespace(sample=2, sample_seed=0, group_by='subject_id')
+        subjects = pd.DataFrame(
+            {'subject_x': [str(i) for i in range(20)]},
+            index=pd.Index(range(20), name='subject_id'))
+        df, subjects = sample.select(args, self.df, subjects)
+        assert sorted(subjects.index) == sorted(df.subject_id.unique())
+
+    def test_select_after_the_reader(self):
+        args = Namespace(sample=2, sample_seed=0, group_by='subject_id',
+                         sample_total=20)
+        df, _ = sample.select(args, self.df)
+        assert df.shape == self.df.shape
+
+    def test_more_than_all(self):
+        args = Namespace(sample=50, sample_seed=0, group_by='subject_id')
+        df, _ = sample.select(args, self.df)
+        assert df.shape == self.df.shape
+
+    def test_match_rates(self):
+        explanations = pd.DataFrame({
+            'a': ['Unanimous match, 3 of 3 records',
+                  'Majority match, 2 of 3 records',
+                  'No text match on 3 records',
+                  'Unanimous match, 2 of 3 records']})
+        column_types = {'a': {'type': 'text', 'order': 1, 'name': 'a'}}
+
+        rates = sample.match_rates(explanations, column_types)
+        assert rates[0]['num_unanimous_match'] == 50.0
+        assert rates[0]['num_majority_match'] == 25.0
+        assert rates[0]['num_no_match'] == 25.0
+        assert rates[0]['num_fuzzy_match'] == 0.0
+        assert rates[0]['num_mmr'] is None
+
+        args = Namespace(sample_total=40, sample_seed=0)
+        out_file = io.StringIO()
+        sample.report_rates(args, explanations, column_types, out_file)
+        assert 'Sampled 4 of 40 subjects' in out_file.getvalue()
+
+    def test_estimate(self):
+        args = Namespace(format='nfn', sample=10, sample_total=100)
+        report = {'wall': 5.0, 'stages': {
+            'read': {'wall': 3.0}, 'read.flatten': {'wall': 1.0}}}
+        # 2s to parse the CSV once and 3s for 10 of 100 subjects
+        assert sample.estimate(args, report) == 32.0
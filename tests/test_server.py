@@ -0,0 +1,88 @@
+"""Test functions in lib/server.py."""
+
+# pylint: disable=missing-docstring,too-many-arguments,no-self-use
+
+import json
+import asyncio
+import unittest
+from lib.server import Server, run_request
+
+
+async def send(port, head, body=b''):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(head.encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    status, _, data = response.partition(b'\r\n\r\n')
+    return int(status.split()[1]), json.loads(data.decode())
+
+
+class TestServer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.loop = asyncio.new_event_loop()
+        cls.server = Server(workers=1, max_waiting=1)
+        server = cls.loop.run_until_complete(
+            cls.server.start(host='127.0.0.1', port=0))
+        cls.port = server.sockets[0].getsockname()[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.loop.run_until_complete(cls.server.stop())
+        cls.loop.close()
+
+    def request(self, head, body=b''):
+        return self.loop.run_until_complete(send(self.port, head, body))
+
+    def test_health(self):
+        code, body = self.request('GET /health HTTP/1.1\r\n\r\n')
+
+        assert code == 200
+        assert body['status'] == 'ok'
+        assert body['workers'] == 1
+        assert body['running'] == 0
+
+    def test_unknown_path(self):
+        code, _ = self.request('GET /nothing HTTP/1.1\r\n\r\n')
+        assert code == 404
+
+    def test_wrong_method(self):
+        code, _ = self.request('GET /reconcile HTTP/1.1\r\n\r\n')
+        assert code == 405
+
+    def test_bad_request(self):
+        code, _ = self.request('garbage\r\n\r\n')
+        assert code == 400
+
+    def test_bad_arguments(self):
+        body = json.dumps({'args': ['--no-such-option']}).encode()
+        head = 'POST /reconcile HTTP/1.1\r\nContent-Length: {}\r\n\r\n'
+
+        code, response = self.request(head.format(len(body)), body)
+
+        assert code == 400
+        assert response['status'] == 'failed'
+        assert 'error:' in response['log']
+        assert response['files'] == {}
+
+        _, health = self.request('GET /health HTTP/1.1\r\n\r\n')
+        assert health['failed'] >= 1
+
+    def test_body_is_not_an_object(self):
+        head = 'POST /reconcile HTTP/1.1\r\nContent-Length: {}\r\n\r\n'
+        for body in [b'[]', b'"x"', b'1']:
+            code, response = self.request(head.format(len(body)), body)
+
+            assert code == 400
+            assert response['error'] == 'The body must be a JSON object'
+
+
+class TestRunRequest(unittest.TestCase):
+
+    def test_export_is_not_returned(self):
+        code, body = run_request(['--no-such-option'], export='a,b\n1,2\n')
+
+        assert code == 400
+        assert body['files'] == {}
@@ -0,0 +1,48 @@
+"""Test functions in lib/shard.py."""
+
+# pylint: disable=missing-docstring
+
+from argparse import Namespace
+import unittest
+import pandas as pd
+import lib.shard as shard
+
+
+class TestShard(unittest.TestCase):
+
+    def test_split(self):
+        assert shard.split('2/5') == (2, 5)
+        assert shard.split('2') == (None, None)
+        assert shard.split('a/b') == (None, None)
+
+    def test_is_valid(self):
+        assert shard.is_valid('1/1')
+        assert shard.is_valid('3/3')
+        assert not shard.is_valid('0/3')
+        assert not shard.is_valid('4/3')
+        assert not shard.is_valid('1/0')
+        assert not shard.is_valid('x')
+
+    def test_select_partitions_the_groups(self):
+        df = pd.DataFrame({
+            'subject_id': [i // 2 for i in range(40)],
+            'value': [str(i) for i in range(40)]})
+        subjects = pd.DataFrame(
+            {'subject_external_id': [str(i) for i in range(20)]},
+            index=pd.Index(range(20), name='subject_id'))
+
+        parts = []
+        for number in range(1, 4):
+            args = Namespace(shard='{}/3'.format(number),
+                             group_by='subject_id')
+            part, part_subjects = shard.select(args, df, subjects)
+            assert set(part.subject_id) == set(part_subjects.index)
+            parts.append(part)
+
+        combined = pd.concat(parts).sort_index()
+        pd.testing.assert_frame_equal(combined, df)
+
+    def test_select_without_shard(self):
+        args = Namespace(shard=None, group_by='subject_id')
+        df = pd.DataFrame({'subject_id': [1, 2]})
+        assert shard.select(args, df) == (df, None)
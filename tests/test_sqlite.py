@@ -0,0 +1,91 @@
+"""Test functions in lib/sqlite.py."""
+
+# pylint: disable=missing-docstring
+
+from argparse import Namespace
+import shutil
+import sqlite3
+import zipfile
+import tempfile
+import unittest
+from os.path import join
+import pandas as pd
+import lib.sqlite as sqlite
+from lib.writer import Writer
+
+
+class TestSqlite(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.args = Namespace(
+            group_by='subject_id', key_column='classification_id',
+            user_column='user_name', sqlite=join(self.temp_dir, 'out.db'))
+        self.unreconciled = pd.DataFrame({
+            'subject_id': [1, 1, 2],
+            'classification_id': ['10', '11', '12'],
+            'user_name': ['a', 'b', 'a'],
+            'Locality': ['Lima', 'Cusco', None]})
+        self.reconciled = pd.DataFrame(
+            {'Locality': ['', 'Quito']},
+            index=pd.Index([1, 2], name='subject_id'))
+        self.explanations = pd.DataFrame(
+            {'Locality': ['No text match on 2 records',
+                          'Only 1 transcript in 1 record']},
+            index=pd.Index([1, 2], name='subject_id'))
+        self.column_types = {
+            'Locality': {'type': 'text', 'order': 1, 'name': 'Locality'}}
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def save(self, writer):
+        sqlite.save(self.args, self.unreconciled, self.reconciled,
+                    self.explanations, self.column_types, writer)
+
+    def test_save(self):
+        self.save(Writer())
+
+        con = sqlite3.connect(self.args.sqlite)
+        assert con.execute(
+            'SELECT * FROM unreconciled ORDER BY classification_id'
+        ).fetchall() == [(1, '10', 'a', 'Lima'), (1, '11', 'b', 'Cusco'),
+                         (2, '12', 'a', None)]
+        assert con.execute(
+            'SELECT * FROM reconciled').fetchall() == [(1, ''), (2, 'Quito')]
+        assert con.execute(
+            'SELECT subject_id, field, outcome, problem, reconciled '
+            'FROM outcomes ORDER BY subject_id').fetchall() == [
+                (1, 'Locality', 'no_match', 1, ''),
+                (2, 'Locality', 'onesie', 1, 'Quito')]
+        assert con.execute(
+            'SELECT * FROM columns').fetchall() == [('Locality', 'text', 1)]
+
+        names = {r[0] for r in con.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert names == {
+            'unreconciled_subject_id', 'unreconciled_classification_id',
+            'unreconciled_user_name', 'reconciled_subject_id',
+            'explanations_subject_id', 'outcomes_subject_id',
+            'outcomes_field_outcome', 'outcomes_outcome', 'outcomes_problem'}
+        con.close()
+
+    def test_save_replaces_the_file(self):
+        self.save(Writer())
+        self.save(Writer())
+        con = sqlite3.connect(self.args.sqlite)
+        assert con.execute('SELECT COUNT(*) FROM reconciled').fetchone() == (
+            2,)
+        con.close()
+
+    def test_save_into_zip(self):
+        zip_file = join(self.temp_dir, 'out.zip')
+        with Writer(zip_file) as writer:
+            self.save(writer)
+
+        with zipfile.ZipFile(zip_file) as zippy:
+            assert zippy.namelist() == ['out.db']
+            path = zippy.extract('out.db', join(self.temp_dir, 'x'))
+        con = sqlite3.connect(path)
+        assert con.execute('SELECT COUNT(*) FROM outcomes').fetchone() == (2,)
+        con.close()
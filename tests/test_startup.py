@@ -0,0 +1,88 @@
+"""Guard the start up time of reconcile.py."""
+
+# pylint: disable=missing-docstring,too-many-arguments,no-self-use
+
+import os
+import sys
+import tempfile
+import subprocess
+import unittest
+
+# An unreconciled export does not reconcile or summarize anything
+RECONCILE_MODULES = ['scipy', 'inflect', 'fuzzywuzzy', 'jinja2']
+
+HEAVY_MODULES = ['pandas', 'numpy', 'scipy', 'inflect', 'fuzzywuzzy',
+                 'dateutil', 'jinja2', 'pyarrow']
+
+# Run the code and print the modules that were imported
+SCRIPT = """
+import sys
+{}
+print('\\n'.join(sys.modules))
+"""
+
+
+def imported_modules(code):
+    output = subprocess.check_output(
+        [sys.executable, '-c', SCRIPT.format(code)])
+    return output.decode('utf-8').splitlines()
+
+
+class TestStartup(unittest.TestCase):
+
+    def assert_not_imported(self, modules):
+        heavy = [m for m in modules if m.split('.')[0] in HEAVY_MODULES]
+        assert heavy == []
+
+    def test_help(self):
+        code = '\n'.join([
+            'import runpy',
+            'sys.argv = ["reconcile.py", "--help"]',
+            'try:',
+            '    runpy.run_path("reconcile.py", run_name="__main__")',
+            'except SystemExit:',
+            '    pass'])
+
+        self.assert_not_imported(imported_modules(code))
+
+    def test_plugins_are_lazy(self):
+        code = '\n'.join([
+            'import lib.util as util',
+            'plugins = util.get_plugins("column_types")',
+            'assert sorted(plugins) == '
+            '["mmm", "mmr", "same", "select", "text"]',
+            'plugins["same"]'])
+
+        modules = imported_modules(code)
+
+        self.assert_not_imported(modules)
+        assert 'lib.column_types.same' in modules
+        assert 'lib.column_types.text' not in modules
+
+    def test_sqlite_does_not_load_the_report(self):
+        modules = imported_modules('import lib.sqlite')
+        assert [m for m in modules if m.startswith('jinja2')] == []
+
+    def test_unreconciled_export(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            in_path = os.path.join(temp_dir, 'input.csv')
+            out_path = os.path.join(temp_dir, 'unreconciled.csv')
+            with open(in_path, 'w') as out_file:
+                out_file.write('subject_id,classification_id,user_name,'
+                               'Country\n'
+                               '1,1,a,Peru\n'
+                               '1,2,b,Chile\n')
+            code = '\n'.join([
+                'import runpy',
+                'sys.argv = ["reconcile.py", "-f", "csv",',
+                '            "--user-column", "user_name",',
+                '            "-c", "Country:select",',
+                '            "-u", {!r}, {!r}]'.format(out_path, in_path),
+                'runpy.run_path("reconcile.py", run_name="__main__")'])
+
+            modules = imported_modules(code)
+
+            assert os.path.exists(out_path)
+
+        loaded = [m for m in modules if m.split('.')[0] in RECONCILE_MODULES]
+        assert loaded == []
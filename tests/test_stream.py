@@ -0,0 +1,170 @@
+"""Test functions in lib/stream.py."""
+
+# pylint: disable=missing-docstring
+
+from argparse import Namespace
+import io
+import unittest
+from unittest.mock import patch
+import pandas as pd
+import lib.util as util
+import lib.profiler as profiler
+import lib.reconciler as reconciler
+import lib.checkpoint as checkpoint
+import lib.stream as stream
+
+
+class TestStream(unittest.TestCase):
+
+    def setUp(self):
+        self.args = Namespace(
+            format='csv', group_by='subject_id',
+            key_column='classification_id', user_column='user_name',
+            shard=None, sample=None, column_types=None, user_weights={},
+            fuzzy_ratio_threshold=90, fuzzy_set_threshold=50,
+            summary='summary.html')
+        self.df = pd.DataFrame({
+            'subject_id': [i // 2 for i in range(10)],
+            'classification_id': [str(i) for i in range(10)],
+            'user_name': ['a', 'b'] * 5,
+            'Country': ['Peru', 'Peru', 'Chile', 'Peru'] * 2 + ['Peru'] * 2})
+        self.subjects = pd.DataFrame(
+            {'subject_name': ['s{}'.format(i) for i in range(5)]},
+            index=pd.Index(range(5), name='subject_id'))
+        self.column_types = {
+            'Country': {'type': 'select', 'order': 1, 'name': 'Country'}}
+        self.plugins = util.get_plugins('column_types')
+
+    def test_split(self):
+        batches = list(stream.split(
+            self.args, self.df, self.subjects, size=2))
+
+        assert [b.subject_id.unique().tolist() for b, _ in batches] == [
+            [0, 1], [2, 3], [4]]
+        assert [s.index.tolist() for _, s in batches] == [[0, 1], [2, 3], [4]]
+        pd.testing.assert_frame_equal(
+            pd.concat([b for b, _ in batches]), self.df)
+
+    def test_split_nothing(self):
+        assert list(stream.split(self.args, self.df.iloc[:0], None)) == []
+
+    @patch('lib.stream.split')
+    def test_read_chunks(self, split):
+        split.side_effect = lambda args, df, subjects: [(df, subjects)]
+        chunks = [self.df.iloc[:3], self.df.iloc[3:7], self.df.iloc[7:]]
+        reader = Namespace(read_chunks=lambda args: iter(chunks))
+
+        column_types, count, batches = stream.read(self.args, reader)
+
+        # Subject 1's rows are in two chunks
+        assert [b.subject_id.unique().tolist() for b, _ in batches] == [
+            [0], [1, 2], [3], [4]]
+        assert column_types == {}
+        assert count is None
+
+    def test_reconcile_matches_one_build(self):
+        batches = stream.split(self.args, self.df, self.subjects, size=2)
+        unreconciled, subjects, reconciled, explanations = stream.reconcile(
+            self.args, batches, self.column_types, workers=0)
+
+        expect = reconciler.build(
+            self.args, self.df, self.column_types, plugins=self.plugins)
+        pd.testing.assert_frame_equal(unreconciled, self.df)
+        pd.testing.assert_frame_equal(subjects, self.subjects)
+        pd.testing.assert_frame_equal(reconciled, expect[0])
+        pd.testing.assert_frame_equal(explanations, expect[1])
+
+    def test_reconcile_in_workers(self):
+        batches = stream.split(self.args, self.df, None, size=1)
+        _, subjects, reconciled, explanations = stream.reconcile(
+            self.args, batches, self.column_types, workers=2)
+
+        expect = reconciler.build(
+            self.args, self.df, self.column_types, plugins=self.plugins)
+        assert subjects is None
+        pd.testing.assert_frame_equal(reconciled, expect[0])
+        pd.testing.assert_frame_equal(explanations, expect[1])
+
+    @patch('lib.stream.MAX_PENDING', 1)
+    def test_reader_waits_for_the_workers(self):
+        read, done = [], []
+
+        def _batches():
+            for batch, subjects in stream.split(
+                    self.args, self.df, None, size=1):
+                read.append(batch)
+                yield batch, subjects
+
+        def _prepare(unreconciled, subjects):
+            # The earlier batches are reconciled before the next one is read
+            assert len(read) - len(done) == 1
+            return unreconciled, subjects, self.column_types
+
+        progress = Namespace(done=done.append, finish=lambda: None)
+        stream.reconcile(self.args, _batches(), self.column_types,
+                         workers=1, prepare=_prepare, progress=progress)
+        assert len(done) == 5
+
+    def test_prepare(self):
+        column_types = {
+            'Country': {'type': 'text', 'order': 1, 'name': 'Country'}}
+
+        def _prepare(unreconciled, subjects):
+            return unreconciled, subjects, column_types
+
+        batches = stream.split(self.args, self.df, None, size=2)
+        _, _, _, explanations = stream.reconcile(
+            self.args, batches, self.column_types, workers=0,
+            prepare=_prepare)
+
+        expect = reconciler.build(
+            self.args, self.df, column_types, plugins=self.plugins)
+        pd.testing.assert_frame_equal(explanations, expect[1])
+
+    def test_progress(self):
+        out_file = io.StringIO()
+        progress = checkpoint.Progress(5, out_file=out_file)
+
+        batches = stream.split(self.args, self.df, None, size=2)
+        stream.reconcile(self.args, batches, self.column_types, workers=0,
+                         progress=progress)
+
+        assert 'Reconciled 5 of 5 subjects' in out_file.getvalue()
+
+    def test_workers_send_their_profiles(self):
+        batches = stream.split(self.args, self.df, None, size=2)
+
+        profiler.start()
+        try:
+            stream.reconcile(self.args, batches, self.column_types, workers=1)
+        finally:
+            report = profiler.stop()
+
+        assert report['stages']['reconcile.batch']['calls'] == 3
+        assert report['columns']['Country']['calls'] == 5  # Per subject
+
+    def test_columns_found_later(self):
+        df = self.df.assign(Notes=['x', 'y'] * 5)
+        notes = {'Notes': {'type': 'select', 'order': 2, 'name': 'Notes'}}
+        column_types = dict(notes)
+
+        def _batches():
+            for batch, subjects in stream.split(self.args, df, None, size=2):
+                if batch.subject_id.iat[0] == 0:
+                    batch = batch.drop(['Country'], axis=1)
+                else:
+                    column_types.update(self.column_types)
+                yield batch, subjects
+
+        _, _, reconciled, explanations = stream.reconcile(
+            self.args, _batches(), column_types, workers=0)
+
+        df.loc[df.subject_id < 2, 'Country'] = ''
+        expect = reconciler.build(
+            self.args, df, dict(notes, **self.column_types),
+            plugins=self.plugins)
+        pd.testing.assert_frame_equal(
+            reconciled, expect[0].reindex(columns=reconciled.columns))
+        pd.testing.assert_frame_equal(
+            explanations, expect[1].reindex(columns=explanations.columns))
+        assert set(reconciled.columns) == set(expect[0].columns)
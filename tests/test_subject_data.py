@@ -0,0 +1,93 @@
+"""Test functions in lib/subject_data.py."""
+
+# pylint: disable=missing-docstring,too-many-arguments,no-self-use
+
+from argparse import Namespace
+import json
+import unittest
+import pandas as pd
+import lib.subject_data as subject_data
+
+
+def blob(subject_id, **data):
+    return json.dumps({str(subject_id): data})
+
+
+class TestSubjectData(unittest.TestCase):
+
+    def setUp(self):
+        self.args = Namespace(group_by='subject_id',
+                              key_column='classification_id',
+                              user_column='user_name')
+        self.df = pd.DataFrame({
+            'subject_id': [1, 1, 2, 2],
+            'classification_id': ['10', '11', '12', '13'],
+            'user_name': ['a', 'b', 'a', 'b'],
+            'Country': ['Peru', 'Peru', 'Chile', 'Cuba'],
+            'subject_data': [
+                blob(1, retired=None, id='x1', image='1.jpg'),
+                blob(1, retired={'id': 1}, id='x1', image='1.jpg'),
+                blob(2, retired=None, id='x2', image='2.jpg'),
+                blob(2, retired=None, id='x2', image='2b.jpg')]},
+            columns=['subject_id', 'classification_id', 'user_name',
+                     'Country', 'subject_data'])
+        self.column_types = {
+            'Country': {'type': 'select', 'order': 1, 'name': 'Country'}}
+
+    def test_extract(self):
+        subjects = subject_data.extract(self.args, self.df, self.column_types)
+
+        assert sorted(subjects.columns) == [
+            'subject_external_id', 'subject_image']
+        assert subjects.index.name == 'subject_id'
+        assert subjects.loc[2, 'subject_image'] == '2.jpg'
+        assert self.column_types['subject_image']['type'] == 'same'
+        assert self.column_types['subject_image']['order'] > 1
+
+    def test_check(self):
+        subjects = subject_data.extract(self.args, self.df, self.column_types)
+
+        checked = subject_data.check(self.args, self.df, subjects)
+
+        assert checked.loc[1, 'subject_image'] == '1.jpg'
+        assert checked.loc[2, 'subject_image'] == ''
+        assert checked.loc[2, 'subject_external_id'] == 'x2'
+        assert subjects.loc[2, 'subject_image'] == '2.jpg'
+
+    def test_join_unreconciled(self):
+        df = self.df.drop(['subject_data'], axis=1)
+        subjects = subject_data.extract(self.args, self.df, self.column_types)
+
+        joined = subject_data.join(self.args, df, subjects, self.column_types)
+
+        assert list(joined.subject_image) == ['1.jpg', '1.jpg',
+                                              '2.jpg', '2.jpg']
+        assert list(joined.columns[:4]) == [
+            'subject_id', 'classification_id', 'user_name', 'Country']
+
+    def test_join_reconciled(self):
+        subjects = subject_data.extract(self.args, self.df, self.column_types)
+        reconciled = pd.DataFrame(
+            {'Country': ['Peru', '']},
+            index=pd.Index([1, 2], name='subject_id'))
+
+        joined = subject_data.join(
+            self.args, reconciled, subjects, self.column_types)
+
+        assert joined.loc[2, 'subject_external_id'] == 'x2'
+        assert joined.columns[0] == 'Country'
+
+    def test_join_without_subjects(self):
+        assert subject_data.join(
+            self.args, self.df, None, self.column_types) is self.df
+
+    def test_split(self):
+        df = self.df.drop(['subject_data'], axis=1)
+        subjects = subject_data.extract(self.args, self.df, self.column_types)
+        self.column_types['subject_image']['type'] = 'text'
+
+        df, subjects = subject_data.split(
+            self.args, df, subjects, self.column_types)
+
+        assert list(subjects.columns) == ['subject_external_id']
+        assert list(df.subject_image) == ['1.jpg', '1.jpg', '2.jpg', '2.jpg']
@@ -0,0 +1,80 @@
+"""Test functions in lib/subject_index.py."""
+
+# pylint: disable=missing-docstring
+
+from argparse import Namespace
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from os.path import exists, join
+from unittest.mock import patch
+import lib.subject_index as subject_index
+
+CSV = ('﻿subject_ids,classification_id,notes\n'
+       '10;11,1,"one"\n'
+       '20,2,"two\nlines"\n'
+       '10,3,"three, with a comma"\n'
+       '30,4,\n')
+
+
+class TestSubjectIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.input_file = join(self.temp_dir, 'input.csv')
+        with open(self.input_file, 'w', encoding='utf-8', newline='') as f:
+            f.write(CSV)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_build(self):
+        index = subject_index.build(
+            self.input_file, 'subject_ids', first=True)
+
+        assert index['keys'].tolist() == ['10', '20', '10', '30']
+        with open(self.input_file, 'rb') as in_file:
+            data = in_file.read()
+        records = [data[o:o + n].decode('utf-8') for o, n
+                   in zip(index['offsets'], index['lengths'])]
+        assert records == ['10;11,1,"one"\n', '20,2,"two\nlines"\n',
+                           '10,3,"three, with a comma"\n', '30,4,\n']
+
+    def test_read_csv(self):
+        args = Namespace(input_file=self.input_file, subjects=['10', '20'])
+        df = subject_index.read_csv(args, 'subject_ids', first=True)
+
+        assert df.columns.tolist() == [
+            'subject_ids', 'classification_id', 'notes']
+        assert df.classification_id.tolist() == ['1', '2', '3']
+        assert df.notes.tolist()[1] == 'two\nlines'
+        assert exists(subject_index.index_path(self.input_file))
+
+    def test_index_is_reused_until_the_input_changes(self):
+        args = Namespace(input_file=self.input_file, subjects=['30'])
+        subject_index.read_csv(args, 'subject_ids', first=True)
+
+        with patch('lib.subject_index.build',
+                   wraps=subject_index.build) as build:
+            subject_index.read_csv(args, 'subject_ids', first=True)
+            assert build.call_count == 0
+
+            with open(self.input_file, 'a', encoding='utf-8') as f:
+                f.write('30,5,more\n')
+            stat = os.stat(self.input_file)
+            os.utime(self.input_file, (stat.st_atime, stat.st_mtime + 10))
+
+            df = subject_index.read_csv(args, 'subject_ids', first=True)
+            assert build.call_count == 1
+        assert df.classification_id.tolist() == ['4', '5']
+
+    def test_read_records_without_mmap(self):
+        in_file = io.BytesIO(b'head\nrow 1\nrow 2\n')
+        data = subject_index.read_records(in_file, 5, [11], [6])
+        assert data == b'head\nrow 2\n'
+
+    def test_subject_list(self):
+        args = Namespace(subjects=['1, 2', '3,'])
+        assert subject_index.subject_list(args) == ['1', '2', '3']
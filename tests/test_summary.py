@@ -0,0 +1,123 @@
+"""Test functions in lib/summary.py."""
+
+# pylint: disable=missing-docstring,too-many-arguments,no-self-use
+
+from argparse import Namespace
+import re
+import json
+import gzip
+import base64
+import shutil
+import tempfile
+import unittest
+import subprocess
+from os.path import join
+import pandas as pd
+import lib.summary as summary
+from lib.writer import Writer
+
+
+class TestSummary(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_write_shards(self):
+        args = Namespace(summary=join(self.temp_dir, 'summary.html'),
+                         summary_shard_size=2)
+        groups = {str(i): {'reconciled': {'a': str(i)}} for i in range(5)}
+
+        shards = summary.write_shards(
+            args, sorted(groups.items()), Writer())
+
+        assert shards == {'dir': 'summary_shards', 'size': 2}
+        paths = summary.shard_files(args)
+        assert len(paths) == 3
+
+        with open(paths[2]) as in_file:
+            match = re.match(r'addShard\((\d+), "(.*)"\);', in_file.read())
+        data = gzip.decompress(base64.b64decode(match.group(2)))
+        assert match.group(1) == '2'
+        assert json.loads(data.decode('utf-8')) == {'4': groups['4']}
+
+    def test_get_groups(self):
+        args = Namespace(group_by='subject_id')
+        unreconciled = pd.DataFrame({
+            'subject_id': ['1', '1', '2', '10'],
+            'a': ['x', 'y', 'z', 'w']})
+        reconciled = pd.DataFrame(
+            {'a': ['x', 'z', 'w']},
+            index=pd.Index([1, 2, 10], name='subject_id'))
+        explanations = pd.DataFrame(
+            {'a': ['Majority', 'Only 1', 'Only 1']},
+            index=pd.Index([1, 2, 10], name='subject_id'))
+
+        groups = list(summary.get_groups(
+            args, unreconciled, reconciled, explanations))
+        assert [k for k, _ in groups] == ['1', '2', '10']
+        assert groups[0][1] == {
+            'reconciled': {'a': 'x'},
+            'explanations': {'a': 'Majority'},
+            'unreconciled': [{'subject_id': '1', 'a': 'x'},
+                             {'subject_id': '1', 'a': 'y'}]}
+        assert ''.join(summary.groups_js(groups)) == str(dict(groups))
+
+        order = [0, 2, 1]
+        groups = summary.get_groups(
+            args, unreconciled, reconciled.iloc[order, :], explanations,
+            sort=True)
+        assert [(k, g['unreconciled'][0]['a']) for k, g in groups] == [
+            ('1', 'x'), ('10', 'w'), ('2', 'z')]
+
+    def test_get_filters(self):
+        args = Namespace(group_by='subject_id', key_column='classification_id',
+                         user_column='user_name')
+        explanations = pd.DataFrame(
+            {'a': ['Only 1 transcript in', 'Majority', 'Only 1 transcript in'],
+             'b': ['Majority', 'Majority', 'No text match on']},
+            index=pd.Index([1, 2, 10], name='subject_id'))
+        column_types = {'a': {'type': 'text', 'order': 1, 'name': 'a'},
+                        'b': {'type': 'text', 'order': 2, 'name': 'b'}}
+
+        filters = summary.get_filters(
+            args, ['1', '10', '2'], explanations, column_types)
+        assert filters['__select__'] == [
+            'Show All', 'Show All Problems',
+            'Show problems with: a', 'Show problems with: b']
+        assert filters['Show All'] == [0, 1, 2]
+        assert filters['Show All Problems'] == [0, 1]
+        assert filters['Show problems with: a'] == [0, 1]
+        assert filters['Show problems with: b'] == [1]
+
+    def test_shard_files_single_file_report(self):
+        args = Namespace(summary=join(self.temp_dir, 'summary.html'),
+                         summary_shard_size=0)
+
+        assert summary.shard_files(args) == []
+
+    def test_create_links(self):
+        df = pd.DataFrame({
+            'location': ['', 'https://example.com/a.jpg', 'not a link'],
+            'text': ['http://example.com', 'no links', 'here']})
+
+        df = summary.create_links(df)
+
+        assert df.location.tolist() == [
+            '',
+            ('<a href="https://example.com/a.jpg" target="_blank">'
+             'https://example.com/a.jpg</a>'),
+            'not a link']
+        assert df.text.tolist() == ['http://example.com', 'no links', 'here']
+
+    @unittest.skipUnless(shutil.which('node'), 'node is not installed')
+    def test_detail_rows_are_windowed(self):
+        output = subprocess.check_output([
+            'node', 'tests/js/benchmark_reconciliation.js', '2000', '500'])
+        results = json.loads(output.decode('utf-8'))
+
+        assert results['table_rows'] < 100
+        for step in ['filters', 'pages', 'open_all', 'scroll', 'toggle_one']:
+            assert results[step]['created'] == 0
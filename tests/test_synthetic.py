@@ -0,0 +1,48 @@
+"""Test functions in benchmarks/synthetic.py."""
+
+# pylint: disable=missing-docstring,too-many-arguments,no-self-use
+
+import io
+import json
+import unittest
+import pandas as pd
+import lib.formats.nfn as nfn
+from benchmarks import synthetic
+
+
+class TestSynthetic(unittest.TestCase):
+
+    def setUp(self):
+        self.args = synthetic.parse_command_line(
+            ['-o', 'unused.csv', '--subjects', '4', '--transcripts', '3',
+             '--select', '2', '--text', '2', '--numeric', '1'])
+
+    def generate(self):
+        out_file = io.StringIO()
+        synthetic.generate(self.args, out_file)
+        out_file.seek(0)
+        return pd.read_csv(out_file, dtype=str)
+
+    def test_generate_rows(self):
+        df = self.generate()
+
+        assert df.shape[0] == 12
+        assert df.subject_ids.nunique() == 4
+        assert set(df.workflow_id) == {'1001'}
+        assert df.groupby('subject_ids').user_name.nunique().min() == 3
+
+    def test_generate_annotations(self):
+        df = self.generate()
+        column_types = {}
+
+        nfn.flatten_annotations(json.loads(df.annotations[0]), column_types)
+
+        assert {k: v['type'] for k, v in column_types.items()} == {
+            'Select 1': 'select', 'Select 2': 'select',
+            'Text 1': 'text', 'Text 2': 'text', 'Number 1': 'text'}
+
+    def test_generate_is_repeatable(self):
+        assert self.generate().equals(self.generate())
+
+    def test_column_types(self):
+        assert synthetic.column_types(self.args) == 'Number 1:mmr'
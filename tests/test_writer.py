@@ -0,0 +1,74 @@
+"""Test functions in lib/writer.py."""
+
+# pylint: disable=missing-docstring,too-many-arguments,no-self-use
+
+import shutil
+import zipfile
+import tempfile
+import unittest
+from os.path import join, exists
+from lib.writer import Writer, DeflatedMember
+
+
+class TestWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.text = ''.join('line {}\n'.format(i) for i in range(100000))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write_zip(self, parallel):
+        zip_file = join(self.temp_dir, 'out.zip')
+        summary = join(self.temp_dir, 'summary.html')
+        shard = join(self.temp_dir, 'summary_shards', 'shard-0.js')
+
+        with Writer(zip_file, parallel=parallel) as writer:
+            with writer.open(summary) as out_file:
+                out_file.write(self.text)
+            with writer.open(shard, base=summary) as out_file:
+                out_file.write('addShard(0, "");\n')
+
+        assert not exists(summary)
+        assert not exists(shard)
+        with zipfile.ZipFile(zip_file) as zippy:
+            assert zippy.namelist() == [
+                'summary.html', join('summary_shards', 'shard-0.js')]
+            assert zippy.read('summary.html').decode('utf-8') == self.text
+
+    def test_zip(self):
+        self.write_zip(parallel=False)
+
+    def test_zip_parallel(self):
+        self.write_zip(parallel=True)
+
+    def test_disk(self):
+        path = join(self.temp_dir, 'sub', 'out.csv')
+
+        with Writer() as writer:
+            with writer.open(path) as out_file:
+                out_file.write(self.text)
+
+        with open(path) as in_file:
+            assert in_file.read() == self.text
+
+    def test_splice(self):
+        zip_file = join(self.temp_dir, 'out.zip')
+        member = DeflatedMember(max_size=1024)
+        member.write(self.text.encode('utf-8'))
+        member.close()
+
+        with Writer(zip_file) as writer:
+            with writer.open(join(self.temp_dir, 'a.csv')) as out_file:
+                out_file.write('a\n')
+            writer.splice(join(self.temp_dir, 'b.csv'), member)
+        member.discard()
+
+        assert member.compress_size < member.size
+        with zipfile.ZipFile(zip_file) as zippy:
+            assert zippy.testzip() is None
+            assert zippy.namelist() == ['a.csv', 'b.csv']
+            assert zippy.read('b.csv').decode('utf-8') == self.text
+            assert [i.external_attr >> 16 for i in zippy.infolist()] == [
+                0o644, 0o644]